@@ -0,0 +1,95 @@
+import argparse
+import csv
+import random
+from datetime import date, timedelta
+from typing import Iterator, List
+
+# Колонки файлов с оценками, как во входных данных отчётов
+FIELDNAMES = ["student_name", "subject", "grade", "teacher_name", "date"]
+
+# Варианты некорректных строк: плохая оценка, пустая оценка, короткая строка
+MALFORMED_KINDS = ("bad-grade", "empty-grade", "short-row")
+
+
+def generate_rows(
+    rows: int,
+    students: int = 1000,
+    subjects: int = 10,
+    teachers: int = 50,
+    malformed_rate: float = 0.0,
+    seed: int = 0,
+) -> Iterator[List[str]]:
+    """
+    Генерирует синтетические строки с оценками
+
+    Количество различных студентов, предметов и преподавателей задаёт
+    кардинальность колонок, malformed_rate - долю некорректных строк.
+    """
+
+    rng = random.Random(seed)
+    start_date = date(2024, 9, 1)
+
+    for _ in range(rows):
+        row = [
+            f"Студент {rng.randrange(students)}",
+            f"Предмет {rng.randrange(subjects)}",
+            str(rng.randint(2, 5)),
+            f"Преподаватель {rng.randrange(teachers)}",
+            (start_date + timedelta(days=rng.randrange(270))).isoformat(),
+        ]
+        if rng.random() < malformed_rate:
+            kind = rng.choice(MALFORMED_KINDS)
+            if kind == "bad-grade":
+                row[2] = "н/а"
+            elif kind == "empty-grade":
+                row[2] = ""
+            else:
+                row = row[:2]
+        yield row
+
+
+def generate_csv(
+    file_path: str,
+    rows: int,
+    students: int = 1000,
+    subjects: int = 10,
+    teachers: int = 50,
+    malformed_rate: float = 0.0,
+    seed: int = 0,
+) -> None:
+    """Записывает синтетический CSV файл с оценками"""
+
+    with open(file_path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELDNAMES)
+        writer.writerows(
+            generate_rows(rows, students, subjects, teachers, malformed_rate, seed)
+        )
+
+
+def main() -> None:
+    """Генерирует CSV файл с параметрами из командной строки"""
+
+    parser = argparse.ArgumentParser(description="Генерация синтетических оценок")
+    parser.add_argument("output", help="Путь к создаваемому CSV файлу")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--subjects", type=int, default=10)
+    parser.add_argument("--teachers", type=int, default=50)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generate_csv(
+        args.output,
+        args.rows,
+        args.students,
+        args.subjects,
+        args.teachers,
+        args.malformed_rate,
+        args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.data_generator import generate_csv
+from reports.report_factory import ReportFactory
+from utils.file_reader import read_csv_files
+
+# Допустимое замедление этапа относительно базового результата
+DEFAULT_THRESHOLD = 0.10
+
+# Модуль, время импорта которого считается временем запуска программы
+STARTUP_MODULE = "main"
+
+# Корень репозитория, из которого импортируется STARTUP_MODULE
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _read_stage(file_path: str) -> int:
+    """Этап чтения: read_csv_files"""
+
+    return len(read_csv_files([file_path]))
+
+
+def _generate_stage(file_path: str, report_name: str) -> Callable[[], int]:
+    """Подготавливает этап generate(): данные читаются до замера"""
+
+    data = read_csv_files([file_path])
+    report = ReportFactory.get_report(report_name)
+
+    def stage() -> int:
+        report.generate(data)
+        return len(data)
+
+    return stage
+
+
+def _print_stage(file_path: str, report_name: str) -> Callable[[], int]:
+    """Подготавливает этап print_report(): отчёт строится до замера"""
+
+    report = ReportFactory.get_report(report_name)
+    result = report.generate(read_csv_files([file_path]))
+
+    def stage() -> int:
+        with open(os.devnull, "w", encoding="utf-8") as devnull:
+            with redirect_stdout(devnull):
+                report.print_report(result)
+        return len(result.get("rows", []))
+
+    return stage
+
+
+def parse_importtime(output: str, module: str) -> Tuple[int, int]:
+    """
+    Разбирает вывод python -X importtime
+
+    Returns:
+        Пара (суммарное время импорта module с зависимостями в мкс,
+        количество импортированных модулей).
+    """
+
+    cumulative = 0
+    modules = 0
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = [field.strip() for field in line[len("import time:") :].split("|")]
+        if not fields[1].isdigit():
+            continue
+        modules += 1
+        if fields[2] == module:
+            cumulative = int(fields[1])
+    return cumulative, modules
+
+
+def _startup_stage() -> Dict:
+    """
+    Этап запуска: импорт STARTUP_MODULE в новом интерпретаторе
+
+    Время берётся из python -X importtime, поэтому в него не входит
+    запуск самого интерпретатора, одинаковый для всех версий программы.
+    """
+
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {STARTUP_MODULE}"],
+        capture_output=True,
+        check=True,
+        text=True,
+        cwd=ROOT_DIR,
+    )
+    microseconds, modules = parse_importtime(completed.stderr, STARTUP_MODULE)
+    return {
+        "seconds": microseconds / 1_000_000,
+        "rows": 0,
+        "rows_per_sec": None,
+        "peak_rss_kb": None,
+        "modules": modules,
+    }
+
+
+def _measure(stage: str, file_path: str, report_name: Optional[str]) -> Dict:
+    """
+    Выполняет этап и замеряет время и пиковую память процесса
+
+    Вызывается в отдельном процессе, чтобы пиковая память относилась
+    только к этому этапу.
+    """
+
+    if stage == "read":
+        run: Callable[[], int] = lambda: _read_stage(file_path)
+    elif stage == "generate":
+        run = _generate_stage(file_path, str(report_name))
+    else:
+        run = _print_stage(file_path, str(report_name))
+
+    started = time.perf_counter()
+    rows = run()
+    seconds = time.perf_counter() - started
+
+    return {
+        "seconds": seconds,
+        "rows": rows,
+        "rows_per_sec": rows / seconds if seconds else None,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def _measure_in_child(args: Tuple[str, str, Optional[str]]) -> Dict:
+    return _measure(*args)
+
+
+def run_benchmarks(file_path: str, repeat: int = 1) -> Dict[str, Dict]:
+    """
+    Замеряет этапы: запуск программы, чтение файла, generate()
+    и print_report() каждого отчёта
+
+    Каждый этап запускается repeat раз в новом процессе,
+    в результат попадает самый быстрый запуск.
+    """
+
+    results: Dict[str, Dict] = {
+        f"import:{STARTUP_MODULE}": min(
+            (_startup_stage() for _ in range(repeat)),
+            key=lambda measured: measured["seconds"],
+        )
+    }
+
+    stages: List[Tuple[str, str, Optional[str]]] = [("read", "read_csv_files", None)]
+    for report_name in ReportFactory.get_available_reports():
+        stages.append(("generate", f"generate:{report_name}", report_name))
+        stages.append(("print", f"print_report:{report_name}", report_name))
+
+    context = multiprocessing.get_context("spawn")
+    for stage, name, stage_report in stages:
+        runs = []
+        for _ in range(repeat):
+            with context.Pool(1) as pool:
+                runs.append(
+                    pool.apply(_measure_in_child, ((stage, file_path, stage_report),))
+                )
+        results[name] = min(runs, key=lambda measured: measured["seconds"])
+
+    return results
+
+
+def compare_results(
+    current: Dict[str, Dict],
+    baseline: Dict[str, Dict],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[str]:
+    """Возвращает описания этапов, замедлившихся больше чем на threshold"""
+
+    regressions = []
+    for name, measured in current.items():
+        base = baseline.get(name)
+        if not base or not base.get("seconds"):
+            continue
+
+        ratio = measured["seconds"] / base["seconds"]
+        if ratio > 1 + threshold:
+            regressions.append(
+                f"{name}: {base['seconds']:.4f}s -> {measured['seconds']:.4f}s "
+                f"(+{(ratio - 1) * 100:.1f}%)"
+            )
+    return regressions
+
+
+def _git_commit() -> Optional[str]:
+    """Возвращает текущий коммит, если запуск идёт из git-репозитория"""
+
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    """Генерирует данные, замеряет этапы и сохраняет результаты в JSON"""
+
+    parser = argparse.ArgumentParser(description="Замеры производительности")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--subjects", type=int, default=10)
+    parser.add_argument("--teachers", type=int, default=50)
+    parser.add_argument("--malformed-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="JSON с базовыми результатами")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    params: Dict[str, Any] = {
+        "rows": args.rows,
+        "students": args.students,
+        "subjects": args.subjects,
+        "teachers": args.teachers,
+        "malformed_rate": args.malformed_rate,
+        "seed": args.seed,
+    }
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, "grades.csv")
+        generate_csv(file_path, **params)
+        stages = run_benchmarks(file_path, args.repeat)
+
+    results = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "params": params,
+        "stages": stages,
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(results, file, ensure_ascii=False, indent=2)
+
+    for name, measured in stages.items():
+        if "modules" in measured:
+            print(f"{name}: {measured['seconds']:.4f}s, {measured['modules']} модулей")
+            continue
+        print(
+            f"{name}: {measured['seconds']:.4f}s, "
+            f"{measured['rows_per_sec'] or 0:.0f} строк/с, "
+            f"{measured['peak_rss_kb']} КБ"
+        )
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        if baseline.get("params") != params:
+            print("Внимание: параметры базового замера отличаются", file=sys.stderr)
+
+        regressions = compare_results(stages, baseline["stages"], args.threshold)
+        for regression in regressions:
+            print(f"Замедление: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
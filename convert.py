@@ -0,0 +1,63 @@
+import argparse
+import os
+import sys
+from typing import Optional
+
+from utils.compression import EXTENSIONS
+from utils.dataset import DATASET_SUFFIX, convert_csv
+from utils.discovery import expand_inputs
+
+
+def output_path(file_path: str, output_dir: Optional[str]) -> str:
+    """Возвращает путь колоночного файла для CSV файла (в том числе сжатого)"""
+
+    name, extension = os.path.splitext(os.path.basename(file_path))
+    if extension.lower() in EXTENSIONS:
+        name = os.path.splitext(name)[0]
+    name += DATASET_SUFFIX
+    return os.path.join(output_dir or os.path.dirname(file_path), name)
+
+
+def main() -> None:
+    """
+    Переводит CSV файлы в колоночный двоичный формат
+
+    Получившиеся файлы можно передавать в --files основного приложения
+    вместо исходных CSV.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Перевод CSV файлов в колоночный двоичный формат",
+    )
+    parser.add_argument(
+        "--files",
+        required=True,
+        nargs="+",
+        help="Пути к CSV файлам, шаблоны, каталоги или @манифест через пробел",
+    )
+    parser.add_argument(
+        "--output-dir",
+        help="Каталог для колоночных файлов; по умолчанию рядом с CSV",
+    )
+
+    args = parser.parse_args()
+
+    try:
+        if args.output_dir:
+            os.makedirs(args.output_dir, exist_ok=True)
+
+        for file_path in expand_inputs(args.files):
+            target = output_path(file_path, args.output_dir)
+            rows = convert_csv(file_path, target)
+            print(f"{file_path} -> {target}: {rows} строк")
+
+    except FileNotFoundError as e:
+        print(f"Ошибка: Файл не найден - {e}", file=sys.stderr)
+        sys.exit(1)
+    except (ValueError, IOError) as e:
+        print(f"Ошибка при обработке данных: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import argparse
+import sys
+
+from utils.arguments import positive_int
+from utils.discovery import expand_inputs
+from utils.file_index import DEFAULT_BLOCK_ROWS, build_index, write_index
+
+
+def main() -> None:
+    """
+    Строит индексы файлов данных
+
+    Рядом с каждым файлом записывается индекс (файл .idx): количество
+    строк, диапазоны значений колонок, множества предметов и преподавателей,
+    фильтр Блума студентов и смещения блоков по --block-rows строк.
+    По нему основное приложение с --where пропускает файлы и блоки,
+    в которых нет подходящих строк, а при --jobs делит файл на части
+    без повторного поиска границ записей. Индекс изменённого файла
+    не используется, пока его не построят заново.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Построение индексов файлов данных для фильтра --where",
+    )
+    parser.add_argument(
+        "--files",
+        required=True,
+        nargs="+",
+        help="Пути к CSV файлам, шаблоны, каталоги или @манифест через пробел",
+    )
+    parser.add_argument(
+        "--block-rows",
+        type=positive_int,
+        default=DEFAULT_BLOCK_ROWS,
+        help="Через сколько строк несжатого CSV запоминается смещение блока",
+    )
+
+    args = parser.parse_args()
+
+    try:
+        for file_path in expand_inputs(args.files):
+            index = build_index(file_path, args.block_rows)
+            target = write_index(file_path, index)
+            print(
+                f"{file_path} -> {target}: {index.rows} строк, "
+                f"{len(index.blocks)} блоков"
+            )
+
+    except FileNotFoundError as e:
+        print(f"Ошибка: Файл не найден - {e}", file=sys.stderr)
+        sys.exit(1)
+    except (ValueError, IOError) as e:
+        print(f"Ошибка при обработке данных: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
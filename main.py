@@ -1,17 +1,56 @@
 import argparse
+import cProfile
+import os
 import sys
+from typing import Any, Optional, Tuple, Type
 
-from reports.report_factory import ReportFactory
-from utils.file_reader import read_csv_files
+from reports.base_report import BaseReport
+from reports.group_by import GroupByReport
+from reports.multi_report import REPORT_PLACEHOLDER, MultiReport, report_output_path
+from reports.report_factory import DEFAULT_ENGINE, ReportFactory
+from utils import profiling
+from utils.arguments import (
+    MEGABYTE,
+    condition,
+    fraction,
+    non_negative_int,
+    positive_int,
+)
+from utils.cache import DEFAULT_CACHE_SIZE, ParseCache
+from utils.compression import DECOMPRESSION_ERRORS
+from utils.incremental import IncrementalStore
+from utils.parallel import (
+    DEFAULT_CHUNK_SIZE,
+    AggregateOptions,
+    accumulate_rows,
+    aggregate_files,
+)
+from utils.readers import READERS, ReadOptions, iter_rows
+from utils.writers import OUTPUT_FORMATS, open_output
 
+# Ошибки, о которых сообщается как об ошибке в данных
+DATA_ERRORS: Tuple[Type[Exception], ...] = (ValueError, *DECOMPRESSION_ERRORS)
 
-def main() -> None:
-    """
-    Основная функция приложения
 
-    Принимает список файлов и тип необходимого отчёта.
-    Генерирует соответствующий отчёт.
-    """
+def create_report(report_name: str, args: argparse.Namespace) -> BaseReport:
+    """Создает отчет и передает ему параметры командной строки"""
+
+    report = ReportFactory.get_report(report_name, args.engine)
+    report.offset = args.offset
+    report.limit = args.limit
+    report.where = tuple(args.where or ())
+    if args.sketch_error is not None:
+        # Модуль приближённого отчёта импортируется, только если он нужен
+        # pylint: disable-next=import-outside-toplevel
+        from reports.student_performance_approx import ApproxStudentPerformanceReport
+
+        if isinstance(report, ApproxStudentPerformanceReport):
+            report.sketch_error = args.sketch_error
+    return report
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Создает разбор аргументов командной строки"""
 
     parser = argparse.ArgumentParser(
         description="Анализ успеваемости студентов",
@@ -20,37 +59,274 @@ def main() -> None:
         "--files",
         required=True,
         nargs="+",
-        help="Пути к CSV файлам через пробел",
+        help="Пути к CSV файлам, шаблоны, каталоги или @манифест через пробел",
     )
     parser.add_argument(
         "--report",
         required=True,
+        nargs="+",
         choices=ReportFactory.get_available_reports(),
-        help="Тип отчета для генерации",
+        help="Типы отчетов для генерации; несколько отчетов строятся "
+        "за один проход по файлам",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ReportFactory.get_available_engines(),
+        default=DEFAULT_ENGINE,
+        help="Движок вычисления отчета",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=positive_int,
+        default=1,
+        help="Количество процессов для параллельного разбора файлов",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=positive_int,
+        default=DEFAULT_CHUNK_SIZE // MEGABYTE,
+        help="Размер части большого файла в МБ при параллельном разборе",
+    )
+    parser.add_argument(
+        "--io-threads",
+        type=positive_int,
+        default=1,
+        help="Количество потоков, заранее читающих следующие файлы "
+        "(для медленных и сетевых дисков; только --reader csv "
+        "без --jobs, --cache-dir и --incremental-dir)",
+    )
+    parser.add_argument(
+        "--reader",
+        choices=READERS,
+        default="csv",
+        help="Способ чтения CSV: модуль csv или разбор байтов через mmap",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Каталог кэша разобранных файлов; без него кэш не используется",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=positive_int,
+        default=DEFAULT_CACHE_SIZE // MEGABYTE,
+        help="Максимальный размер кэша в МБ",
+    )
+    parser.add_argument(
+        "--incremental-dir",
+        help="Каталог прогресса чтения дописываемых файлов: при повторных "
+        "запусках разбираются только новые строки в конце файлов",
+    )
+    parser.add_argument(
+        "--memory-limit",
+        type=positive_int,
+        help="Предел памяти таблицы групп в МБ: при превышении группы "
+        "сбрасываются во временные файлы и объединяются с диска",
+    )
+    parser.add_argument(
+        "--sketch-error",
+        type=fraction,
+        help="Относительная ошибка сводок движка approx (по умолчанию 0.01, "
+        "только с --engine approx): "
+        "меньше ошибка - больше студентов в рейтинге и больше памяти",
+    )
+    parser.add_argument(
+        "--where",
+        action="append",
+        type=condition,
+        metavar="CONDITION",
+        help="Условие на строки, например subject=Математика, "
+        "teacher_name!=Иванов или date>=2024-09-01; можно повторять, "
+        "условия объединяются через И",
+    )
+    page = parser.add_mutually_exclusive_group()
+    page.add_argument(
+        "--top",
+        dest="limit",
+        type=positive_int,
+        help="Вывести только первые K строк отчета",
+    )
+    page.add_argument(
+        "--limit",
+        dest="limit",
+        type=positive_int,
+        help="Количество строк страницы отчета, начиная с --offset",
+    )
+    parser.add_argument(
+        "--offset",
+        type=non_negative_int,
+        default=0,
+        help="Сколько первых строк отчета пропустить",
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=OUTPUT_FORMATS,
+        default="grid",
+        help="Формат вывода: таблица grid или потоковые csv, tsv, jsonl, text",
+    )
+    parser.add_argument(
+        "--output",
+        help="Файл для отчета вместо stdout; при нескольких отчетах {report} "
+        "в пути заменяется именем отчета и каждый пишется в свой файл",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="text",
+        choices=profiling.PROFILE_FORMATS,
+        help="Вывести профиль выполнения в stderr: разбивку по этапам (text), "
+        "таймеры и счётчики в JSON (json) или статистику cProfile (cprofile)",
+    )
+    parser.add_argument(
+        "--profile-output",
+        help="Файл для профиля вместо stderr",
     )
 
-    args = parser.parse_args()
+    return parser
 
-    try:
-        data = read_csv_files(args.files)
 
-        if not data:
-            print("Нет данных для анализа")
-            return
+def create_reports(args: argparse.Namespace) -> BaseReport:
+    """Создает отчет или MultiReport из нескольких отчетов --report"""
+
+    reports = [
+        (report_name, create_report(report_name, args))
+        for report_name in dict.fromkeys(args.report)
+    ]
+    return reports[0][1] if len(reports) == 1 else MultiReport(reports)
+
 
-        report = ReportFactory.get_report(args.report)
-        result = report.generate(data)
+def aggregate(
+    report: BaseReport, args: argparse.Namespace, memory_limit: Optional[int]
+) -> Tuple[bool, Any]:
+    """Агрегирует файлы --files в состояние отчета выбранным способом"""
+
+    cache = None
+    if args.cache_dir:
+        cache = ParseCache(args.cache_dir, args.cache_size * MEGABYTE)
+
+    progress_store = None
+    if args.incremental_dir:
+        progress_store = IncrementalStore(args.incremental_dir)
+
+    if args.jobs > 1 or cache is not None or progress_store is not None:
+        return aggregate_files(
+            report,
+            args.files,
+            AggregateOptions(
+                args.jobs,
+                args.chunk_size * MEGABYTE,
+                args.reader,
+                cache,
+                progress_store,
+                memory_limit,
+            ),
+        )
+    return accumulate_rows(
+        report,
+        iter_rows(
+            args.files,
+            ReadOptions(args.reader, args.io_threads),
+            report.columns,
+            report.converters,
+            report.where,
+        ),
+        memory_limit,
+    )
+
+
+def write_result(report: BaseReport, result: dict, args: argparse.Namespace) -> None:
+    """Выводит результат отчета в stdout или в файлы --output"""
+
+    if (
+        isinstance(report, MultiReport)
+        and args.output is not None
+        and REPORT_PLACEHOLDER in args.output
+    ):
+        # Каждый отчет в свой файл: --output reports/{report}.csv
+        for report_name, part, part_result in report.parts(result):
+            output = report_output_path(args.output, report_name)
+            with open_output(output) as stream:
+                part.write_report(part_result, args.output_format, stream)
+    elif args.output_format == "grid" and args.output is None:
         report.print_report(result)
+    else:
+        with open_output(args.output) as stream:
+            report.write_report(result, args.output_format, stream)
+
+
+def run(args: argparse.Namespace, parser: argparse.ArgumentParser) -> None:
+    """Строит и выводит отчеты по разобранным аргументам командной строки"""
 
+    if args.sketch_error is not None and args.engine != "approx":
+        parser.error("--sketch-error применяется только с --engine approx")
+    if args.io_threads > 1 and (
+        args.reader != "csv" or args.jobs > 1 or args.cache_dir or args.incremental_dir
+    ):
+        parser.error(
+            "--io-threads применяется только с --reader csv "
+            "без --jobs, --cache-dir и --incremental-dir"
+        )
+
+    report = create_reports(args)
+
+    memory_limit = None
+    if args.memory_limit is not None:
+        if not isinstance(report, GroupByReport):
+            parser.error(
+                "--memory-limit поддерживают только отдельные "
+                "отчеты-группировки (движки python и numpy)"
+            )
+        memory_limit = args.memory_limit * MEGABYTE
+
+    with profiling.stage("aggregate"):
+        has_rows, state = aggregate(report, args, memory_limit)
+
+    if not has_rows:
+        print("Нет данных для анализа")
+        return
+
+    with profiling.stage("finalize"):
+        result = report.finalize(state)
+    with profiling.stage("print_report"):
+        write_result(report, result, args)
+
+
+def main() -> None:
+    """
+    Основная функция приложения
+
+    Принимает список файлов и типы необходимых отчётов.
+    Генерирует соответствующие отчёты за один проход по файлам.
+    """
+
+    parser = build_parser()
+    args = parser.parse_args()
+
+    profiler = profiling.enable() if args.profile else None
+    stats = cProfile.Profile() if args.profile == "cprofile" else None
+
+    try:
+        if stats is not None:
+            stats.enable()
+        run(args, parser)
+    except BrokenPipeError:
+        # Получатель вывода (например, head) закрыл канал раньше конца отчёта
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
     except FileNotFoundError as e:
         print(f"Ошибка: Файл не найден - {e}", file=sys.stderr)
         sys.exit(1)
-    except ValueError as e:
+    except DATA_ERRORS as e:
         print(f"Ошибка в данных: {e}", file=sys.stderr)
         sys.exit(1)
     except (KeyError, TypeError, IOError) as e:
         print(f"Ошибка при обработке данных: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        if stats is not None:
+            stats.disable()
+        if profiler is not None:
+            profiling.disable()
+            profiling.write_profile(profiler, args.profile, args.profile_output, stats)
 
 
 if __name__ == "__main__":
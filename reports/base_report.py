@@ -1,22 +1,101 @@
+import sys
 from abc import ABC, abstractmethod
+from typing import Any, Iterable, Iterator, Optional, TextIO, Tuple
 
-from tabulate import tabulate
+from utils.filters import Where, filter_dicts
+from utils.projection import Converters, project_dicts
+from utils.writers import WRITERS
 
 
 class BaseReport(ABC):
-    """Абстрактный базовый класс для проектирования отчёта"""
+    """
+    Абстрактный базовый класс для проектирования отчёта
+
+    Помимо generate() отчёт поддерживает пошаговое вычисление:
+    initial_state() -> accumulate() по частям данных -> merge() частичных
+    состояний -> finalize(). По умолчанию состояние - это список строк,
+    который передаётся в generate(); отчёты с компактным состоянием
+    переопределяют эти методы.
+
+    Отчёт может объявить columns и converters: тогда читатель отдаёт
+    в accumulate() не словари, а кортежи только этих колонок с уже
+    преобразованными значениями, а некорректные строки отбрасывает.
+
+    offset и limit задают страницу итоговых строк: finalize() отдаёт
+    только строки с offset по offset + limit.
+
+    where - условия на исходные значения колонок (utils.filters): читатель
+    отбрасывает не подошедшие строки до преобразований, project() - тоже.
+    """
+
+    # Колонки, которые читает отчёт; None - все колонки файла
+    columns: Optional[Tuple[str, ...]] = None
+
+    # Преобразования значений колонок, например {"grade": int}
+    converters: Converters = {}
+
+    # Сколько первых строк отчёта пропустить и сколько вывести (None - все)
+    offset: int = 0
+    limit: Optional[int] = None
+
+    # Условия фильтра строк, объединяемые через И
+    where: Where = ()
 
     @abstractmethod
-    def generate(self, data: list) -> dict:
+    def generate(self, data: Iterable[dict]) -> dict:
         """
         Генерирует отчет на основе данных
 
-        Описывается логика формирования отчёта
+        Описывается логика формирования отчёта.
+        Данные могут быть генератором строк: отчёт обязан пройти
+        по ним один раз и не сохранять строки целиком.
+        """
+
+    def state_name(self) -> str:
+        """Вид промежуточного состояния для ключей кэша: класс отчёта"""
+        report_class = type(self)
+        return f"{report_class.__module__}.{report_class.__qualname__}"
+
+    def project(self, data: Iterable[dict]) -> Iterator[Any]:
+        """Приводит строки-словари к виду, который ожидает accumulate()"""
+        rows = filter_dicts(data, self.where)
+        if self.columns is None:
+            return rows
+        return project_dicts(rows, self.columns, self.converters)
+
+    def initial_state(self) -> Any:
+        """Возвращает пустое промежуточное состояние отчёта"""
+        return []
+
+    def accumulate(self, state: Any, data: Iterable[Any]) -> Any:
+        """Добавляет порцию данных в промежуточное состояние"""
+        state.extend(data)
+        return state
+
+    def merge(self, state: Any, other: Any) -> Any:
         """
+        Объединяет два промежуточных состояния
 
-    def print_report(self, result: dict) -> None:
+        Порядок важен: other должен относиться к данным, идущим после state.
         """
-        Выводит отчет в консоль в виде таблицы
+        state.extend(other)
+        return state
+
+    def finalize(self, state: Any) -> dict:
+        """Формирует итоговый отчет из промежуточного состояния"""
+        return self.paginate(self.generate(state))
+
+    def paginate(self, result: dict) -> dict:
+        """Оставляет в отчёте только строки страницы offset/limit"""
+        if not result or (self.offset == 0 and self.limit is None):
+            return result
+
+        end = None if self.limit is None else self.offset + self.limit
+        return {**result, "rows": result.get("rows", [])[self.offset : end]}
+
+    def print_report(self, result: dict, file: Optional[TextIO] = None) -> None:
+        """
+        Выводит отчет в консоль (или в file) в виде таблицы
 
         +----+---------------------+---------+
         |    |    student_name     |   grade |
@@ -27,10 +106,39 @@ class BaseReport(ABC):
         """
 
         if not result:
-            print("Нет данных для отображения")
+            print("Нет данных для отображения", file=file)
             return
 
+        # tabulate нужен только для таблицы grid и импортируется при выводе
+        # pylint: disable-next=import-outside-toplevel
+        from tabulate import tabulate
+
         headers = result.get("headers", [])
         rows = result.get("rows", [])
 
-        print(tabulate(rows, headers=headers, tablefmt="grid", stralign="center"))
+        print(
+            tabulate(rows, headers=headers, tablefmt="grid", stralign="center"),
+            file=file,
+        )
+
+    def write_report(
+        self, result: dict, output_format: str = "grid", file: Optional[TextIO] = None
+    ) -> None:
+        """
+        Записывает отчет в выбранном формате в stdout или file
+
+        grid - таблица print_report(), которой нужны все строки сразу.
+        Остальные форматы (utils.writers.WRITERS) пишут строки постранично
+        по мере их получения из result["rows"].
+        """
+
+        if output_format == "grid":
+            self.print_report(result, file)
+            return
+
+        if output_format not in WRITERS:
+            raise ValueError(f"Неизвестный формат вывода: {output_format}")
+
+        WRITERS[output_format](
+            result.get("headers", []), result.get("rows", []), file or sys.stdout
+        )
@@ -0,0 +1,393 @@
+import heapq
+import sys
+from itertools import groupby, islice
+from operator import itemgetter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from utils.spill import GroupSpill
+
+from .base_report import BaseReport
+
+# Функции метрик и накопители, которые нужны каждой из них
+METRIC_SLOTS: Dict[str, Tuple[str, ...]] = {
+    "count": (),
+    "sum": ("sum",),
+    "mean": ("sum",),
+    "min": ("min",),
+    "max": ("max",),
+    "median": ("histogram",),
+}
+
+# Знаков после запятой у средних и медиан
+DIGITS = 2
+
+# Промежуточное состояние: ключ группы -> [накопители..., количество строк].
+# Ключ - значение колонки или кортеж значений, если колонок группировки
+# несколько; накопитель histogram - словарь значение -> количество.
+GroupTotals = Dict[Any, List[Any]]
+
+
+class Metric(NamedTuple):
+    """Метрика группы: колонка отчёта, функция METRIC_SLOTS и колонка значений"""
+
+    name: str
+    function: str
+    # Колонка значений; у count не указывается
+    column: Optional[str] = None
+
+
+def _median(histogram: Dict[Any, int], count: int) -> Any:
+    """Медиана значений по их количествам, как statistics.median"""
+
+    middle = (count - 1) // 2
+    seen = 0
+    values = iter(sorted(histogram.items()))
+    for value, value_count in values:
+        seen += value_count
+        if seen > middle:
+            if count % 2 or seen > middle + 1:
+                return value
+            return (value + next(values)[0]) / 2
+    raise ValueError("Медиана пустой группы")
+
+
+def _mean_of(slot: int) -> Callable[[List[Any]], Any]:
+    """Средняя по сумме в накопителе slot"""
+
+    def mean(totals: List[Any]) -> Any:
+        return round(totals[slot] / totals[-1], DIGITS)
+
+    return mean
+
+
+def _median_of(slot: int) -> Callable[[List[Any]], Any]:
+    """Медиана по количествам значений в накопителе slot"""
+
+    def median(totals: List[Any]) -> Any:
+        return round(_median(totals[slot], totals[-1]), DIGITS)
+
+    return median
+
+
+def _interned(key: Tuple[Any, ...]) -> Tuple[Any, ...]:
+    """Ключ группы с общими строками: одно значение на все ключи с ним"""
+
+    return tuple(sys.intern(part) if type(part) is str else part for part in key)
+
+
+class GroupByReport(BaseReport):
+    """
+    Отчет-группировка: метрики по группам строк с равными значениями колонок
+
+    Отчёт описывается декларативно: group_by - колонки группировки,
+    metrics - метрики (Metric), converters - типы колонок значений,
+    sort_by - метрика, по которой упорядочены группы (None - порядок
+    первого появления), descending - порядок по убыванию. Колонки для
+    читателя выводятся из описания.
+
+    Строки группируются в словаре по ключу, для каждой группы хранятся
+    только накопители метрик: суммы, минимумы, максимумы, количества
+    значений для медианы и количество строк. Состояния частей данных
+    объединяются, поэтому описанный отчёт сразу работает с --jobs,
+    --cache-dir, --incremental-dir и несколькими отчетами за один проход.
+    """
+
+    # Колонки выводятся из описания в __init_subclass__
+    columns: Tuple[str, ...] = ()
+
+    group_by: Tuple[str, ...] = ()
+    metrics: Tuple[Metric, ...] = ()
+    sort_by: Optional[str] = None
+    descending: bool = True
+
+    # Накопители в порядке их мест в списке группы: (вид, колонка)
+    slots: Tuple[Tuple[str, str], ...] = ()
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # Наследник без своего описания сохраняет колонки и накопители предка
+        if "group_by" in vars(cls) or "metrics" in vars(cls):
+            cls._plan()
+
+    @classmethod
+    def _plan(cls) -> None:
+        """Проверяет описание и выводит из него колонки и накопители"""
+
+        names = [metric.name for metric in cls.metrics]
+        if cls.sort_by is not None and cls.sort_by not in names:
+            raise ValueError(f"Нет метрики для сортировки: {cls.sort_by}")
+
+        slots: List[Tuple[str, str]] = []
+        for metric in cls.metrics:
+            kinds = METRIC_SLOTS.get(metric.function)
+            if kinds is None:
+                raise ValueError(f"Неизвестная функция метрики: {metric.function}")
+            if (metric.column is None) != (metric.function == "count"):
+                raise ValueError(f"Колонка значений указана неверно: {metric.name}")
+            if metric.column is None:
+                continue
+            for kind in kinds:
+                if (kind, metric.column) not in slots:
+                    slots.append((kind, metric.column))
+
+        cls.slots = tuple(slots)
+        values = [column for _, column in slots if column not in cls.group_by]
+        cls.columns = tuple(cls.group_by) + tuple(dict.fromkeys(values))
+
+    def generate(self, data: Iterable[dict]) -> dict:
+        """
+        Генерирует отчет по группам
+
+        Returns:
+            Словарь, где под ключом 'headers' колонки группировки и метрик,
+            а под ключом 'rows' строки групп.
+        """
+
+        return self.finalize(self.accumulate(self.initial_state(), self.project(data)))
+
+    def initial_state(self) -> GroupTotals:
+        """Возвращает пустую таблицу групп"""
+        return {}
+
+    def accumulate(self, state: GroupTotals, data: Iterable[Tuple]) -> GroupTotals:
+        """Добавляет кортежи колонок columns в таблицу групп"""
+
+        steps = [(kind, self.columns.index(column)) for kind, column in self.slots]
+        if len(self.group_by) == 1 and steps == [("sum", 1)] and len(self.columns) == 2:
+            return self._accumulate_sums(state, data)
+
+        keys = len(self.group_by)
+        key_of = itemgetter(*range(keys))
+        count_slot = len(steps)
+        for row in data:
+            key = key_of(row)
+            totals = state.get(key)
+            if totals is None:
+                if keys > 1:
+                    key = _interned(key)
+                state[key] = [
+                    {row[position]: 1} if kind == "histogram" else row[position]
+                    for kind, position in steps
+                ] + [1]
+                continue
+
+            for slot, (kind, position) in enumerate(steps):
+                value = row[position]
+                if kind == "sum":
+                    totals[slot] += value
+                elif kind == "min":
+                    if value < totals[slot]:
+                        totals[slot] = value
+                elif kind == "max":
+                    if value > totals[slot]:
+                        totals[slot] = value
+                else:
+                    histogram = totals[slot]
+                    histogram[value] = histogram.get(value, 0) + 1
+            totals[count_slot] += 1
+
+        return state
+
+    @staticmethod
+    def _accumulate_sums(
+        state: GroupTotals, data: Iterable[Tuple[Any, Any]]
+    ) -> GroupTotals:
+        """Частый случай: одна колонка группировки и сумма одной колонки"""
+
+        for key, value in data:
+            totals = state.get(key)
+            if totals is None:
+                state[key] = [value, 1]
+            else:
+                totals[0] += value
+                totals[1] += 1
+
+        return state
+
+    def merge(self, state: GroupTotals, other: GroupTotals) -> GroupTotals:
+        """Объединяет накопители групп двух частичных состояний"""
+
+        return self.merge_groups(state, other.items())
+
+    def merge_groups(
+        self,
+        state: GroupTotals,
+        groups: Iterable[Tuple[Any, List[Any]]],
+        copy: bool = True,
+    ) -> GroupTotals:
+        """
+        Добавляет в состояние пары (ключ, накопители)
+
+        Без copy списки накопителей новых групп попадают в состояние как есть.
+        """
+
+        kinds = [kind for kind, _ in self.slots]
+        additive = all(kind == "sum" for kind in kinds)
+        for key, other_totals in groups:
+            totals = state.get(key)
+            if totals is None:
+                if not copy:
+                    state[key] = other_totals
+                elif additive:
+                    state[key] = list(other_totals)
+                else:
+                    state[key] = [
+                        dict(value) if isinstance(value, dict) else value
+                        for value in other_totals
+                    ]
+                continue
+
+            if additive:
+                for slot, value in enumerate(other_totals):
+                    totals[slot] += value
+                continue
+
+            for slot, kind in enumerate(kinds):
+                value = other_totals[slot]
+                if kind == "sum":
+                    totals[slot] += value
+                elif kind == "min":
+                    if value < totals[slot]:
+                        totals[slot] = value
+                elif kind == "max":
+                    if value > totals[slot]:
+                        totals[slot] = value
+                else:
+                    histogram = totals[slot]
+                    for item, item_count in value.items():
+                        histogram[item] = histogram.get(item, 0) + item_count
+            totals[-1] += other_totals[-1]
+
+        return state
+
+    def _metric_functions(self) -> List[Callable[[List[Any]], Any]]:
+        """Функции, вычисляющие метрики по накопителям группы"""
+
+        functions: List[Callable[[List[Any]], Any]] = []
+        for metric in self.metrics:
+            if metric.function == "count":
+                functions.append(itemgetter(-1))
+                continue
+
+            kind = METRIC_SLOTS[metric.function][0]
+            slot = self.slots.index((kind, metric.column))
+            if metric.function == "mean":
+                functions.append(_mean_of(slot))
+            elif metric.function == "median":
+                functions.append(_median_of(slot))
+            else:
+                functions.append(itemgetter(slot))
+        return functions
+
+    def finalize(self, state: Union[GroupTotals, GroupSpill]) -> dict:
+        """
+        Формирует строки групп, упорядоченные по метрике sort_by
+
+        Если задан limit, частичным отбором через кучу выбираются только
+        первые offset + limit групп: O(n log k) вместо полной сортировки.
+        Порядок, включая группы с равной метрикой (в порядке первого
+        появления), совпадает с полной устойчивой сортировкой.
+
+        Таблица, сброшенная на диск (GroupSpill), объединяется по разделам
+        и упорядочивается внешней сортировкой; строки такого отчёта - итератор,
+        который читает временные файлы по мере вывода и затем удаляет их.
+        """
+
+        if isinstance(state, GroupSpill):
+            page: Iterable[Tuple[Any, ...]] = self._spilled_page(state)
+        else:
+            # Группы - кортежи (ключ, метрики...)
+            groups: Iterable[Tuple[Any, ...]] = zip(
+                state.keys(),
+                *(
+                    map(function, state.values())
+                    for function in self._metric_functions()
+                ),
+            )
+
+            if self.sort_by is not None:
+                names = [metric.name for metric in self.metrics]
+                sort_key = itemgetter(names.index(self.sort_by) + 1)
+                if self.limit is None:
+                    groups = sorted(groups, key=sort_key, reverse=self.descending)
+                else:
+                    # nlargest эквивалентен sorted(..., reverse=True)[:n] и устойчив
+                    select = heapq.nlargest if self.descending else heapq.nsmallest
+                    groups = select(self.offset + self.limit, groups, key=sort_key)
+
+            end = None if self.limit is None else self.offset + self.limit
+            page = islice(groups, self.offset, end)
+
+        numbered = enumerate(page, self.offset + 1)
+        rows: Iterable[List[Any]]
+        if len(self.group_by) == 1:
+            rows = ([i, *group] for i, group in numbered)
+        else:
+            rows = ([i, *key, *values] for i, (key, *values) in numbered)
+        if not isinstance(state, GroupSpill):
+            rows = list(rows)
+
+        headers = ["", *self.group_by, *(metric.name for metric in self.metrics)]
+        return {"headers": headers, "rows": rows}
+
+    def _spilled_groups(
+        self, spill: GroupSpill
+    ) -> Iterator[Tuple[Any, int, List[Any]]]:
+        """Группы сброшенной таблицы: (ключ, номер первого появления, метрики)"""
+
+        if spill.table:
+            spill.spill()
+
+        functions = self._metric_functions()
+        for partition in range(spill.partitions):
+            records = spill.iter_partition(partition)
+            for key, key_records in groupby(records, key=itemgetter(0)):
+                # Первая запись ключа - из самого раннего сброса
+                _, ordinal, totals = next(key_records)
+                self.merge_groups(
+                    {key: totals},
+                    ((key, other) for _, _, other in key_records),
+                    copy=False,
+                )
+                yield key, ordinal, [function(totals) for function in functions]
+
+    def _spilled_page(self, spill: GroupSpill) -> Iterator[Tuple[Any, ...]]:
+        """Страница offset/limit групп сброшенной таблицы: (ключ, метрики...)"""
+
+        sort_key: Callable[[Tuple[Any, int, List[Any]]], Any] = itemgetter(1)
+        reverse = False
+        if self.sort_by is not None:
+            position = [metric.name for metric in self.metrics].index(self.sort_by)
+            reverse = self.descending
+            # Равные метрики упорядочены по первому появлению группы
+            direction = -1 if reverse else 1
+
+            def by_metric(group: Tuple[Any, int, List[Any]]) -> Any:
+                return group[2][position], direction * group[1]
+
+            sort_key = by_metric
+
+        groups = self._spilled_groups(spill)
+        try:
+            if self.limit is None:
+                ranking = spill.sort(groups, sort_key, reverse)
+            else:
+                select = heapq.nlargest if reverse else heapq.nsmallest
+                ranking = iter(select(self.offset + self.limit, groups, key=sort_key))
+
+            end = None if self.limit is None else self.offset + self.limit
+            for key, _, values in islice(ranking, self.offset, end):
+                yield (key, *values)
+        finally:
+            spill.close()
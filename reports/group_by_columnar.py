@@ -0,0 +1,197 @@
+from collections import defaultdict
+from itertools import compress, count, islice
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from utils import profiling
+
+from .group_by import GroupByReport, GroupTotals, _interned
+
+# Количество строк, которые переводятся в массивы за один раз
+BATCH_SIZE = 65536
+
+
+def parse_grades(grades: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Векторно переводит оценки в целые числа
+
+    Returns:
+        Пара (оценки, маска корректных значений). Некорректные оценки
+        не отбрасываются, а помечаются в маске как False.
+    """
+
+    raw = np.array(grades, dtype=str)
+    stripped = np.char.strip(raw)
+    valid = np.char.isdecimal(stripped) & (np.char.str_len(stripped) < 19)
+    values = np.zeros(len(raw), dtype=np.int64)
+
+    if valid.any():
+        digits = stripped[valid].tolist()
+        text = " ".join(digits)
+        if text.isascii():
+            values[valid] = np.fromstring(text, dtype=np.int64, sep=" ")
+        else:
+            values[valid] = [int(digit) for digit in digits]
+
+    # Редкие значения вроде "+5" или "1_0" int() принимает, а быстрая
+    # проверка - нет: их разбираем по одному, чтобы не разойтись с int()
+    for index in np.flatnonzero(~valid):
+        try:
+            values[index] = int(raw[index])
+        except (ValueError, OverflowError):
+            continue
+        valid[index] = True
+
+    return values, valid
+
+
+class ColumnarGroupByReport(GroupByReport):
+    """
+    Отчет-группировка на массивах NumPy
+
+    Движок numpy для любого описания GroupByReport, в котором колонки
+    значений целые ({"колонка": int}): строки обрабатываются пачками,
+    ключи групп кодируются целыми числами, значения разбираются векторно,
+    некорректные исключаются маской, накопители считаются через add.at,
+    bincount и minimum.at / maximum.at. Промежуточное состояние и итоговые строки
+    совпадают с обычным отчётом.
+
+    Движок отчета объявляется наследником этого класса и отчета:
+    class ColumnarNewReport(ColumnarGroupByReport, NewReport).
+    """
+
+    def __init__(self) -> None:
+        if any(
+            column in self.group_by or self.converters.get(column) is not int
+            for _, column in self.slots
+        ):
+            raise ValueError(
+                f"Движок numpy поддерживает только целые колонки значений: "
+                f"{type(self).__name__}"
+            )
+        # Значения разбираются здесь, читатель отдаёт исходные строки
+        self.converters = {}
+
+    def accumulate(self, state: GroupTotals, data: Iterable[Tuple]) -> GroupTotals:
+        """Добавляет пачки кортежей колонок columns в таблицу групп"""
+
+        getters = [itemgetter(position) for position in range(len(self.columns))]
+        rows = iter(data)
+        while batch := list(islice(rows, BATCH_SIZE)):
+            self._accumulate_columns(
+                state, [list(map(getter, batch)) for getter in getters]
+            )
+
+        return state
+
+    def _accumulate_columns(self, state: GroupTotals, columns: List[List[Any]]) -> None:
+        """Группирует колонки пачки и добавляет накопители в состояние"""
+
+        keys = len(self.group_by)
+        parsed = [parse_grades(column) for column in columns[keys:]]
+        valid = np.logical_and.reduce([mask for _, mask in parsed])
+        values: Dict[str, np.ndarray] = {
+            column: column_values
+            for column, (column_values, _) in zip(self.columns[keys:], parsed)
+        }
+        if not valid.all():
+            # Значения здесь проверяются уже после читателя
+            dropped = len(valid) - int(valid.sum())
+            profiling.count("rows_dropped", dropped)
+            profiling.count("rows_accepted", -dropped)
+            mask = valid.tolist()
+            columns = [list(compress(column, mask)) for column in columns[:keys]]
+            values = {column: array[valid] for column, array in values.items()}
+
+        names = columns[0] if keys == 1 else list(zip(*columns[:keys]))
+
+        # Коды групп - номер первой строки группы в пачке; словарь
+        # сохраняет порядок первой корректной строки, как в обычном отчёте
+        first_rows: Dict[Any, int] = {}
+        codes = np.fromiter(
+            map(first_rows.setdefault, names, count()),
+            dtype=np.intp,
+            count=len(names),
+        )
+        size = len(names)
+        # Коды групп в порядке первого появления
+        group_codes = np.fromiter(first_rows.values(), dtype=np.intp)
+        slots: List[Iterable[Any]] = []
+        for kind, column in self.slots:
+            column_values = values[column]
+            if kind == "sum":
+                slots.append(self._sums(codes, column_values, group_codes))
+            elif kind == "min":
+                lowest = np.full(size, np.iinfo(np.int64).max)
+                np.minimum.at(lowest, codes, column_values)
+                slots.append(lowest[group_codes].tolist())
+            elif kind == "max":
+                highest = np.full(size, np.iinfo(np.int64).min)
+                np.maximum.at(highest, codes, column_values)
+                slots.append(highest[group_codes].tolist())
+            else:
+                slots.append(
+                    map(
+                        self._histograms(codes, column_values).get, group_codes.tolist()
+                    )
+                )
+        counts = np.bincount(codes, minlength=size)
+        slots.append(counts[group_codes].tolist())
+
+        group_keys = first_rows if keys == 1 else map(_interned, first_rows)
+        self.merge_groups(state, zip(group_keys, map(list, zip(*slots))), copy=False)
+
+    @staticmethod
+    def _sums(
+        codes: np.ndarray, values: np.ndarray, group_codes: np.ndarray
+    ) -> List[int]:
+        """
+        Точные суммы значений групп пачки в порядке group_codes
+
+        bincount складывает во float64 и теряет точность больших чисел,
+        поэтому суммы считаются в int64. Если сумма пачки может выйти
+        за пределы int64, значения складываются целыми Python.
+        """
+
+        if len(values):
+            bound = max(abs(int(values.max())), abs(int(values.min())))
+            if bound * len(values) > np.iinfo(np.int64).max:
+                totals = [0] * len(codes)
+                for code, value in zip(codes.tolist(), values.tolist()):
+                    totals[code] += value
+                return [totals[code] for code in group_codes.tolist()]
+
+        sums = np.zeros(len(codes), dtype=np.int64)
+        np.add.at(sums, codes, values)
+        return sums[group_codes].tolist()
+
+    @staticmethod
+    def _histograms(codes: np.ndarray, values: np.ndarray) -> Dict[int, Dict[int, int]]:
+        """Количества значений каждой группы пачки: код -> значение -> количество"""
+
+        histograms: Dict[int, Dict[int, int]] = defaultdict(dict)
+        if not len(codes):
+            return histograms
+
+        # Пары (код, значение) упорядочиваются, и повторы одной пары идут подряд
+        order = np.lexsort((values, codes))
+        pair_codes, pair_values = codes[order], values[order]
+        starts = np.flatnonzero(
+            np.concatenate(
+                (
+                    [True],
+                    (pair_codes[1:] != pair_codes[:-1])
+                    | (pair_values[1:] != pair_values[:-1]),
+                )
+            )
+        )
+        pair_counts = np.diff(np.append(starts, len(codes)))
+        for code, value, value_count in zip(
+            pair_codes[starts].tolist(),
+            pair_values[starts].tolist(),
+            pair_counts.tolist(),
+        ):
+            histograms[code][value] = value_count
+        return histograms
@@ -0,0 +1,188 @@
+from itertools import islice
+from operator import itemgetter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+)
+
+from utils.projection import INVALID, Converters, Lenient
+
+from .base_report import BaseReport
+
+# Сколько строк передаётся отчётам за один вызов accumulate()
+BATCH_SIZE = 4096
+
+# Шаблон пути --output, в который подставляется имя отчёта
+REPORT_PLACEHOLDER = "{report}"
+
+
+class MultiReport(BaseReport):
+    """
+    Несколько отчётов за один проход по данным
+
+    Каждая строка читается и разбирается один раз и передаётся пачками
+    в accumulate() каждого отчёта; состояние - список состояний отчётов,
+    результат - список пар (имя отчёта, результат).
+
+    Если все отчёты объявляют columns, одинаково преобразуют общие колонки
+    и имеют одни условия where, читатель отдаёт кортежи объединения
+    их колонок, и каждое значение преобразуется один раз. Каждый отчёт
+    получает свои колонки через itemgetter. Колонки, которые читают
+    не все отчёты, нестрогие (utils.projection.Lenient): отсутствующее
+    поле или ошибка преобразования дают INVALID, и строка отбрасывается
+    только для отчётов с этой колонкой. Так каждый отчёт получает те же
+    строки, что и при отдельном запуске.
+
+    Иначе читатель отдаёт строки-словари, и каждый отчёт проецирует
+    и фильтрует их сам.
+    """
+
+    def __init__(self, reports: Sequence[Tuple[str, BaseReport]]) -> None:
+        self.reports = list(reports)
+        first = self.reports[0][1]
+        same_where = all(report.where == first.where for _, report in self.reports)
+        if same_where:
+            self.where = first.where
+        # Позиции колонок каждого отчёта в кортеже объединения колонок
+        self._positions: Optional[List[Tuple[int, ...]]] = None
+        union = _union_columns([report for _, report in self.reports])
+        if same_where and union is not None:
+            self.columns, self.converters, self._positions = union
+
+    def state_name(self) -> str:
+        """Вид состояния: отчёты, из которых оно состоит"""
+        return "+".join(report.state_name() for _, report in self.reports)
+
+    def generate(self, data: Iterable[dict]) -> dict:
+        """Генерирует все отчёты по строкам-словарям"""
+        return self.finalize(self.accumulate(self.initial_state(), self.project(data)))
+
+    def initial_state(self) -> List[Any]:
+        """Возвращает пустые состояния всех отчётов"""
+        return [report.initial_state() for _, report in self.reports]
+
+    def accumulate(self, state: List[Any], data: Iterable[Any]) -> List[Any]:
+        """Передаёт каждую пачку строк в accumulate() всех отчётов"""
+
+        width = len(self.columns or ())
+        for batch in _batches(data):
+            for position, (_, report) in enumerate(self.reports):
+                rows: Iterable[Any]
+                if self._positions is None:
+                    rows = report.project(batch)
+                else:
+                    rows = _select(batch, self._positions[position], width)
+                state[position] = report.accumulate(state[position], rows)
+        return state
+
+    def merge(self, state: List[Any], other: List[Any]) -> List[Any]:
+        """Объединяет состояния каждого отчёта"""
+
+        return [
+            report.merge(report_state, other_state)
+            for (_, report), report_state, other_state in zip(
+                self.reports, state, other
+            )
+        ]
+
+    def finalize(self, state: List[Any]) -> dict:
+        """Формирует результаты всех отчётов со страницами offset/limit каждого"""
+
+        return {
+            "reports": [
+                [name, report.finalize(report_state)]
+                for (name, report), report_state in zip(self.reports, state)
+            ]
+        }
+
+    def parts(self, result: dict) -> Iterator[Tuple[str, BaseReport, dict]]:
+        """Отдаёт тройки (имя, отчёт, результат отчёта)"""
+
+        for (name, report), (_, report_result) in zip(
+            self.reports, result.get("reports", [])
+        ):
+            yield name, report, report_result
+
+    def print_report(self, result: dict, file: Optional[TextIO] = None) -> None:
+        """Выводит таблицы всех отчётов друг за другом с их именами"""
+        self.write_report(result, "grid", file)
+
+    def write_report(
+        self, result: dict, output_format: str = "grid", file: Optional[TextIO] = None
+    ) -> None:
+        """Записывает отчёты друг за другом, перед каждым - строка с именем"""
+
+        for position, (name, report, report_result) in enumerate(self.parts(result)):
+            if position:
+                print(file=file)
+            print(f"== {name} ==", file=file)
+            report.write_report(report_result, output_format, file)
+
+
+def _union_columns(
+    reports: Sequence[BaseReport],
+) -> Optional[Tuple[Tuple[str, ...], Converters, List[Tuple[int, ...]]]]:
+    """
+    Объединение колонок отчётов, их преобразования и позиции колонок отчётов
+
+    None, если какой-то отчёт читает все колонки или отчёты по-разному
+    преобразуют общую колонку. Колонки, которые читают не все отчёты,
+    получают преобразование Lenient.
+    """
+
+    columns: Dict[str, Optional[Callable[[str], Any]]] = {}
+    readers: Dict[str, int] = {}
+    for report in reports:
+        if report.columns is None:
+            return None
+        for column in report.columns:
+            convert = report.converters.get(column)
+            if columns.setdefault(column, convert) is not convert:
+                return None
+            readers[column] = readers.get(column, 0) + 1
+
+    converters: Dict[str, Callable[[str], Any]] = {}
+    for column, convert in columns.items():
+        if readers[column] < len(reports):
+            converters[column] = Lenient(convert)
+        elif convert is not None:
+            converters[column] = convert
+    names = tuple(columns)
+    positions = [
+        tuple(names.index(column) for column in report.columns or ())
+        for report in reports
+    ]
+    return names, converters, positions
+
+
+def _select(batch: List[tuple], positions: Tuple[int, ...], width: int) -> List[tuple]:
+    """Колонки отчёта из кортежей объединения без строк со значениями INVALID"""
+
+    if positions == tuple(range(width)):
+        rows = batch
+    elif len(positions) == 1:
+        rows = [(values[positions[0]],) for values in batch]
+    else:
+        rows = list(map(itemgetter(*positions), batch))
+    return [values for values in rows if INVALID not in values]
+
+
+def _batches(data: Iterable[Any]) -> Iterator[List[Any]]:
+    """Разбивает строки на списки по BATCH_SIZE"""
+
+    rows = iter(data)
+    while batch := list(islice(rows, BATCH_SIZE)):
+        yield batch
+
+
+def report_output_path(output: str, report_name: str) -> str:
+    """Путь файла отчёта: имя отчёта подставляется вместо {report}"""
+    return output.replace(REPORT_PLACEHOLDER, report_name)
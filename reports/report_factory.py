@@ -1,21 +1,65 @@
-from typing import Dict, List, Type
+import importlib
+import importlib.util
+from typing import Dict, List, Optional, Tuple, Type, Union
 
 from reports.base_report import BaseReport
-from reports.student_performance import StudentPerformanceReport
+
+# Движок вычислений, который используется, если другой не выбран
+DEFAULT_ENGINE = "python"
+
+# Класс отчета или путь к нему "модуль:Класс", импортируемый при первом запросе
+ReportSource = Union[Type[BaseReport], str]
+
+
+def _load_class(source: ReportSource) -> Type[BaseReport]:
+    """Возвращает класс отчета, при необходимости импортируя его модуль"""
+
+    if not isinstance(source, str):
+        return source
+
+    module_name, _, class_name = source.partition(":")
+    report_class: Type[BaseReport] = getattr(
+        importlib.import_module(module_name), class_name
+    )
+    return report_class
 
 
 class ReportFactory:
-    """Фабрика для создания отчетов"""
+    """
+    Фабрика для создания отчетов
 
-    _reports: Dict[str, Type[BaseReport]] = {}
+    Отчеты и движки можно регистрировать классом или путем "модуль:Класс":
+    тогда модуль отчета (и его тяжелые зависимости) импортируется только
+    при первом get_report(), а не при запуске программы.
+    """
+
+    _reports: Dict[str, ReportSource] = {}
+    _engines: Dict[Tuple[str, str], ReportSource] = {}
+    # Модули, без которых движок недоступен (например, numpy)
+    _requirements: Dict[Tuple[str, str], str] = {}
 
     @classmethod
-    def get_report(cls, report_name: str) -> BaseReport:
-        """Создает экземпляр отчета по имени"""
-        report_class = cls._reports.get(report_name)
-        if not report_class:
+    def get_report(cls, report_name: str, engine: str = DEFAULT_ENGINE) -> BaseReport:
+        """Создает экземпляр отчета по имени и движку вычислений"""
+        source = cls._reports.get(report_name)
+        if not source:
             raise ValueError(f"Неизвестный тип отчета: {report_name}")
-        return report_class()
+        if engine == DEFAULT_ENGINE:
+            report_class = cls._reports[report_name] = _load_class(source)
+            return report_class()
+
+        key = (report_name, engine)
+        engine_source = cls._engines.get(key)
+        if not engine_source or not cls._is_installed(key):
+            raise ValueError(f"Отчет {report_name} не поддерживает движок {engine}")
+        engine_class = cls._engines[key] = _load_class(engine_source)
+        return engine_class()
+
+    @classmethod
+    def _is_installed(cls, key: Tuple[str, str]) -> bool:
+        """Проверяет, не импортируя его, что модуль, нужный движку, установлен"""
+        module_name = cls._requirements.get(key)
+        return module_name is None or importlib.util.find_spec(module_name) is not None
 
     @classmethod
     def get_available_reports(cls) -> List[str]:
@@ -23,10 +67,62 @@ class ReportFactory:
         return list(cls._reports.keys())
 
     @classmethod
-    def register_report(cls, report_name: str, report_class: Type[BaseReport]) -> None:
-        """Регистрирует новый тип отчета"""
+    def get_available_engines(cls) -> List[str]:
+        """Возвращает список движков, доступных хотя бы одному отчету"""
+        engines = [DEFAULT_ENGINE]
+        for key in cls._engines:
+            engine = key[1]
+            if engine not in engines and cls._is_installed(key):
+                engines.append(engine)
+        return engines
+
+    @classmethod
+    def register_report(cls, report_name: str, report_class: ReportSource) -> None:
+        """Регистрирует новый тип отчета: класс или путь "модуль:Класс" """
         cls._reports[report_name] = report_class
 
+    @classmethod
+    def register_engine(
+        cls,
+        report_name: str,
+        engine: str,
+        report_class: ReportSource,
+        requires: Optional[str] = None,
+    ) -> None:
+        """
+        Регистрирует альтернативную реализацию отчета под именем движка
+
+        requires - модуль, без которого движок недоступен; его наличие
+        проверяется без импорта.
+        """
+        cls._engines[(report_name, engine)] = report_class
+        if requires is None:
+            cls._requirements.pop((report_name, engine), None)
+        else:
+            cls._requirements[(report_name, engine)] = requires
+
 
-# Регистрация отчетов
-ReportFactory.register_report("student-performance", StudentPerformanceReport)
+# Регистрация отчетов: модули импортируются при первом использовании
+ReportFactory.register_report(
+    "student-performance", "reports.student_performance:StudentPerformanceReport"
+)
+ReportFactory.register_engine(
+    "student-performance",
+    "approx",
+    "reports.student_performance_approx:ApproxStudentPerformanceReport",
+)
+ReportFactory.register_engine(
+    "student-performance",
+    "numpy",
+    "reports.student_performance_columnar:ColumnarStudentPerformanceReport",
+    requires="numpy",
+)
+ReportFactory.register_report(
+    "teacher-performance", "reports.teacher_performance:TeacherPerformanceReport"
+)
+ReportFactory.register_engine(
+    "teacher-performance",
+    "numpy",
+    "reports.teacher_performance_columnar:ColumnarTeacherPerformanceReport",
+    requires="numpy",
+)
@@ -1,48 +1,16 @@
-from collections import defaultdict
+from .group_by import GroupByReport, Metric
 
-from .base_report import BaseReport
 
+class StudentPerformanceReport(GroupByReport):
+    """
+    Отчет об успеваемости студентов: рейтинг по средней оценке
 
-class StudentPerformanceReport(BaseReport):
-    """Отчет об успеваемости студентов"""
+    Для каждого студента хранится только сумма и количество оценок,
+    поэтому память зависит от числа студентов, а не от числа строк.
+    Студенты с равной средней оценкой идут в порядке первого появления.
+    """
 
-    def generate(self, data: list) -> dict:
-        """
-        Генерирует отчет об успеваемости студентов
-
-        Returns:
-            Словарь, где под ключом 'headers' заголовки для вывода в консоль,
-            а под ключом 'rows' непосредственно студенты и
-            рейтинг успеваемости.
-        """
-
-        student_grades = defaultdict(list)
-
-        for row in data:
-            try:
-                student_name = row["student_name"]
-                grade = int(row["grade"])
-                student_grades[student_name].append(grade)
-            except (KeyError, ValueError):
-                continue
-
-        student_averages = []
-        for student, grades in student_grades.items():
-            avg_grade = sum(grades) / len(grades)
-            student_averages.append(
-                {"student": student, "average_grade": round(avg_grade, 2)}
-            )
-
-        student_averages.sort(key=lambda x: x["average_grade"], reverse=True)
-
-        rows = []
-        for i, student_data in enumerate(student_averages, 1):
-            rows.append(
-                [
-                    i,
-                    student_data["student"],
-                    student_data["average_grade"],
-                ]
-            )
-
-        return {"headers": ["", "student_name", "grade"], "rows": rows}
+    group_by = ("student_name",)
+    metrics = (Metric("grade", "mean", "grade"),)
+    converters = {"grade": int}
+    sort_by = "grade"
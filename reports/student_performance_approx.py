@@ -0,0 +1,212 @@
+import heapq
+import math
+from collections import Counter
+from operator import itemgetter
+from typing import Iterable, List, NamedTuple, Optional, TextIO, Tuple
+
+from utils.sketches import HyperLogLog, QuantileSketch, SpaceSaving
+
+from .base_report import BaseReport
+
+# Относительная ошибка сводок по умолчанию
+DEFAULT_SKETCH_ERROR = 0.01
+
+# Квантили оценок в итогах отчёта
+GRADE_QUANTILES = ((0.5, "Медиана оценки"), (0.9, "90-й перцентиль оценки"))
+
+
+class GradeSketches(NamedTuple):
+    """Промежуточное состояние приближённого отчёта"""
+
+    # Студенты с наибольшим числом оценок: суммы, количества, ошибки
+    ranking: SpaceSaving
+    # Число различных студентов
+    students: HyperLogLog
+    # Распределение оценок
+    grades: QuantileSketch
+
+
+class ApproxStudentPerformanceReport(BaseReport):
+    """
+    Приближённый отчет об успеваемости студентов для очень большого
+    числа студентов
+
+    Память ограничена сводками и не зависит от числа студентов:
+    рейтинг строится по студентам с наибольшим числом оценок (Space-Saving),
+    число студентов оценивается HyperLogLog, квантили оценок - DDSketch.
+    sketch_error задаёт ошибку всех сводок: в таблице остаётся
+    1 / sketch_error студентов (но не меньше offset + limit), пропущенных
+    оценок у каждого из них не больше sketch_error от всех оценок.
+    Для каждой строки рейтинга выводится граница ошибки средней оценки,
+    пока студентов не больше размера таблицы, она равна нулю.
+    """
+
+    columns = ("student_name", "grade")
+    converters = {"grade": int}
+
+    # Относительная ошибка сводок, задаётся --sketch-error
+    sketch_error: float = DEFAULT_SKETCH_ERROR
+
+    def generate(self, data: Iterable[dict]) -> dict:
+        """Генерирует приближённый отчет об успеваемости студентов"""
+
+        return self.finalize(self.accumulate(self.initial_state(), self.project(data)))
+
+    def state_name(self) -> str:
+        """Вид состояния: класс отчёта, ошибка сводок и размер таблицы рейтинга"""
+        return f"{super().state_name()}:{self.sketch_error!r}:{self.capacity()}"
+
+    def capacity(self) -> int:
+        """Сколько студентов рейтинга хранится точно"""
+
+        capacity = math.ceil(1 / self.sketch_error)
+        if self.limit is not None:
+            capacity = max(capacity, self.offset + self.limit)
+        return capacity
+
+    def initial_state(self) -> GradeSketches:
+        """Возвращает пустые сводки с заданной ошибкой"""
+
+        return GradeSketches(
+            SpaceSaving(self.capacity()),
+            HyperLogLog(HyperLogLog.precision_for(self.sketch_error)),
+            QuantileSketch(self.sketch_error),
+        )
+
+    def accumulate(
+        self, state: GradeSketches, data: Iterable[Tuple[str, int]]
+    ) -> GradeSketches:
+        """
+        Добавляет пары (студент, оценка) в сводки
+
+        Студент из таблицы рейтинга уже учтён в HyperLogLog, поэтому
+        хэш считается только для студентов, попадающих в таблицу.
+        """
+
+        add_grade = state.ranking.add
+        add_student = state.students.add
+        grade_counts: Counter = Counter()
+
+        for student_name, grade in data:
+            if add_grade(student_name, grade):
+                add_student(student_name)
+            grade_counts[grade] += 1
+
+        for grade, grades_count in grade_counts.items():
+            state.grades.add(grade, grades_count)
+
+        return state
+
+    def merge(self, state: GradeSketches, other: GradeSketches) -> GradeSketches:
+        """Объединяет сводки двух частичных состояний"""
+
+        state.ranking.merge(other.ranking)
+        state.students.merge(other.students)
+        state.grades.merge(other.grades)
+        return state
+
+    def finalize(self, state: GradeSketches) -> dict:
+        """
+        Формирует приближённый рейтинг и итоги
+
+        Оценки студента, пропущенные до попадания в таблицу (не больше
+        его ошибки), могли быть любыми от минимальной до максимальной,
+        отсюда граница ошибки средней. Порядок равных оценок - порядок
+        студентов в таблице.
+        """
+
+        lowest, highest = state.grades.min, state.grades.max
+        student_averages = (
+            (
+                student,
+                round(grades_sum / grades_count, 2),
+                _average_error(
+                    grades_sum / grades_count,
+                    grades_count,
+                    grades_error,
+                    lowest,
+                    highest,
+                ),
+            )
+            for student, (grades_sum, grades_count, grades_error) in (
+                state.ranking.entries.items()
+            )
+        )
+
+        if self.limit is None:
+            ranking = sorted(student_averages, key=itemgetter(1), reverse=True)
+        else:
+            ranking = heapq.nlargest(
+                self.offset + self.limit, student_averages, key=itemgetter(1)
+            )
+
+        rows = [
+            [i, student, average_grade, error]
+            for i, (student, average_grade, error) in enumerate(
+                ranking[self.offset :], self.offset + 1
+            )
+        ]
+
+        return {
+            "headers": ["", "student_name", "grade", "error"],
+            "rows": rows,
+            "summary": self._summary(state),
+        }
+
+    def _summary(self, state: GradeSketches) -> List[List[str]]:
+        """Итоги по всем данным с их ошибками"""
+
+        summary = [
+            ["Оценок", str(state.grades.count)],
+            [
+                "Студентов",
+                f"≈{state.students.estimate()} (±{state.students.error:.1%})",
+            ],
+        ]
+        for level, title in GRADE_QUANTILES:
+            summary.append(
+                [
+                    title,
+                    f"≈{state.grades.quantile(level):.2f} "
+                    f"(±{state.grades.error:.1%})",
+                ]
+            )
+        return summary
+
+    def print_report(self, result: dict, file: Optional[TextIO] = None) -> None:
+        """
+        Выводит рейтинг таблицей и под ней итоги сводок
+
+        Итоги выводятся только в таблице grid: потоковые форматы
+        (write_report) отдают одни строки рейтинга, чтобы их можно было
+        читать как обычные csv, tsv и jsonl.
+        """
+
+        # tabulate нужен только для таблицы grid и импортируется при выводе
+        # pylint: disable-next=import-outside-toplevel
+        from tabulate import tabulate
+
+        super().print_report(result, file)
+        if result.get("summary"):
+            print(tabulate(result["summary"], tablefmt="plain"), file=file)
+
+
+def _average_error(
+    average: float, count: int, missed: int, lowest: float, highest: float
+) -> float:
+    """
+    Граница ошибки средней оценки
+
+    average - средняя count учтённых оценок, до них могло быть
+    от 0 до missed оценок со значениями от lowest до highest.
+    Средняя монотонна по числу пропущенных, поэтому крайние значения
+    достигаются при missed пропущенных оценках.
+    """
+
+    if not missed:
+        return 0.0
+
+    total = count + missed
+    low = (average * count + lowest * missed) / total
+    high = (average * count + highest * missed) / total
+    return round(max(average - low, high - average), 2)
@@ -0,0 +1,12 @@
+from .group_by_columnar import ColumnarGroupByReport
+from .student_performance import StudentPerformanceReport
+
+
+class ColumnarStudentPerformanceReport(ColumnarGroupByReport, StudentPerformanceReport):
+    """
+    Отчет об успеваемости студентов на массивах NumPy
+
+    Имена студентов кодируются целыми числами, оценки разбираются векторно,
+    суммы и количества оценок считаются через bincount. Промежуточное
+    состояние и итоговый рейтинг совпадают с обычным отчётом.
+    """
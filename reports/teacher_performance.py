@@ -0,0 +1,22 @@
+from .group_by import GroupByReport, Metric
+
+
+class TeacherPerformanceReport(GroupByReport):
+    """
+    Отчет об оценках по предметам и преподавателям
+
+    Для каждой пары предмет × преподаватель выводятся число оценок,
+    средняя, медиана, наименьшая и наибольшая оценка; пары упорядочены
+    по средней оценке.
+    """
+
+    group_by = ("subject", "teacher_name")
+    metrics = (
+        Metric("grades", "count"),
+        Metric("grade", "mean", "grade"),
+        Metric("median", "median", "grade"),
+        Metric("min", "min", "grade"),
+        Metric("max", "max", "grade"),
+    )
+    converters = {"grade": int}
+    sort_by = "grade"
@@ -0,0 +1,6 @@
+from .group_by_columnar import ColumnarGroupByReport
+from .teacher_performance import TeacherPerformanceReport
+
+
+class ColumnarTeacherPerformanceReport(ColumnarGroupByReport, TeacherPerformanceReport):
+    """Отчет об оценках по предметам и преподавателям на массивах NumPy"""
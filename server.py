@@ -0,0 +1,121 @@
+import argparse
+import os
+import socketserver
+import sys
+
+from utils.arguments import MEGABYTE, positive_int
+from utils.cache import DEFAULT_CACHE_SIZE
+from utils.readers import READERS
+from utils.server import (
+    DEFAULT_RESULT_CACHE_SIZE,
+    DEFAULT_WATCH_INTERVAL,
+    FileWatcher,
+    ReportHTTPServer,
+    ReportService,
+    ReportUnixServer,
+)
+
+
+def main() -> None:
+    """
+    Запускает сервер отчётов
+
+    Сервер держит разобранные файлы в памяти и отвечает на запросы
+    GET /report?report=student-performance&files=data.csv&format=csv
+    тем же отчётом, что вывела бы команда main.py с такими параметрами.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Сервер отчетов об успеваемости студентов",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Адрес, на котором принимаются запросы",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8000,
+        help="TCP порт сервера",
+    )
+    parser.add_argument(
+        "--socket",
+        help="Путь Unix сокета; если задан, TCP порт не открывается",
+    )
+    parser.add_argument(
+        "--reader",
+        choices=READERS,
+        default="csv",
+        help="Способ чтения CSV: модуль csv или разбор байтов через mmap",
+    )
+    parser.add_argument(
+        "--data-root",
+        default=".",
+        help="Каталог данных: запросы могут читать только файлы внутри него, "
+        "относительные пути отсчитываются от него (по умолчанию текущий)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=positive_int,
+        default=DEFAULT_CACHE_SIZE // MEGABYTE,
+        help="Предел памяти разобранных файлов в МБ; при превышении "
+        "удаляются давно не использованные",
+    )
+    parser.add_argument(
+        "--result-cache-size",
+        type=positive_int,
+        default=DEFAULT_RESULT_CACHE_SIZE,
+        help="Сколько последних результатов отчетов хранить в памяти",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=DEFAULT_WATCH_INTERVAL,
+        help="Как часто в секундах проверять изменения файлов; 0 - не проверять",
+    )
+
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.data_root):
+        parser.error(f"каталог данных не существует: {args.data_root}")
+
+    service = ReportService(
+        args.reader,
+        args.result_cache_size,
+        args.cache_size * MEGABYTE,
+        args.data_root,
+    )
+    try:
+        server: socketserver.BaseServer
+        if args.socket:
+            server = ReportUnixServer(args.socket, service)
+            address = args.socket
+        else:
+            http_server = ReportHTTPServer((args.host, args.port), service)
+            address = f"http://{args.host}:{http_server.server_port}"
+            server = http_server
+    except OSError as e:
+        print(f"Ошибка: не удалось запустить сервер - {e}", file=sys.stderr)
+        sys.exit(1)
+
+    watcher = None
+    if args.watch_interval > 0:
+        watcher = FileWatcher(service, args.watch_interval)
+        watcher.start()
+
+    print(f"Сервер отчетов запущен: {address}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if watcher is not None:
+            watcher.stop()
+        server.server_close()
+        if args.socket:
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import os
 import sys
 from io import StringIO
+from typing import Iterable
 from unittest.mock import patch
 
 import pytest
@@ -66,7 +67,7 @@ class TestBaseReport:
         }
 
         with patch("sys.stdout", new_callable=StringIO):
-            with patch("reports.base_report.tabulate") as mock_tabulate:
+            with patch("tabulate.tabulate") as mock_tabulate:
                 report.print_report(test_result)
                 mock_tabulate.assert_called_once_with(
                     [["John", "5"], ["Jane", "4"]],
@@ -86,8 +87,59 @@ class TestBaseReport:
         test_result = {"rows": [["Data1", "Data2"]]}
 
         with patch("sys.stdout", new_callable=StringIO):
-            with patch("reports.base_report.tabulate") as mock_tabulate:
+            with patch("tabulate.tabulate") as mock_tabulate:
                 report.print_report(test_result)
                 mock_tabulate.assert_called_with(
                     [["Data1", "Data2"]], headers=[], tablefmt="grid", stralign="center"
                 )
+
+    def test_write_report_formats(self) -> None:
+        """Тест записи отчета в потоковом формате и в таблицу"""
+
+        class TestReport(BaseReport):
+            def generate(self, data: list) -> dict:
+                return {}
+
+        report = TestReport()
+        test_result = {"headers": ["Name", "Grade"], "rows": [["John", 5]]}
+
+        stream = StringIO()
+        report.write_report(test_result, "csv", stream)
+        assert stream.getvalue() == "Name,Grade\nJohn,5\n"
+
+        stream = StringIO()
+        report.write_report(test_result, "grid", stream)
+        assert "John" in stream.getvalue()
+
+        with pytest.raises(ValueError):
+            report.write_report(test_result, "xml", stream)
+
+    def test_finalize_paginates_rows(self) -> None:
+        """Тест страницы offset/limit в протоколе по умолчанию"""
+
+        class ListReport(BaseReport):
+            def generate(self, data: Iterable[dict]) -> dict:
+                return {"headers": ["n"], "rows": [[row["n"]] for row in data]}
+
+        report = ListReport()
+        report.offset = 1
+        report.limit = 2
+
+        result = report.finalize([{"n": n} for n in range(5)])
+
+        assert result == {"headers": ["n"], "rows": [[1], [2]]}
+
+    def test_default_incremental_protocol_uses_generate(self) -> None:
+        """Тест что протокол по умолчанию копит строки и вызывает generate"""
+
+        class CountReport(BaseReport):
+            def generate(self, data: Iterable[dict]) -> dict:
+                return {"headers": ["count"], "rows": [[len(list(data))]]}
+
+        report = CountReport()
+        left = report.accumulate(report.initial_state(), [{"a": "1"}])
+        right = report.accumulate(report.initial_state(), [{"a": "2"}, {"a": "3"}])
+
+        result = report.finalize(report.merge(left, right))
+
+        assert result == {"headers": ["count"], "rows": [[3]]}
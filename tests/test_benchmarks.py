@@ -0,0 +1,127 @@
+import csv
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.data_generator import FIELDNAMES, generate_csv, generate_rows
+from benchmarks.run_benchmarks import (
+    ROOT_DIR,
+    _startup_stage,
+    compare_results,
+    parse_importtime,
+)
+from utils.file_reader import read_csv_files
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+class TestDataGenerator:
+    """Тесты генератора синтетических данных"""
+
+    def test_generate_rows_is_deterministic(self) -> None:
+        """Одинаковый seed дает одинаковые строки"""
+        first = list(generate_rows(100, seed=7))
+        second = list(generate_rows(100, seed=7))
+
+        assert first == second
+        assert len(first) == 100
+        assert all(len(row) == len(FIELDNAMES) for row in first)
+
+    def test_generate_rows_cardinality(self) -> None:
+        """Количество студентов ограничено параметром students"""
+        rows = list(generate_rows(1000, students=3, subjects=2))
+
+        assert len({row[0] for row in rows}) <= 3
+        assert len({row[1] for row in rows}) <= 2
+
+    def test_generate_csv_with_malformed_rows(self) -> None:
+        """Некорректные строки попадают в файл с заданной долей"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, "grades.csv")
+            generate_csv(file_path, 1000, malformed_rate=0.5)
+
+            with open(file_path, "r", encoding="utf-8") as f:
+                reader = csv.reader(f)
+                assert next(reader) == FIELDNAMES
+                rows = list(reader)
+            data = read_csv_files([file_path])
+
+        valid = [row for row in rows if len(row) == 5 and row[2].isdigit()]
+        assert len(rows) == 1000
+        assert 300 < len(valid) < 700
+        assert len(data) == 1000
+
+
+class TestCompareResults:
+    """Тесты сравнения результатов замеров"""
+
+    def test_detects_regression(self) -> None:
+        """Замедление больше порога попадает в список"""
+        baseline = {"read_csv_files": {"seconds": 1.0}, "generate:x": {"seconds": 1.0}}
+        current = {"read_csv_files": {"seconds": 1.5}, "generate:x": {"seconds": 1.05}}
+
+        regressions = compare_results(current, baseline, threshold=0.1)
+
+        assert len(regressions) == 1
+        assert regressions[0].startswith("read_csv_files")
+
+    def test_ignores_new_stages(self) -> None:
+        """Этапы без базового замера не считаются замедлением"""
+        current = {"print_report:x": {"seconds": 2.0}}
+
+        assert compare_results(current, {}) == []
+
+
+class TestStartup:
+    """Тесты замера и времени запуска программы"""
+
+    def test_parse_importtime(self) -> None:
+        """Из вывода importtime берется суммарное время нужного модуля"""
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   utils.cache\n"
+            "import time:       300 |        420 | main\n"
+            "import time:        10 |         10 | mainframe\n"
+        )
+
+        assert parse_importtime(output, "main") == (420, 3)
+
+    def test_startup_stage(self) -> None:
+        """Этап запуска возвращает время импорта main"""
+        measured = _startup_stage()
+
+        assert measured["seconds"] > 0
+        assert measured["modules"] > 0
+
+    def test_heavy_modules_are_not_imported_on_startup(self) -> None:
+        """Запуск и --help не импортируют tabulate, numpy и пулы процессов"""
+        heavy = [
+            "tabulate",
+            "numpy",
+            "concurrent.futures",
+            "multiprocessing",
+            "pstats",
+            "reports.student_performance",
+            "reports.student_performance_approx",
+        ]
+        script = (
+            "import sys\n"
+            "sys.argv = ['main.py', '--help']\n"
+            "import main\n"
+            "try:\n"
+            "    main.main()\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            f"print(sorted(set({heavy!r}) & set(sys.modules)))\n"
+        )
+
+        completed = subprocess.run(
+            [sys.executable, "-c", script],
+            capture_output=True,
+            check=True,
+            text=True,
+            cwd=ROOT_DIR,
+        )
+
+        assert completed.stdout.splitlines()[-1] == "[]"
@@ -0,0 +1,200 @@
+import csv
+import os
+import shutil
+import sys
+import tempfile
+from typing import Any
+from unittest.mock import patch
+
+from reports.student_performance import StudentPerformanceReport
+from utils.cache import ParseCache, projection_kind, state_kind
+from utils.columnar import ColumnsBuilder, iter_encoded_rows
+from utils.file_reader import read_csv_files
+from utils.filters import parse_condition
+from utils.parallel import AggregateOptions, aggregate_files
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+class TestParseCache:
+    """Тесты кэша разобранных файлов"""
+
+    def setup_method(self) -> None:
+        """Создание каталога кэша и CSV файла"""
+        self.cache_dir = tempfile.mkdtemp()
+        with tempfile.NamedTemporaryFile(
+            mode="w", suffix=".csv", delete=False, encoding="utf-8"
+        ) as f:
+            writer = csv.writer(f)
+            writer.writerow(["student_name", "grade"])
+            writer.writerows(
+                [["Студент A", "5"], ["Студент B", "x"], ["Студент B", "4"]]
+            )
+            self.temp_file = f.name
+
+    def teardown_method(self) -> None:
+        """Удаление временных файлов"""
+        shutil.rmtree(self.cache_dir)
+        os.unlink(self.temp_file)
+
+    def test_store_and_load(self) -> None:
+        """Тест сохранения и чтения записи"""
+        cache = ParseCache(self.cache_dir)
+        cache.store(self.temp_file, "kind", {"value": 1})
+
+        assert cache.load(self.temp_file, "kind") == {"value": 1}
+        assert cache.contains(self.temp_file, "kind")
+        assert cache.load(self.temp_file, "other") is None
+
+    def test_changed_file_invalidates_entry(self) -> None:
+        """Тест что изменение файла делает запись недействительной"""
+        cache = ParseCache(self.cache_dir)
+        cache.store(self.temp_file, "kind", 1)
+
+        with open(self.temp_file, "a", encoding="utf-8") as f:
+            f.write("Студент C,3\n")
+
+        assert cache.load(self.temp_file, "kind") is None
+
+    def test_touched_file_validated_by_digest(self) -> None:
+        """Тест что файл с новым временем изменения проверяется по хэшу"""
+        cache = ParseCache(self.cache_dir)
+        cache.store(self.temp_file, "kind", 1)
+        stat = os.stat(self.temp_file)
+        os.utime(self.temp_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        assert cache.load(self.temp_file, "kind") == 1
+
+        with open(self.temp_file, "r+", encoding="utf-8") as f:
+            f.write("S")
+        os.utime(self.temp_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+
+        assert cache.load(self.temp_file, "kind") is None
+
+    def test_missing_file(self) -> None:
+        """Тест запроса записи для отсутствующего файла"""
+        cache = ParseCache(self.cache_dir)
+
+        assert cache.load("nonexistent.csv", "kind") is None
+        assert not cache.contains("nonexistent.csv", "kind")
+
+    def test_evict_least_recently_used(self) -> None:
+        """Тест удаления давно не использованных записей"""
+        cache = ParseCache(self.cache_dir)
+        for age, kind in enumerate(("aaa", "bbb", "ccc")):
+            cache.store(self.temp_file, kind, b"x" * 1000)
+            entry_path = cache._entry_path(self.temp_file, kind)
+            os.utime(entry_path, (age, age))
+        cache.load(self.temp_file, "aaa")
+
+        entry_size = os.path.getsize(entry_path)
+        ParseCache(self.cache_dir, max_bytes=2 * entry_size).evict()
+
+        assert len(os.listdir(self.cache_dir)) == 2
+        assert cache.contains(self.temp_file, "aaa")
+        assert not cache.contains(self.temp_file, "bbb")
+
+    def test_aggregate_files_uses_cache(self) -> None:
+        """Тест что повторный отчет берется из кэша без разбора файла"""
+        report = StudentPerformanceReport()
+        cache = ParseCache(self.cache_dir)
+        expected = report.generate(read_csv_files([self.temp_file]))
+
+        has_rows, state = aggregate_files(
+            report, [self.temp_file], AggregateOptions(cache=cache)
+        )
+
+        assert has_rows
+        assert report.finalize(state) == expected
+        assert cache.contains(self.temp_file, state_kind(report))
+        assert list(
+            iter_encoded_rows(cache.load(self.temp_file, projection_kind(report)))
+        ) == [("Студент A", 5), ("Студент B", 4)]
+
+        with patch("utils.parallel.iter_rows") as mock_iter_rows:
+            has_rows, state = aggregate_files(
+                report, [self.temp_file], AggregateOptions(cache=cache)
+            )
+            mock_iter_rows.assert_not_called()
+
+        assert report.finalize(state) == expected
+
+    def test_cached_states_loaded_while_merging(self) -> None:
+        """Тест что состояния из кэша загружаются по одному при объединении"""
+        report = StudentPerformanceReport()
+        cache = ParseCache(self.cache_dir)
+        files = [self.temp_file, self.temp_file]
+        _, expected = aggregate_files(report, files, AggregateOptions(cache=cache))
+
+        events = []
+        load, merge = cache.load, report.merge
+
+        def logged_load(file_path: str, kind: str) -> Any:
+            events.append("load")
+            return load(file_path, kind)
+
+        def logged_merge(state: Any, other: Any) -> Any:
+            events.append("merge")
+            return merge(state, other)
+
+        with patch.object(cache, "load", logged_load):
+            with patch.object(report, "merge", logged_merge):
+                _, state = aggregate_files(report, files, AggregateOptions(cache=cache))
+
+        assert events == ["load", "merge", "load", "merge"]
+        assert report.finalize(state) == report.finalize(expected)
+
+    def test_missing_cached_state_is_reparsed(self) -> None:
+        """Тест что файл разбирается заново, если запись пропала после плана"""
+        report = StudentPerformanceReport()
+        cache = ParseCache(self.cache_dir)
+        aggregate_files(report, [self.temp_file], AggregateOptions(cache=cache))
+
+        with patch.object(cache, "load", return_value=None):
+            has_rows, state = aggregate_files(
+                report, [self.temp_file], AggregateOptions(cache=cache)
+            )
+
+        assert has_rows
+        assert report.finalize(state) == report.generate(
+            read_csv_files([self.temp_file])
+        )
+
+    def test_where_in_kind(self) -> None:
+        """Тест что отчеты с разными условиями не делят записи кэша"""
+        report = StudentPerformanceReport()
+        filtered = StudentPerformanceReport()
+        filtered.where = (parse_condition("subject=Физика"),)
+
+        assert projection_kind(filtered) != projection_kind(report)
+        assert state_kind(filtered) != state_kind(report)
+        assert "subject=Физика" in projection_kind(filtered)
+
+
+class TestColumnsBuilder:
+    """Тесты компактного хранения колонок"""
+
+    def test_roundtrip(self) -> None:
+        """Тест кодирования и раскодирования строк"""
+        rows = [("A", 5), ("B", 4), ("A", 2**70), ("C", "x"), ("A", True)]
+        builder = ColumnsBuilder(2)
+        for row in rows:
+            builder.add(row)
+
+        columns = builder.encode()
+
+        assert builder.rows == 5
+        assert columns[0][0] == "dict"
+        assert columns[0][1] == ["A", "B", "C"]
+        assert list(iter_encoded_rows(columns)) == rows
+
+    def test_int_column(self) -> None:
+        """Тест хранения целочисленной колонки массивом"""
+        builder = ColumnsBuilder(1)
+        for value in (1, 2, 3):
+            builder.add((value,))
+
+        columns = builder.encode()
+
+        assert columns[0][0] == "int"
+        assert list(iter_encoded_rows(columns)) == [(1,), (2,), (3,)]
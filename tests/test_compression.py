@@ -0,0 +1,96 @@
+import bz2
+import csv
+import gzip
+import io
+import lzma
+import os
+import shutil
+import sys
+import tempfile
+from typing import Callable
+from unittest.mock import patch
+
+import pytest
+
+from reports.student_performance import StudentPerformanceReport
+from utils import compression
+from utils.compression import detect_compression, open_input
+from utils.file_reader import iter_csv_files
+from utils.mmap_reader import iter_mmap_files
+from utils.parallel import AggregateOptions, aggregate_files, plan_tasks
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+COMPRESSORS = {".gz": gzip.compress, ".bz2": bz2.compress, ".xz": lzma.compress}
+
+
+class TestCompression:
+    """Тесты чтения сжатых CSV файлов"""
+
+    def setup_method(self) -> None:
+        """Создание CSV файла и его сжатых копий"""
+        self.temp_dir = tempfile.mkdtemp()
+        text = io.StringIO()
+        writer = csv.writer(text)
+        writer.writerow(["student_name", "grade"])
+        writer.writerows([[f"Студент {i % 7}", str(i % 5 + 1)] for i in range(500)])
+        self.content = text.getvalue().encode("utf-8")
+
+        self.csv_path = os.path.join(self.temp_dir, "grades.csv")
+        with open(self.csv_path, "wb") as f:
+            f.write(self.content)
+
+    def teardown_method(self) -> None:
+        """Удаление временных файлов"""
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, name: str, compress: Callable[[bytes], bytes]) -> str:
+        """Записывает сжатую копию CSV файла"""
+        file_path = os.path.join(self.temp_dir, name)
+        with open(file_path, "wb") as f:
+            f.write(compress(self.content))
+        return file_path
+
+    @pytest.mark.parametrize("extension", sorted(COMPRESSORS))
+    def test_read_compressed(self, extension: str) -> None:
+        """Сжатый файл читается так же, как исходный"""
+        file_path = self.write("grades.csv" + extension, COMPRESSORS[extension])
+        expected = list(iter_csv_files([self.csv_path], ("student_name", "grade")))
+
+        assert list(iter_csv_files([file_path], ("student_name", "grade"))) == (
+            expected
+        )
+        assert list(iter_mmap_files([file_path], ("student_name", "grade"))) == (
+            expected
+        )
+
+    def test_detect_by_magic_bytes(self) -> None:
+        """Формат без расширения определяется по первым байтам"""
+        assert detect_compression(self.write("grades_gz", gzip.compress)) == "gzip"
+        assert detect_compression(self.write("grades_xz", lzma.compress)) == "xz"
+        assert detect_compression(self.write("grades_bz", bz2.compress)) == "bz2"
+        assert detect_compression(self.csv_path) is None
+        assert detect_compression("missing") is None
+
+        with open_input(self.write("grades_data", gzip.compress)) as stream:
+            assert stream.read() == self.content
+
+    def test_zstd_without_backend(self) -> None:
+        """Без модуля zstd сжатый файл дает понятную ошибку"""
+        file_path = self.write("grades.csv.zst", lambda data: b"\x28\xb5\x2f\xfd")
+
+        with patch.multiple(compression, zstd=None, zstandard=None):
+            with pytest.raises(ValueError, match="zstandard"):
+                list(iter_csv_files([file_path]))
+
+    def test_compressed_files_not_split(self) -> None:
+        """Сжатые файлы разбираются целиком и при параллельном разборе"""
+        file_path = self.write("grades.csv.gz", gzip.compress)
+        report = StudentPerformanceReport()
+
+        assert list(plan_tasks([file_path], 10)) == [file_path]
+        assert aggregate_files(
+            report,
+            [file_path, self.csv_path],
+            AggregateOptions(jobs=2, chunk_size=100),
+        ) == aggregate_files(report, [self.csv_path, self.csv_path])
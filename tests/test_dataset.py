@@ -0,0 +1,198 @@
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+from convert import main as convert_main
+from reports.student_performance import StudentPerformanceReport
+from utils.dataset import (
+    DATASET_MAGIC,
+    convert_csv,
+    is_dataset,
+    iter_dataset_file,
+)
+from utils.file_reader import iter_csv_files, read_csv_files
+from utils.mmap_reader import iter_mmap_files
+from utils.parallel import AggregateOptions, aggregate_files
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+ROWS = [
+    ["Студент A", "Математика", "5", "Иванов", "2024-09-01"],
+    ["Студент B", "Физика", "x", "Петров", "2024-09-02"],
+    ["Студент, C", "Математика", "4", "Иванов", "2024-09-03"],
+    ["Студент D", "Физика"],
+    ["Студент A", "Физика", "3", "Петров", "2024-09-01"],
+]
+
+
+def read_columns(dataset_path: str) -> list:
+    """Читает описание колонок из заголовка колоночного файла"""
+    with open(dataset_path, "rb") as f:
+        assert f.read(len(DATASET_MAGIC)) == DATASET_MAGIC
+        length = int.from_bytes(f.read(8), "little")
+        columns: list = json.loads(f.read(length))["columns"]
+        return columns
+
+
+class TestDataset:
+    """Тесты колоночного двоичного формата"""
+
+    def setup_method(self) -> None:
+        """Создание CSV файла и его колоночной версии"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.temp_dir, "grades.csv")
+        self.dataset_path = os.path.join(self.temp_dir, "grades.gcol")
+        with open(self.csv_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(
+                ["student_name", "subject", "grade", "teacher_name", "date"]
+            )
+            writer.writerows(ROWS)
+        self.rows = convert_csv(self.csv_path, self.dataset_path)
+
+    def teardown_method(self) -> None:
+        """Удаление временных файлов"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_dicts_match_csv(self) -> None:
+        """Без columns строки совпадают с csv.DictReader"""
+        assert self.rows == len(ROWS)
+        assert is_dataset(self.dataset_path)
+        assert not is_dataset(self.csv_path)
+        assert list(iter_dataset_file(self.dataset_path)) == list(
+            iter_csv_files([self.csv_path])
+        )
+
+    def test_quoted_newlines_match_csv(self) -> None:
+        """Переводы строк внутри кавычек сохраняются так же, как читает CSV"""
+        with open(self.csv_path, "wb") as f:
+            f.write('student_name,grade\r\n"Анна\r\nМария",5\r\nБорис,4\r\n'.encode())
+        convert_csv(self.csv_path, self.dataset_path)
+
+        assert list(iter_dataset_file(self.dataset_path)) == list(
+            iter_csv_files([self.csv_path])
+        )
+        assert list(iter_dataset_file(self.dataset_path, ("student_name",))) == [
+            ("Анна\nМария",),
+            ("Борис",),
+        ]
+
+    @pytest.mark.parametrize(
+        "columns, converters",
+        [
+            (("student_name", "grade"), {"grade": int}),
+            (("student_name", "grade"), {}),
+            (("date",), None),
+            (("teacher_name", "subject"), None),
+        ],
+    )
+    def test_projection_matches_csv(self, columns: tuple, converters: dict) -> None:
+        """Кортежи колонок совпадают с читателем CSV"""
+        expected = list(iter_csv_files([self.csv_path], columns, converters))
+
+        assert list(iter_dataset_file(self.dataset_path, columns, converters)) == (
+            expected
+        )
+
+    def test_missing_column(self) -> None:
+        """Если колонки нет в файле, строк нет"""
+        assert not list(iter_dataset_file(self.dataset_path, ("unknown",)))
+
+    def test_column_encodings(self) -> None:
+        """Даты хранятся номерами дней, имена - словарём"""
+        columns = read_columns(self.dataset_path)
+
+        encodings = {column["name"]: column["encoding"] for column in columns}
+        assert encodings["date"] == "dict"
+        assert encodings["student_name"] == "dict"
+        assert columns[0]["typecode"] == "B"
+
+    def test_int_and_day_columns(self) -> None:
+        """Корректные оценки и даты хранятся малыми целыми"""
+        clean_path = os.path.join(self.temp_dir, "clean.csv")
+        with open(clean_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["student_name", "grade", "date"])
+            writer.writerows([["A", "5", "2024-09-01"], ["B", "3", "2024-10-01"]])
+        dataset_path = os.path.join(self.temp_dir, "clean.gcol")
+        convert_csv(clean_path, dataset_path)
+
+        assert read_csv_files([dataset_path]) == read_csv_files([clean_path])
+        assert list(
+            iter_dataset_file(dataset_path, ("student_name", "grade"), {"grade": int})
+        ) == [("A", 5), ("B", 3)]
+        encodings = [
+            (column["encoding"], column["typecode"])
+            for column in read_columns(dataset_path)
+        ]
+        assert encodings == [("dict", "B"), ("int", "b"), ("day", "i")]
+
+    def test_encoded_in_batches(self) -> None:
+        """Номера значений кодируются порциями с тем же результатом"""
+        with open(self.csv_path, "a", encoding="utf-8", newline="") as f:
+            csv.writer(f).writerows(ROWS * 20)
+        convert_csv(self.csv_path, self.dataset_path)
+        with open(self.dataset_path, "rb") as f:
+            expected = f.read()
+
+        with patch("utils.dataset.ENCODE_BATCH_ROWS", 3):
+            convert_csv(self.csv_path, self.dataset_path)
+
+        with open(self.dataset_path, "rb") as f:
+            assert f.read() == expected
+        assert list(iter_dataset_file(self.dataset_path)) == list(
+            iter_csv_files([self.csv_path])
+        )
+
+    def test_failed_write_removes_temporary_file(self) -> None:
+        """Если запись не удалась, временный файл удаляется, а прежний цел"""
+        with open(self.dataset_path, "rb") as f:
+            before = f.read()
+
+        with patch("utils.dataset._ColumnEncoder.write", side_effect=OSError("диск")):
+            with pytest.raises(OSError, match="диск"):
+                convert_csv(self.csv_path, self.dataset_path)
+
+        assert sorted(os.listdir(self.temp_dir)) == ["grades.csv", "grades.gcol"]
+        with open(self.dataset_path, "rb") as f:
+            assert f.read() == before
+
+    def test_readers_and_parallel_accept_dataset(self) -> None:
+        """Колоночный файл принимается всеми читателями и при --jobs"""
+        report = StudentPerformanceReport()
+        columns, converters = report.columns, report.converters
+
+        assert list(iter_mmap_files([self.dataset_path], columns, converters)) == list(
+            iter_csv_files([self.csv_path], columns, converters)
+        )
+        assert aggregate_files(
+            report,
+            [self.dataset_path, self.csv_path],
+            AggregateOptions(jobs=2, chunk_size=1),
+        ) == aggregate_files(report, [self.csv_path, self.csv_path])
+
+    def test_convert_main(self) -> None:
+        """Тест точки входа convert.py"""
+        output_dir = os.path.join(self.temp_dir, "out")
+
+        with patch(
+            "sys.argv",
+            ["convert.py", "--files", self.csv_path, "--output-dir", output_dir],
+        ):
+            with patch("sys.stdout"):
+                convert_main()
+
+        assert is_dataset(os.path.join(output_dir, "grades.gcol"))
+
+    def test_convert_main_missing_file(self) -> None:
+        """Тест отсутствующего CSV файла"""
+        with patch("sys.argv", ["convert.py", "--files", "missing.csv"]):
+            with patch("sys.stderr"):
+                with pytest.raises(SystemExit):
+                    convert_main()
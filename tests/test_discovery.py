@@ -0,0 +1,102 @@
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from reports.student_performance import StudentPerformanceReport
+from utils import parallel
+from utils.discovery import expand_inputs
+from utils.parallel import AggregateOptions, aggregate_files
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+class TestDiscovery:
+    """Тесты раскрытия шаблонов, каталогов и манифестов"""
+
+    def setup_method(self) -> None:
+        """Создание дерева каталогов с файлами"""
+        self.temp_dir = tempfile.mkdtemp()
+        for name, grades in [
+            ("b.csv", ["4"]),
+            ("a.csv", ["5", "3"]),
+            ("sub/c.csv", ["5"] * 50),
+            ("sub/deep/d.csv.gz", []),
+            ("notes.txt", []),
+        ]:
+            file_path = self.path(name)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write("student_name,grade\n")
+                f.writelines(f"Студент {name},{grade}\n" for grade in grades)
+
+    def teardown_method(self) -> None:
+        """Удаление временных файлов"""
+        shutil.rmtree(self.temp_dir)
+
+    def path(self, name: str) -> str:
+        """Путь внутри временного каталога"""
+        return os.path.join(self.temp_dir, name)
+
+    def test_directory_recursive(self) -> None:
+        """Каталог обходится рекурсивно в порядке имён, лишние файлы пропускаются"""
+        assert list(expand_inputs([self.temp_dir])) == [
+            self.path("a.csv"),
+            self.path("b.csv"),
+            self.path("sub/c.csv"),
+            self.path("sub/deep/d.csv.gz"),
+        ]
+
+    def test_glob(self) -> None:
+        """Шаблоны раскрываются с поддержкой **"""
+        assert list(expand_inputs([self.path("*.csv")])) == [
+            self.path("a.csv"),
+            self.path("b.csv"),
+        ]
+        assert list(expand_inputs([self.path("**/c.csv")])) == [self.path("sub/c.csv")]
+
+    def test_glob_without_matches(self) -> None:
+        """Шаблон без совпадений - ошибка"""
+        with pytest.raises(FileNotFoundError, match="Нет файлов по шаблону"):
+            list(expand_inputs([self.path("*.tsv")]))
+
+    def test_manifest(self) -> None:
+        """Манифест: пути относительно его каталога, комментарии пропускаются"""
+        manifest = self.path("files.txt")
+        with open(manifest, "w", encoding="utf-8") as f:
+            f.write("# входные файлы\nb.csv\n\nsub\nmissing.csv\n")
+
+        assert list(expand_inputs(["@" + manifest])) == [
+            self.path("b.csv"),
+            self.path("sub/c.csv"),
+            self.path("sub/deep/d.csv.gz"),
+            self.path("missing.csv"),
+        ]
+
+    def test_lazy(self) -> None:
+        """Следующий аргумент не раскрывается, пока не прочитан предыдущий"""
+        paths = expand_inputs([self.path("a.csv"), self.path("*.tsv")])
+
+        assert next(paths) == self.path("a.csv")
+
+    def test_largest_first_keeps_result(self) -> None:
+        """Задачи отправляются от больших к меньшим, итог не меняется"""
+        report = StudentPerformanceReport()
+        files = [self.path("a.csv"), self.path("b.csv"), self.path("sub/c.csv")]
+        submitted = []
+
+        class RecordingExecutor(ThreadPoolExecutor):
+            def submit(self, fn: Any, /, *args: Any, **kwargs: Any) -> Any:
+                submitted.append(args[-1])
+                return super().submit(fn, *args, **kwargs)
+
+        with patch("concurrent.futures.ProcessPoolExecutor", RecordingExecutor):
+            result = aggregate_files(report, files, AggregateOptions(jobs=2))
+
+        assert submitted == [files[2], files[0], files[1]]
+        assert result == aggregate_files(report, files)
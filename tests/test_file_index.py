@@ -0,0 +1,344 @@
+import csv
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+from index import main as index_main
+from reports.student_performance import StudentPerformanceReport
+from utils import profiling
+from utils.dataset import convert_csv
+from utils.file_index import (
+    build_index,
+    load_index,
+    may_match,
+    select_chunks,
+    sidecar_path,
+    write_index,
+)
+from utils.file_reader import CsvChunk, iter_csv_files, split_csv_file
+from utils.filters import parse_condition
+from utils.parallel import AggregateOptions, aggregate_files, plan_tasks
+from utils.readers import ReadOptions, iter_chunk_rows, iter_rows
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+HEADER = ["student_name", "subject", "grade", "teacher_name", "date"]
+
+SEPTEMBER = [
+    ["Студент A", "Математика", "5", "Иванов", "2024-09-01"],
+    ["Студент B", "Физика", "x", "Петров", "2024-09-02"],
+    ["Студент, C", "Математика", "4", "Иванов", "2024-09-03"],
+    ["Студент D", "Физика"],
+    ["Студент A", "Физика", "3", "Петров", "2024-09-30"],
+]
+
+OCTOBER = [
+    ["Студент A", "Математика", "4", "Сидоров", "2024-10-01"],
+    ["Студент B", "Математика", "3", "Сидоров", "2024-10-15"],
+]
+
+
+def write_csv(path: str, rows: list) -> None:
+    """Записывает CSV файл с заголовком"""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+
+
+class TestWhere:
+    """Тесты фильтра строк в читателях и индексов файлов"""
+
+    def setup_method(self) -> None:
+        """Создание файлов за сентябрь и октябрь"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.september = os.path.join(self.temp_dir, "september.csv")
+        self.october = os.path.join(self.temp_dir, "october.csv")
+        write_csv(self.september, SEPTEMBER)
+        write_csv(self.october, OCTOBER)
+
+    def teardown_method(self) -> None:
+        """Удаление временных файлов"""
+        profiling.disable()
+        shutil.rmtree(self.temp_dir)
+
+    @pytest.mark.parametrize(
+        "conditions",
+        [
+            ["subject=Математика"],
+            ["teacher_name!=Иванов"],
+            ["date>=2024-09-02", "date<2024-10-15"],
+            ["subject=Физика", "date=2024-09-30"],
+            ["subject=Химия"],
+        ],
+    )
+    @pytest.mark.parametrize(
+        "columns, converters",
+        [(("student_name", "grade"), {"grade": int}), (None, None)],
+    )
+    def test_readers_agree(
+        self, conditions: list, columns: tuple, converters: dict
+    ) -> None:
+        """Все читатели отдают одни и те же подходящие строки"""
+        where = [parse_condition(text) for text in conditions]
+        files = [self.september, self.october]
+        dataset = os.path.join(self.temp_dir, "september.gcol")
+        convert_csv(self.september, dataset)
+
+        expected = list(iter_csv_files(files, columns, converters, where))
+        assert (
+            list(iter_rows(files, ReadOptions("mmap"), columns, converters, where))
+            == expected
+        )
+        assert (
+            list(iter_rows(files, ReadOptions("csv", 2), columns, converters, where))
+            == expected
+        )
+        assert (
+            list(
+                iter_rows(
+                    [dataset, self.october], ReadOptions(), columns, converters, where
+                )
+            )
+            == expected
+        )
+
+        chunks = split_csv_file(self.september, 1)
+        for reader in ("csv", "mmap"):
+            assert [
+                row
+                for chunk in chunks
+                for row in iter_chunk_rows(chunk, reader, columns, converters, where)
+            ] == list(iter_csv_files([self.september], columns, converters, where))
+
+    def test_filtered_rows(self) -> None:
+        """Фильтр применяется до преобразований и проекции"""
+        where = [parse_condition("teacher_name=Петров")]
+
+        assert list(
+            iter_csv_files([self.september], ("student_name", "grade"), None, where)
+        ) == [("Студент B", "x"), ("Студент A", "3")]
+        assert [
+            row["date"] for row in iter_csv_files([self.september], None, None, where)
+        ] == ["2024-09-02", "2024-09-30"]
+
+    def test_build_index(self) -> None:
+        """Индекс хранит число строк и диапазоны значений колонок"""
+        index = build_index(self.september)
+
+        assert index.rows == len(SEPTEMBER)
+        assert index.ranges["date"] == ("2024-09-01", "2024-09-30")
+        assert index.ranges["subject"] == ("Математика", "Физика")
+        assert index.ranges["teacher_name"] == ("Иванов", "Петров")
+        assert index.values == {
+            "subject": ["Математика", "Физика"],
+            "teacher_name": ["Иванов", "Петров"],
+        }
+        assert index.header == HEADER
+        assert [block.rows for block in index.blocks] == [len(SEPTEMBER)]
+        assert index.students is not None
+        assert all(row[0] in index.students for row in SEPTEMBER)
+
+        write_index(self.september, index)
+        loaded = load_index(self.september)
+        assert loaded is not None
+        assert loaded._replace(students=None) == index._replace(students=None)
+        assert loaded.students is not None
+        assert loaded.students.bits == index.students.bits
+
+    def test_block_offsets(self) -> None:
+        """Блоки начинаются на границах записей, в том числе многострочных"""
+        csv_path = os.path.join(self.temp_dir, "multiline.csv")
+        write_csv(csv_path, SEPTEMBER + [["Студент\nE", "Химия", "5"]] + OCTOBER)
+        index = build_index(csv_path, block_rows=3)
+
+        assert index.rows == len(SEPTEMBER) + 1 + len(OCTOBER)
+        assert [block.rows for block in index.blocks] == [3, 3, 2]
+        assert index.blocks[-1].end == os.path.getsize(csv_path)
+        assert index.blocks[1].ranges["subject"] == ("Физика", "Химия")
+
+        chunks = [
+            chunk._replace(start=block.start, end=block.end)
+            for chunk, block in zip(split_csv_file(csv_path, 1), index.blocks)
+        ]
+        assert [
+            row for chunk in chunks for row in iter_chunk_rows(chunk, "csv")
+        ] == list(iter_csv_files([csv_path]))
+
+    def test_quoted_crlf(self) -> None:
+        """Перевод строки \\r\\n в кавычках попадает в индекс, как читает CSV"""
+        csv_path = os.path.join(self.temp_dir, "crlf.csv")
+        with open(csv_path, "wb") as f:
+            f.write(
+                (
+                    ",".join(HEADER) + "\r\n"
+                    'Студент A,"Хим\r\nия",5,Орлов,2024-12-01\r\n'
+                    "Студент B,Физика,4,Орлов,2024-12-02\r\n"
+                ).encode()
+            )
+
+        index = build_index(csv_path)
+
+        subjects = sorted(row["subject"] for row in iter_csv_files([csv_path]))
+        assert subjects == ["Физика", "Хим\nия"]
+        assert index.values["subject"] == subjects
+        assert index.ranges["date"] == ("2024-12-01", "2024-12-02")
+        assert index.header == HEADER
+
+    def test_compressed_index(self) -> None:
+        """У сжатого файла только статистика всего файла"""
+        with open(self.october, "rb") as f:
+            data = f.read()
+        gz_path = self.october + ".gz"
+        with gzip.open(gz_path, "wb") as f:
+            f.write(data)
+
+        index = build_index(gz_path)
+
+        assert index.rows == len(OCTOBER)
+        assert index.blocks == []
+        assert index.header is None
+        assert index.ranges["date"] == ("2024-10-01", "2024-10-15")
+
+    def test_stale_index_ignored(self) -> None:
+        """Индекс изменённого файла не используется"""
+        write_index(self.september, build_index(self.september))
+        with open(self.september, "a", encoding="utf-8") as f:
+            f.write("Студент E,Химия,5,Орлов,2024-12-01\n")
+
+        assert load_index(self.september) is None
+        assert may_match(self.september, [parse_condition("subject=Химия")])
+
+    def test_corrupt_index_ignored(self) -> None:
+        """Повреждённый индекс не используется"""
+        with open(sidecar_path(self.september), "w", encoding="utf-8") as f:
+            f.write("{")
+
+        assert load_index(self.september) is None
+
+    def test_may_match(self) -> None:
+        """Файл пропускается, только если индекс исключает подходящие строки"""
+        write_index(self.october, build_index(self.october))
+
+        assert may_match(self.october, [parse_condition("date>=2024-10-10")])
+        assert not may_match(self.october, [parse_condition("date<2024-10-01")])
+        assert not may_match(self.october, [parse_condition("teacher_name=Иванов")])
+        assert may_match(self.september, [parse_condition("teacher_name=Иванов")])
+        assert may_match(self.october, [])
+
+    def test_value_sets_and_bloom(self) -> None:
+        """Файл исключается множеством значений и фильтром Блума студентов"""
+        write_index(self.september, build_index(self.september))
+
+        # Русский язык внутри диапазона Математика..Физика, но не в множестве
+        assert not may_match(self.september, [parse_condition("subject=Русский язык")])
+        assert may_match(self.september, [parse_condition("subject!=Физика")])
+        assert may_match(self.september, [parse_condition("student_name=Студент A")])
+        assert not may_match(
+            self.september, [parse_condition("student_name=Студент Я")]
+        )
+
+    def test_block_pruning(self) -> None:
+        """Читаются только блоки с подходящими датами, результат тот же"""
+        csv_path = os.path.join(self.temp_dir, "year.csv")
+        write_csv(
+            csv_path,
+            [
+                [f"Студент {day % 3}", "Математика", str(day % 5 + 1), "Иванов"]
+                + [f"2024-09-{day:02d}"]
+                for day in range(1, 31)
+            ],
+        )
+        where = [
+            parse_condition("date>=2024-09-12"),
+            parse_condition("date<2024-09-15"),
+        ]
+        columns, converters = ("student_name", "grade"), {"grade": int}
+        expected = list(iter_csv_files([csv_path], columns, converters, where))
+        write_index(csv_path, build_index(csv_path, block_rows=5))
+
+        profiler = profiling.enable()
+        for reader in ("csv", "mmap"):
+            assert (
+                list(
+                    iter_rows(
+                        [csv_path], ReadOptions(reader), columns, converters, where
+                    )
+                )
+                == expected
+            )
+        assert profiler.counters["blocks_skipped"] == 2 * 5
+        # Из прочитанного блока отброшены только дни 11 и 15
+        assert profiler.counters["rows_filtered"] == 2 * 2
+
+        chunks = select_chunks(csv_path, where)
+        assert chunks is not None and len(chunks) == 1
+        assert chunks[0].end - chunks[0].start < os.path.getsize(csv_path) / 5
+
+    def test_plan_tasks_uses_blocks(self) -> None:
+        """Файл делится на части по блокам индекса без поиска границ записей"""
+        write_index(self.september, build_index(self.september, block_rows=2))
+        index = load_index(self.september)
+        assert index is not None
+
+        with patch("utils.parallel.split_csv_file") as mock_split:
+            tasks = list(plan_tasks([self.september], chunk_size=1))
+            mock_split.assert_not_called()
+
+        assert tasks == [
+            CsvChunk(self.september, HEADER, block.start, block.end)
+            for block in index.blocks
+        ]
+        report = StudentPerformanceReport()
+        assert aggregate_files(
+            report, [self.september], AggregateOptions(jobs=2, chunk_size=1)
+        ) == aggregate_files(report, [self.september])
+
+    def test_skipped_files_not_read(self) -> None:
+        """Исключённые индексом файлы не открываются ни в одном режиме"""
+        for file_path in (self.september, self.october):
+            write_index(file_path, build_index(file_path))
+        report = StudentPerformanceReport()
+        report.where = (parse_condition("date>=2024-10-01"),)
+        files = [self.september, self.october]
+
+        profiler = profiling.enable()
+        rows = list(
+            iter_rows(
+                files, ReadOptions(), report.columns, report.converters, report.where
+            )
+        )
+        assert rows == [("Студент A", 4), ("Студент B", 3)]
+        assert profiler.counters["files_skipped"] == 1
+        assert profiler.counters["files_read"] == 1
+
+        has_rows, state = aggregate_files(
+            report, files, AggregateOptions(jobs=2, chunk_size=1)
+        )
+        assert has_rows
+        assert report.finalize(state)["rows"] == [
+            [1, "Студент A", 4.0],
+            [2, "Студент B", 3.0],
+        ]
+        assert profiler.counters["files_skipped"] == 2
+
+    def test_index_main(self) -> None:
+        """Тест точки входа index.py"""
+        with patch("sys.argv", ["index.py", "--files", self.temp_dir]):
+            with patch("sys.stdout"):
+                index_main()
+
+        assert load_index(self.september) is not None
+        assert load_index(self.october) is not None
+
+    def test_index_main_missing_file(self) -> None:
+        """Тест отсутствующего файла"""
+        with patch("sys.argv", ["index.py", "--files", "missing.csv"]):
+            with patch("sys.stderr"):
+                with pytest.raises(SystemExit):
+                    index_main()
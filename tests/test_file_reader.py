@@ -6,7 +6,12 @@ from typing import Any, Dict, List
 
 import pytest
 
-from utils.file_reader import read_csv_files
+from utils.file_reader import (
+    iter_csv_chunk,
+    iter_csv_files,
+    read_csv_files,
+    split_csv_file,
+)
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
@@ -91,3 +96,93 @@ class TestFileReader:
             assert data[0]["student_name"] == "Студент с-ёЁ"
         finally:
             os.unlink(temp_file)
+
+    def test_iter_csv_files_is_lazy(self) -> None:
+        """Тест что потоковое чтение не открывает файлы до первой строки"""
+        rows = iter_csv_files(["nonexistent.csv"])
+
+        with pytest.raises(FileNotFoundError):
+            next(rows)
+
+    def test_iter_csv_files_yields_rows_file_by_file(self) -> None:
+        """Тест потокового чтения нескольких файлов по порядку"""
+        files: List[str] = []
+        try:
+            for i in range(2):
+                f = tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False)
+                writer = csv.writer(f)
+                writer.writerow(["student_name", "grade"])
+                writer.writerow([f"Студент {i}", f"{i+3}"])
+                writer.writerow([f"Студент {i}", f"{i+2}"])
+                files.append(f.name)
+                f.close()
+
+            rows = iter_csv_files(files)
+            assert next(rows) == {"student_name": "Студент 0", "grade": "3"}
+            assert [row["grade"] for row in rows] == ["2", "4", "3"]
+        finally:
+            for file in files:
+                os.unlink(file)
+
+    def test_split_csv_file_respects_quoted_newlines(self) -> None:
+        """Тест разбиения файла на части с переводами строк в кавычках"""
+        with tempfile.NamedTemporaryFile(
+            mode="w", suffix=".csv", delete=False, encoding="utf-8", newline=""
+        ) as f:
+            writer = csv.writer(f)
+            writer.writerow(["student_name", "grade"])
+            for i in range(200):
+                name = f'Студент "{i}"\nвторая строка' if i % 3 == 0 else f"С{i}"
+                writer.writerow([name, str(i % 5)])
+            temp_file = f.name
+
+        try:
+            chunks = split_csv_file(temp_file, 100)
+            rows = [row for chunk in chunks for row in iter_csv_chunk(chunk)]
+
+            assert len(chunks) > 1
+            assert all(chunk.header == ["student_name", "grade"] for chunk in chunks)
+            assert rows == read_csv_files([temp_file])
+        finally:
+            os.unlink(temp_file)
+
+    def test_split_csv_file_header_only(self) -> None:
+        """Тест разбиения файла, содержащего только заголовок"""
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as f:
+            writer = csv.writer(f)
+            writer.writerow(["student_name", "grade"])
+            temp_file = f.name
+
+        try:
+            assert not split_csv_file(temp_file, 1)
+        finally:
+            os.unlink(temp_file)
+
+    def test_split_csv_file_not_found(self) -> None:
+        """Тест разбиения отсутствующего файла"""
+        with pytest.raises(FileNotFoundError, match="nonexistent.csv"):
+            split_csv_file("nonexistent.csv", 100)
+
+    def test_iter_csv_files_with_projection(self) -> None:
+        """Тест чтения только нужных колонок с преобразованием типов"""
+        with tempfile.NamedTemporaryFile(
+            mode="w", suffix=".csv", delete=False, encoding="utf-8"
+        ) as f:
+            writer = csv.writer(f)
+            writer.writerow(["student_name", "subject", "grade"])
+            writer.writerow(["Иванов Иван", "Математика", "5"])
+            writer.writerow(["Петров Петр", "Математика", "плохо"])
+            writer.writerow(["Сидоров Сидор"])
+            writer.writerow(["Смирнова Анна", "Физика", "4"])
+            temp_file = f.name
+
+        try:
+            rows = list(
+                iter_csv_files([temp_file], ("grade", "student_name"), {"grade": int})
+            )
+            missing = list(iter_csv_files([temp_file], ("teacher_name",)))
+
+            assert rows == [(5, "Иванов Иван"), (4, "Смирнова Анна")]
+            assert not missing
+        finally:
+            os.unlink(temp_file)
@@ -0,0 +1,116 @@
+import os
+import sys
+
+import pytest
+
+from utils.filters import (
+    Condition,
+    filter_dicts,
+    make_row_filter,
+    parse_condition,
+    range_may_match,
+)
+from utils.projection import make_projector
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+HEADER = ["student_name", "subject", "grade", "teacher_name", "date"]
+
+
+class TestFilters:
+    """Тесты условий --where"""
+
+    @pytest.mark.parametrize(
+        "text, expected",
+        [
+            ("subject=Математика", Condition("subject", "=", "Математика")),
+            ("teacher_name != Иванов", Condition("teacher_name", "!=", "Иванов")),
+            ("date>=2024-09-01", Condition("date", ">=", "2024-09-01")),
+            ("date<2024-10-01", Condition("date", "<", "2024-10-01")),
+            ("subject=Русский язык", Condition("subject", "=", "Русский язык")),
+            ("student_name=Иванов Иван", Condition("student_name", "=", "Иванов Иван")),
+        ],
+    )
+    def test_parse_condition(self, text: str, expected: Condition) -> None:
+        """Тест разбора условий"""
+        assert parse_condition(text) == expected
+
+    @pytest.mark.parametrize(
+        "text",
+        ["subject", "grade=5", "subject>=Математика", "date>=01.09.2024", "=5"],
+    )
+    def test_parse_condition_invalid(self, text: str) -> None:
+        """Неизвестная колонка, сравнение строк и неверная дата - ошибка"""
+        with pytest.raises(ValueError):
+            parse_condition(text)
+
+    def test_make_row_filter(self) -> None:
+        """Условия проверяются на исходных строках полей через И"""
+        accept = make_row_filter(
+            HEADER,
+            [
+                parse_condition("subject=Математика"),
+                parse_condition("date>=2024-09-02"),
+            ],
+        )
+
+        assert accept(["A", "Математика", "5", "Иванов", "2024-09-02"])
+        assert not accept(["A", "Математика", "5", "Иванов", "2024-09-01"])
+        assert not accept(["A", "Физика", "5", "Иванов", "2024-09-03"])
+        assert not accept(["A", "Математика"])
+
+    def test_make_row_filter_missing_column(self) -> None:
+        """Если колонки условия нет в заголовке, не подходит ни одна запись"""
+        accept = make_row_filter(["student_name"], [parse_condition("subject=X")])
+
+        assert not accept(["X"])
+
+    def test_projector_filters_before_conversion(self) -> None:
+        """Не подошедшая запись не преобразуется и не считается некорректной"""
+        project = make_projector(
+            HEADER,
+            ["student_name", "grade"],
+            {"grade": int},
+            [parse_condition("teacher_name=Иванов")],
+        )
+
+        assert project(["A", "Математика", "5", "Иванов", "2024-09-01"]) == ("A", 5)
+        assert project(["B", "Физика", "x", "Петров", "2024-09-01"]) is None
+
+    def test_filter_dicts(self) -> None:
+        """Строки-словари без значения колонки условия отбрасываются"""
+        rows: list = [
+            {"subject": "Физика", "date": "2024-09-01"},
+            {"subject": "Математика", "date": "2024-09-01"},
+            {"subject": None},
+        ]
+
+        assert list(filter_dicts(rows, [parse_condition("subject!=Математика")])) == [
+            rows[0]
+        ]
+        assert list(filter_dicts(rows, ())) == rows
+
+    @pytest.mark.parametrize(
+        "text, expected",
+        [
+            ("date=2024-09-15", True),
+            ("date=2024-10-15", False),
+            ("date>=2024-09-30", True),
+            ("date>2024-09-30", False),
+            ("date<=2024-09-01", True),
+            ("date<2024-09-01", False),
+            ("date!=2024-09-01", True),
+        ],
+    )
+    def test_range_may_match(self, text: str, expected: bool) -> None:
+        """Проверка диапазона значений файла"""
+        assert (
+            range_may_match(parse_condition(text), "2024-09-01", "2024-09-30")
+            is expected
+        )
+
+    def test_range_may_match_single_value(self) -> None:
+        """Условие != исключает файл, в котором только это значение"""
+        condition = parse_condition("subject!=Физика")
+
+        assert not range_may_match(condition, "Физика", "Физика")
@@ -0,0 +1,212 @@
+import os
+import random
+import statistics
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from reports.group_by import GroupByReport, Metric
+from reports.report_factory import ReportFactory
+from reports.teacher_performance import TeacherPerformanceReport
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+DATA = [
+    {"subject": "Математика", "teacher_name": "Иванов", "grade": "5"},
+    {"subject": "Физика", "teacher_name": "Петров", "grade": "3"},
+    {"subject": "Математика", "teacher_name": "Иванов", "grade": "4"},
+    {"subject": "Математика", "teacher_name": "Петров", "grade": "x"},
+    {"subject": "Математика", "teacher_name": "Петров", "grade": "4"},
+    {"subject": "Физика", "teacher_name": "Петров", "grade": "4"},
+    {"subject": "Физика", "teacher_name": "Петров", "grade": "5"},
+    {"subject": "Физика", "teacher_name": "Петров", "grade": "2"},
+    {"subject": "Химия", "grade": "5"},
+]
+
+
+class SubjectTotalsReport(GroupByReport):
+    """Сумма оценок по предметам в порядке первого появления"""
+
+    group_by = ("subject",)
+    metrics = (Metric("sum", "sum", "grade"), Metric("count", "count"))
+    converters = {"grade": int}
+
+
+def random_rows(count: int) -> list:
+    """Случайные строки с повторяющимися предметами и преподавателями"""
+    rng = random.Random(1)
+    return [
+        {
+            "subject": f"Предмет {rng.randrange(3)}",
+            "teacher_name": f"Преподаватель {rng.randrange(4)}",
+            "grade": str(rng.randrange(1, 6)) if rng.random() > 0.05 else "x",
+        }
+        for _ in range(count)
+    ]
+
+
+class TestGroupByReport:
+    """Тесты отчетов-группировок"""
+
+    def test_metrics(self) -> None:
+        """Метрики считаются по группам из нескольких колонок"""
+        result = TeacherPerformanceReport().generate(DATA)
+
+        assert result["headers"] == [
+            "",
+            "subject",
+            "teacher_name",
+            "grades",
+            "grade",
+            "median",
+            "min",
+            "max",
+        ]
+        assert result["rows"] == [
+            [1, "Математика", "Иванов", 2, 4.5, 4.5, 4, 5],
+            [2, "Математика", "Петров", 1, 4.0, 4, 4, 4],
+            [3, "Физика", "Петров", 4, 3.5, 3.5, 2, 5],
+        ]
+
+    def test_columns_from_spec(self) -> None:
+        """Колонки читателя выводятся из описания отчета"""
+        assert TeacherPerformanceReport.columns == ("subject", "teacher_name", "grade")
+        assert SubjectTotalsReport.columns == ("subject", "grade")
+
+    def test_unsorted_groups_keep_first_appearance(self) -> None:
+        """Без sort_by группы идут в порядке первого появления"""
+        report = SubjectTotalsReport()
+        report.offset, report.limit = 1, 1
+
+        assert report.generate(DATA)["rows"] == [[2, "Физика", 14, 4]]
+
+    def test_median_matches_statistics(self) -> None:
+        """Медиана по количествам значений совпадает с statistics.median"""
+        data = random_rows(500)
+        result = TeacherPerformanceReport().generate(data)
+
+        for row in result["rows"]:
+            grades = [
+                int(item["grade"])
+                for item in data
+                if (item["subject"], item["teacher_name"]) == (row[1], row[2])
+                and item["grade"] != "x"
+            ]
+            assert row[5] == round(statistics.median(grades), 2)
+            assert row[3:5] == [len(grades), round(statistics.mean(grades), 2)]
+
+    def test_merge_partial_states_matches_generate(self) -> None:
+        """Объединение состояний частей дает тот же отчет"""
+        data = random_rows(300)
+        report = TeacherPerformanceReport()
+        parts = [
+            report.accumulate(report.initial_state(), report.project(data[start:end]))
+            for start, end in ((0, 100), (100, 101), (101, 300))
+        ]
+        state = report.initial_state()
+        for part in parts:
+            state = report.merge(state, part)
+
+        assert report.finalize(state) == report.generate(data)
+
+    def test_merge_does_not_share_histograms(self) -> None:
+        """Состояние после merge не меняется вместе с исходной частью"""
+        report = TeacherPerformanceReport()
+        part = report.accumulate(report.initial_state(), [("М", "И", 5)])
+        state = report.merge(report.initial_state(), part)
+        report.accumulate(part, [("М", "И", 4)])
+
+        assert state == {("М", "И"): [5, {5: 1}, 5, 5, 1]}
+
+    def test_interned_keys(self) -> None:
+        """Значения колонок в ключах групп хранятся в одном экземпляре"""
+        report = TeacherPerformanceReport()
+        subject = "".join(["Мате", "матика"])
+        state = report.accumulate(
+            report.initial_state(),
+            [("Математика", "Иванов", 5), (subject, "Петров", 4)],
+        )
+
+        first, second = state
+        assert first[0] is second[0]
+
+    @pytest.mark.parametrize(
+        "metrics, sort_by",
+        [
+            ((Metric("grade", "mode", "grade"),), None),
+            ((Metric("grade", "mean"),), None),
+            ((Metric("grades", "count", "grade"),), None),
+            ((Metric("grade", "mean", "grade"),), "median"),
+        ],
+    )
+    def test_invalid_spec(self, metrics: tuple, sort_by: str) -> None:
+        """Неверное описание отчета - ошибка при объявлении класса"""
+        with pytest.raises(ValueError):
+            type(
+                "InvalidReport",
+                (GroupByReport,),
+                {"group_by": ("subject",), "metrics": metrics, "sort_by": sort_by},
+            )
+
+    def test_registered(self) -> None:
+        """Отчет зарегистрирован вместе с движком numpy"""
+        report = ReportFactory.get_report("teacher-performance")
+
+        assert isinstance(report, TeacherPerformanceReport)
+        assert ("teacher-performance", "numpy") in ReportFactory._engines
+
+
+class TestColumnarGroupByReport:
+    """Тесты движка numpy для отчетов-группировок"""
+
+    def test_generate_matches_python_engine(self) -> None:
+        """Метрики, порядок и состояние совпадают с обычным отчетом"""
+        pytest.importorskip("numpy")
+        from reports.teacher_performance_columnar import (
+            ColumnarTeacherPerformanceReport,
+        )
+
+        data = random_rows(1000) + DATA
+        report = TeacherPerformanceReport()
+        columnar = ColumnarTeacherPerformanceReport()
+
+        with patch("reports.group_by_columnar.BATCH_SIZE", 64):
+            state = columnar.accumulate(
+                columnar.initial_state(), columnar.project(data)
+            )
+
+        assert state == report.accumulate(report.initial_state(), report.project(data))
+        assert columnar.finalize(state) == report.generate(data)
+
+    @pytest.mark.parametrize("grade", ["123456789012345678", "-4611686018427387904"])
+    def test_large_sums_are_exact(self, grade: str) -> None:
+        """Суммы больших целых совпадают с обычным отчетом без потери точности"""
+        pytest.importorskip("numpy")
+        from reports.group_by_columnar import ColumnarGroupByReport
+
+        class ColumnarSubjectTotalsReport(ColumnarGroupByReport, SubjectTotalsReport):
+            pass
+
+        data = [
+            {"subject": "Математика", "grade": grade},
+            {"subject": "Физика", "grade": "1"},
+            {"subject": "Математика", "grade": grade},
+            {"subject": "Математика", "grade": "1"},
+        ]
+
+        assert ColumnarSubjectTotalsReport().generate(data) == (
+            SubjectTotalsReport().generate(data)
+        )
+
+    def test_rejects_non_integer_values(self) -> None:
+        """Движок numpy не принимает нецелые колонки значений"""
+        pytest.importorskip("numpy")
+        from reports.group_by_columnar import ColumnarGroupByReport
+
+        class ColumnarDatesReport(ColumnarGroupByReport):
+            group_by = ("subject",)
+            metrics = (Metric("last", "max", "date"),)
+
+        with pytest.raises(ValueError):
+            ColumnarDatesReport()
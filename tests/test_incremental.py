@@ -0,0 +1,173 @@
+import os
+import shutil
+import sys
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+from reports.student_performance import StudentPerformanceReport
+from utils.file_reader import complete_records_end, read_csv_files, read_csv_header
+from utils.incremental import IncrementalStore, plan_increment
+from utils.parallel import AggregateOptions, aggregate_chunk, aggregate_files
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+HEADER = "student_name,grade\n"
+
+
+class TestIncremental:
+    """Тесты инкрементального чтения дописываемых файлов"""
+
+    def setup_method(self) -> None:
+        """Создание каталога прогресса и CSV файла"""
+        self.store_dir = tempfile.mkdtemp()
+        self.store = IncrementalStore(self.store_dir)
+        self.report = StudentPerformanceReport()
+        with tempfile.NamedTemporaryFile(
+            mode="w", suffix=".csv", delete=False, encoding="utf-8"
+        ) as f:
+            f.write(HEADER + "Студент A,5\nСтудент B,3\n")
+            self.temp_file = f.name
+
+    def teardown_method(self) -> None:
+        """Удаление временных файлов"""
+        shutil.rmtree(self.store_dir)
+        os.unlink(self.temp_file)
+
+    def _append(self, text: str) -> None:
+        """Дописывает строки в конец файла"""
+        with open(self.temp_file, "a", encoding="utf-8") as f:
+            f.write(text)
+
+    def _aggregate(self) -> dict:
+        """Формирует отчет в инкрементальном режиме"""
+        _, state = aggregate_files(
+            self.report, [self.temp_file], AggregateOptions(progress_store=self.store)
+        )
+        return self.report.finalize(state)
+
+    def _expected(self) -> dict:
+        """Формирует отчет полным чтением файла"""
+        return self.report.generate(read_csv_files([self.temp_file]))
+
+    def test_only_appended_tail_is_parsed(self) -> None:
+        """Тест что повторный запуск разбирает только дописанные строки"""
+        assert self._aggregate() == self._expected()
+
+        self._append("Студент B,5\nСтудент C,4\n")
+        with patch(
+            "utils.parallel.aggregate_chunk", wraps=aggregate_chunk
+        ) as mock_chunk:
+            result = self._aggregate()
+
+        assert result == self._expected()
+        mock_chunk.assert_called_once()
+        chunk = mock_chunk.call_args.args[1]
+        assert chunk.start == len((HEADER + "Студент A,5\nСтудент B,3\n").encode())
+        assert chunk.end == os.path.getsize(self.temp_file)
+
+    def test_unchanged_file_is_not_parsed(self) -> None:
+        """Тест что неизменный файл не разбирается повторно"""
+        self._aggregate()
+
+        saved, chunks, tail, progress = plan_increment(
+            self.temp_file, self.report, self.store, 1024
+        )
+
+        assert saved is not None
+        assert self.store.load_state(self.temp_file, self.report, saved) == (
+            True,
+            {"Студент A": [5, 1], "Студент B": [3, 1]},
+        )
+        assert not chunks
+        assert not tail
+        assert progress is not None
+        assert progress.offset == os.path.getsize(self.temp_file)
+
+    def test_incomplete_last_record_is_deferred(self) -> None:
+        """Тест что недописанная строка учитывается при следующем запуске"""
+        self._append("Студент C,")
+        assert self._aggregate() == self.report.generate(
+            read_csv_files([self.temp_file])[:-1]
+        )
+
+        self._append("4\n")
+        assert self._aggregate() == self._expected()
+
+    def test_unterminated_last_record_is_counted(self) -> None:
+        """Тест что последняя строка без перевода строки входит в отчет"""
+        self._append("Студент C,4")
+        assert self._aggregate() == self._expected()
+
+        saved, chunks, tail, progress = plan_increment(
+            self.temp_file, self.report, self.store, 1024
+        )
+        assert saved is not None
+        assert self.store.load_state(self.temp_file, self.report, saved) == (
+            True,
+            {"Студент A": [5, 1], "Студент B": [3, 1]},
+        )
+        assert not chunks
+        assert len(tail) == 1
+        assert progress is not None
+        assert progress.offset == tail[0].start
+
+        self._append("\nСтудент C,2\n")
+        assert self._aggregate() == self._expected()
+
+    def test_saved_state_loaded_while_merging(self) -> None:
+        """Тест что сохранённое состояние не читается при планировании"""
+        self._aggregate()
+        self._append("Студент C,4\n")
+
+        with patch.object(
+            self.store, "load_state", wraps=self.store.load_state
+        ) as mock_load_state:
+            plan_increment(self.temp_file, self.report, self.store, 1024)
+            mock_load_state.assert_not_called()
+
+            assert self._aggregate() == self._expected()
+            mock_load_state.assert_called_once()
+
+    def test_replaced_state_is_reparsed(self) -> None:
+        """Тест что прочитанная часть разбирается заново, если запись пропала"""
+        self._aggregate()
+        self._append("Студент C,4\n")
+
+        with patch.object(self.store, "load_state", return_value=None):
+            assert self._aggregate() == self._expected()
+
+    def test_rewritten_file_is_rescanned(self) -> None:
+        """Тест полного перечитывания переписанного файла"""
+        self._aggregate()
+
+        with open(self.temp_file, "w", encoding="utf-8") as f:
+            f.write(HEADER + "Студент Z,2\nСтудент A,5\nСтудент B,3\n")
+
+        assert self._aggregate() == self._expected()
+
+    def test_truncated_file_is_rescanned(self) -> None:
+        """Тест полного перечитывания укороченного файла"""
+        self._aggregate()
+
+        with open(self.temp_file, "w", encoding="utf-8") as f:
+            f.write(HEADER + "Студент A,4\n")
+
+        assert self._aggregate() == self._expected()
+
+    def test_file_not_found(self) -> None:
+        """Тест обработки отсутствующего файла"""
+        with pytest.raises(FileNotFoundError, match="nonexistent.csv"):
+            plan_increment("nonexistent.csv", self.report, self.store, 1024)
+
+    def test_header_helpers(self) -> None:
+        """Тест чтения заголовка и поиска конца полных записей"""
+        self._append('Студент "C","4\n5"\nСтудент D')
+
+        header, header_end = read_csv_header(self.temp_file)
+        end = complete_records_end(self.temp_file, header_end)
+
+        assert header == ["student_name", "grade"]
+        assert header_end == len(HEADER)
+        assert end == os.path.getsize(self.temp_file) - len("Студент D".encode())
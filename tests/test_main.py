@@ -1,3 +1,4 @@
+import lzma
 import os
 import sys
 from typing import Any, List
@@ -6,6 +7,8 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from main import main
+from utils.parallel import AggregateOptions
+from utils.readers import ReadOptions
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
@@ -14,13 +17,13 @@ class TestMain:
     """Тесты основной функции приложения"""
 
     @patch("main.ReportFactory")
-    @patch("main.read_csv_files")
-    def test_main_success(self, mock_read_csv: Any, mock_factory: Any) -> None:
+    @patch("main.iter_rows")
+    def test_main_success(self, mock_iter_rows: Any, mock_factory: Any) -> None:
         """Тест успешного выполнения main"""
-        mock_read_csv.return_value = [{"student_name": "Иванов Иван", "grade": "5"}]
+        mock_iter_rows.return_value = [{"student_name": "Иванов Иван", "grade": "5"}]
 
         mock_report_instance = MagicMock()
-        mock_report_instance.generate.return_value = {
+        mock_report_instance.finalize.return_value = {
             "headers": ["№", "Студент", "Оценка"],
             "rows": [["1", "Иванов Иван", "5.0"]],
         }
@@ -35,15 +38,24 @@ class TestMain:
                 main()
                 mock_exit.assert_not_called()
 
-        mock_read_csv.assert_called_with(["test.csv"])
-        mock_factory.get_report.assert_called_with("student-performance")
-        mock_report_instance.generate.assert_called_once()
+        mock_iter_rows.assert_called_with(
+            ["test.csv"],
+            ReadOptions("csv", 1),
+            mock_report_instance.columns,
+            mock_report_instance.converters,
+            (),
+        )
+        mock_factory.get_report.assert_called_with("student-performance", "python")
+        mock_report_instance.accumulate.assert_called_once()
+        mock_report_instance.print_report.assert_called_once_with(
+            mock_report_instance.finalize.return_value
+        )
 
     @patch("main.ReportFactory")
-    @patch("main.read_csv_files")
-    def test_main_file_not_found(self, mock_read_csv: Any, mock_factory: Any) -> None:
+    @patch("main.iter_rows")
+    def test_main_file_not_found(self, mock_iter_rows: Any, mock_factory: Any) -> None:
         """Тест обработки FileNotFoundError"""
-        mock_read_csv.side_effect = FileNotFoundError("Файл не найден")
+        mock_iter_rows.side_effect = FileNotFoundError("Файл не найден")
         mock_factory.get_available_reports.return_value = ["student-performance"]
 
         with patch(
@@ -62,8 +74,8 @@ class TestMain:
                     mock_exit.assert_called_with(1)
 
     @patch("main.ReportFactory")
-    @patch("main.read_csv_files")
-    def test_main_value_error(self, mock_read_csv: Any, mock_factory: Any) -> None:
+    @patch("main.iter_rows")
+    def test_main_value_error(self, mock_iter_rows: Any, mock_factory: Any) -> None:
         """Тест обработки ValueError"""
         mock_factory.get_report.side_effect = ValueError("Неизвестный отчет")
         mock_factory.get_available_reports.return_value = ["student-performance"]
@@ -75,11 +87,46 @@ class TestMain:
                 main()
                 mock_exit.assert_called_with(1)
 
+    def test_main_truncated_archive(self, tmp_path: Any, capsys: Any) -> None:
+        """Тест что обрезанный архив дает ошибку в данных, а не трассировку"""
+        compressed = lzma.compress(b"student_name,grade\n" + b"A,5\n" * 1000)
+        file_path = tmp_path / "grades.csv.xz"
+        file_path.write_bytes(compressed[: len(compressed) // 2])
+
+        for io_threads in ("1", "2"):
+            argv = ["main.py", "--files", str(file_path), "--report"]
+            argv += ["student-performance", "--io-threads", io_threads]
+            with patch("sys.argv", argv):
+                with pytest.raises(SystemExit) as exc_info:
+                    main()
+
+            assert exc_info.value.code == 1
+            assert capsys.readouterr().err.startswith("Ошибка в данных:")
+
+    @pytest.mark.parametrize(
+        "options",
+        [
+            ["--reader", "mmap"],
+            ["--jobs", "2"],
+            ["--cache-dir", "cache"],
+            ["--incremental-dir", "progress"],
+        ],
+    )
+    def test_main_io_threads_conflicts(self, options: List[str], capsys: Any) -> None:
+        """Тест отказа от --io-threads в режимах, где файлы читают задачи"""
+        argv = ["main.py", "--files", "a.csv", "--report", "student-performance"]
+        with patch("sys.argv", argv + ["--io-threads", "2"] + options):
+            with pytest.raises(SystemExit) as exc_info:
+                main()
+
+        assert exc_info.value.code == 2
+        assert "--io-threads" in capsys.readouterr().err
+
     @patch("main.ReportFactory")
-    @patch("main.read_csv_files")
-    def test_main_empty_data(self, mock_read_csv: Any, mock_factory: Any) -> None:
+    @patch("main.iter_rows")
+    def test_main_empty_data(self, mock_iter_rows: Any, mock_factory: Any) -> None:
         """Тест обработки пустых данных"""
-        mock_read_csv.return_value = []
+        mock_iter_rows.return_value = []
         mock_factory.get_available_reports.return_value = ["student-performance"]
 
         with patch(
@@ -98,12 +145,12 @@ class TestMain:
                 main()
 
     @patch("main.ReportFactory")
-    @patch("main.read_csv_files")
-    def test_main_key_error(self, mock_read_csv: Any, mock_factory: Any) -> None:
+    @patch("main.iter_rows")
+    def test_main_key_error(self, mock_iter_rows: Any, mock_factory: Any) -> None:
         """Тест обработки KeyError при обработке данных"""
-        mock_read_csv.return_value = [{"student_name": "Иванов Иван"}]
+        mock_iter_rows.return_value = [{"student_name": "Иванов Иван"}]
         mock_report_instance = MagicMock()
-        mock_report_instance.generate.side_effect = KeyError(
+        mock_report_instance.accumulate.side_effect = KeyError(
             "Отсутствует обязательное поле"
         )
         mock_factory.get_report.return_value = mock_report_instance
@@ -119,12 +166,12 @@ class TestMain:
                     mock_exit.assert_called_with(1)
 
     @patch("main.ReportFactory")
-    @patch("main.read_csv_files")
-    def test_main_type_error(self, mock_read_csv: Any, mock_factory: Any) -> None:
+    @patch("main.iter_rows")
+    def test_main_type_error(self, mock_iter_rows: Any, mock_factory: Any) -> None:
         """Тест обработки TypeError при обработке данных"""
-        mock_read_csv.return_value = [{"student_name": "Иванов Иван", "grade": "5"}]
+        mock_iter_rows.return_value = [{"student_name": "Иванов Иван", "grade": "5"}]
         mock_report_instance = MagicMock()
-        mock_report_instance.generate.side_effect = TypeError("Неверный тип данных")
+        mock_report_instance.accumulate.side_effect = TypeError("Неверный тип данных")
         mock_factory.get_report.return_value = mock_report_instance
         mock_factory.get_available_reports.return_value = ["student-performance"]
 
@@ -138,10 +185,10 @@ class TestMain:
                     mock_exit.assert_called_with(1)
 
     @patch("main.ReportFactory")
-    @patch("main.read_csv_files")
-    def test_main_io_error(self, mock_read_csv: Any, mock_factory: Any) -> None:
+    @patch("main.iter_rows")
+    def test_main_io_error(self, mock_iter_rows: Any, mock_factory: Any) -> None:
         """Тест обработки IOError при чтении файлов"""
-        mock_read_csv.side_effect = IOError("Ошибка ввода-вывода")
+        mock_iter_rows.side_effect = IOError("Ошибка ввода-вывода")
         mock_factory.get_available_reports.return_value = ["student-performance"]
 
         with patch(
@@ -154,14 +201,14 @@ class TestMain:
                     mock_exit.assert_called_with(1)
 
     @patch("main.ReportFactory")
-    @patch("main.read_csv_files")
+    @patch("main.iter_rows")
     def test_main_generic_exception(
-        self, mock_read_csv: Any, mock_factory: Any
+        self, mock_iter_rows: Any, mock_factory: Any
     ) -> None:
         """Тест обработки других исключений в блоке обработки данных"""
-        mock_read_csv.return_value = [{"student_name": "Иванов Иван", "grade": "5"}]
+        mock_iter_rows.return_value = [{"student_name": "Иванов Иван", "grade": "5"}]
         mock_report_instance = MagicMock()
-        mock_report_instance.generate.side_effect = Exception("Неожиданная ошибка")
+        mock_report_instance.accumulate.side_effect = Exception("Неожиданная ошибка")
         mock_factory.get_report.return_value = mock_report_instance
         mock_factory.get_available_reports.return_value = ["student-performance"]
 
@@ -173,3 +220,181 @@ class TestMain:
                 with patch("sys.stderr"):
                     with pytest.raises(Exception):
                         main()
+
+    @patch("main.ReportFactory")
+    @patch("main.aggregate_files")
+    def test_main_parallel_jobs(self, mock_aggregate: Any, mock_factory: Any) -> None:
+        """Тест параллельного режима --jobs"""
+        mock_aggregate.return_value = (True, {"Иванов Иван": [5, 1]})
+        mock_report_instance = MagicMock()
+        mock_factory.get_report.return_value = mock_report_instance
+        mock_factory.get_available_reports.return_value = ["student-performance"]
+
+        with patch(
+            "sys.argv",
+            [
+                "main.py",
+                "--files",
+                "a.csv",
+                "b.csv",
+                "--report",
+                "student-performance",
+                "--jobs",
+                "4",
+            ],
+        ):
+            main()
+
+        mock_aggregate.assert_called_once_with(
+            mock_report_instance,
+            ["a.csv", "b.csv"],
+            AggregateOptions(4, 64 * 1024 * 1024, "csv", None, None, None),
+        )
+        mock_report_instance.finalize.assert_called_once_with({"Иванов Иван": [5, 1]})
+        mock_report_instance.print_report.assert_called_once()
+
+    @patch("main.ReportFactory")
+    @patch("main.iter_rows")
+    def test_main_profile(
+        self, mock_iter_rows: Any, mock_factory: Any, capsys: Any
+    ) -> None:
+        """Тест вывода профиля по этапам в stderr"""
+        mock_iter_rows.return_value = [("Иванов Иван", 5)]
+        mock_factory.get_report.return_value = MagicMock()
+        mock_factory.get_available_reports.return_value = ["student-performance"]
+
+        with patch(
+            "sys.argv",
+            ["main.py", "--files", "a.csv", "--report", "student-performance"]
+            + ["--profile"],
+        ):
+            main()
+
+        stderr = capsys.readouterr().err
+        for stage in ("aggregate", "finalize", "print_report"):
+            assert stage in stderr
+
+    @patch("main.ReportFactory")
+    @patch("main.iter_rows")
+    def test_main_output_format(self, mock_iter_rows: Any, mock_factory: Any) -> None:
+        """Тест потокового формата вывода в файл"""
+        mock_iter_rows.return_value = [("Иванов Иван", 5)]
+        mock_report_instance = MagicMock()
+        mock_factory.get_report.return_value = mock_report_instance
+        mock_factory.get_available_reports.return_value = ["student-performance"]
+
+        with patch(
+            "sys.argv",
+            ["main.py", "--files", "a.csv", "--report", "student-performance"]
+            + ["--output-format", "jsonl", "--output", os.devnull],
+        ):
+            main()
+
+        mock_report_instance.print_report.assert_not_called()
+        result, output_format, _ = mock_report_instance.write_report.call_args[0]
+        assert result == mock_report_instance.finalize.return_value
+        assert output_format == "jsonl"
+
+    @patch("main.ReportFactory")
+    @patch("main.iter_rows")
+    def test_main_top(self, mock_iter_rows: Any, mock_factory: Any) -> None:
+        """Тест передачи страницы --top/--offset в отчет"""
+        mock_iter_rows.return_value = [("Иванов Иван", 5)]
+        mock_report_instance = MagicMock()
+        mock_factory.get_report.return_value = mock_report_instance
+        mock_factory.get_available_reports.return_value = ["student-performance"]
+
+        with patch(
+            "sys.argv",
+            ["main.py", "--files", "a.csv", "--report", "student-performance"]
+            + ["--top", "10", "--offset", "20"],
+        ):
+            main()
+
+        assert mock_report_instance.limit == 10
+        assert mock_report_instance.offset == 20
+
+    def test_main_approx_engine(self, tmp_path: Any, capsys: Any) -> None:
+        """Тест приближенного движка с заданной ошибкой сводок"""
+        csv_path = tmp_path / "grades.csv"
+        csv_path.write_text("student_name,grade\nА,5\nБ,3\nА,4\n", encoding="utf-8")
+
+        with patch(
+            "sys.argv",
+            ["main.py", "--files", str(csv_path), "--report", "student-performance"]
+            + ["--engine", "approx", "--sketch-error", "0.5"]
+            + ["--output-format", "csv"],
+        ):
+            main()
+
+        assert capsys.readouterr().out == (
+            ",student_name,grade,error\n1,А,4.5,0.0\n2,Б,3.0,0.0\n"
+        )
+
+    def test_main_invalid_sketch_error(self) -> None:
+        """Тест ошибки сводок вне интервала от 0 до 1"""
+        with patch(
+            "sys.argv",
+            ["main.py", "--files", "a.csv", "--report", "student-performance"]
+            + ["--engine", "approx", "--sketch-error", "1"],
+        ):
+            with patch("sys.stderr"):
+                with pytest.raises(SystemExit):
+                    main()
+
+    @pytest.mark.parametrize("engine", ["python", "numpy"])
+    def test_main_sketch_error_requires_approx(self, engine: str, capsys: Any) -> None:
+        """Тест отказа от --sketch-error без движка approx"""
+        with patch(
+            "sys.argv",
+            ["main.py", "--files", "a.csv", "--report", "student-performance"]
+            + ["--engine", engine, "--sketch-error", "0.5"],
+        ):
+            with pytest.raises(SystemExit):
+                main()
+
+        assert "--engine approx" in capsys.readouterr().err
+
+    def test_main_where(self, tmp_path: Any, capsys: Any) -> None:
+        """Тест фильтра строк по предмету и диапазону дат"""
+        csv_path = tmp_path / "grades.csv"
+        csv_path.write_text(
+            "student_name,subject,grade,date\n"
+            "А,Математика,5,2024-09-01\n"
+            "Б,Физика,2,2024-09-02\n"
+            "Б,Математика,4,2024-10-01\n"
+            "А,Математика,3,2024-12-01\n",
+            encoding="utf-8",
+        )
+
+        with patch(
+            "sys.argv",
+            ["main.py", "--files", str(csv_path), "--report", "student-performance"]
+            + ["--where", "subject=Математика", "--where", "date<2024-11-01"]
+            + ["--output-format", "csv"],
+        ):
+            main()
+
+        assert capsys.readouterr().out == (",student_name,grade\n1,А,5.0\n2,Б,4.0\n")
+
+    def test_main_invalid_where(self) -> None:
+        """Тест условия по колонке, по которой нельзя фильтровать"""
+        with patch(
+            "sys.argv",
+            ["main.py", "--files", "a.csv", "--report", "student-performance"]
+            + ["--where", "grade>3"],
+        ):
+            with patch("sys.stderr"):
+                with pytest.raises(SystemExit):
+                    main()
+
+    def test_main_invalid_jobs(self) -> None:
+        """Тест недопустимого количества процессов"""
+        with patch(
+            "sys.argv",
+            ["main.py", "--files", "a.csv", "--report", "student-performance"]
+            + ["--jobs", "0"],
+        ):
+            with patch("sys.stderr"):
+                with pytest.raises(SystemExit):
+                    main()
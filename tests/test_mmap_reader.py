@@ -0,0 +1,96 @@
+import csv
+import os
+import sys
+import tempfile
+from typing import List
+from unittest.mock import patch
+
+import pytest
+
+from utils.file_reader import iter_csv_files, read_csv_files, split_csv_file
+from utils.mmap_reader import iter_mmap_chunk, iter_mmap_files
+from utils.readers import ReadOptions, iter_chunk_rows, iter_rows
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+class TestMmapReader:
+    """Тесты чтения CSV файлов через mmap"""
+
+    def setup_method(self) -> None:
+        """Создание временного CSV файла с кавычками и пустыми строками"""
+        with tempfile.NamedTemporaryFile(
+            mode="w", suffix=".csv", delete=False, encoding="utf-8", newline=""
+        ) as f:
+            writer = csv.writer(f, lineterminator="\r\n")
+            writer.writerow(["student_name", "subject", "grade"])
+            for i in range(30):
+                name = f'Студент "{i}"\nвторая строка' if i % 7 == 0 else f"С{i}"
+                writer.writerow([name, "Математика, алгебра", str(i % 5)])
+                writer.writerow([])
+            writer.writerow(["Короткая строка"])
+            self.temp_file = f.name
+
+    def teardown_method(self) -> None:
+        """Удаление временного файла"""
+        os.unlink(self.temp_file)
+
+    def test_all_columns_match_csv_reader(self) -> None:
+        """Тест что без проекции строки совпадают с модулем csv"""
+        expected = read_csv_files([self.temp_file])
+
+        assert list(iter_mmap_files([self.temp_file])) == expected
+
+    def test_small_blocks_match_csv_reader(self) -> None:
+        """Тест разбора маленькими блоками с записями на границах блоков"""
+        expected = read_csv_files([self.temp_file])
+
+        with patch("utils.mmap_reader.BLOCK_SIZE", 16):
+            assert list(iter_mmap_files([self.temp_file])) == expected
+
+    def test_projection(self) -> None:
+        """Тест что отдаются только запрошенные колонки в виде кортежей"""
+        columns = ("grade", "student_name")
+        rows = list(iter_mmap_files([self.temp_file], columns, {"grade": int}))
+        expected = list(iter_csv_files([self.temp_file], columns, {"grade": int}))
+
+        assert rows[1] == (1, "С1")
+        assert len(rows) == 30
+        assert rows == expected
+
+    def test_chunks_match_whole_file(self) -> None:
+        """Тест чтения файла по диапазонам байтов"""
+        chunks = split_csv_file(self.temp_file, 64)
+        rows: List[dict] = []
+        for chunk in chunks:
+            rows.extend(iter_mmap_chunk(chunk))
+
+        assert len(chunks) > 1
+        assert rows == list(iter_mmap_files([self.temp_file]))
+
+    def test_empty_file(self) -> None:
+        """Тест чтения пустого файла"""
+        with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as f:
+            empty_file = f.name
+
+        try:
+            assert not list(iter_mmap_files([empty_file]))
+        finally:
+            os.unlink(empty_file)
+
+    def test_file_not_found(self) -> None:
+        """Тест обработки отсутствующего файла"""
+        with pytest.raises(FileNotFoundError, match="nonexistent.csv"):
+            list(iter_mmap_files(["nonexistent.csv"]))
+
+    def test_readers_dispatch(self) -> None:
+        """Тест выбора способа чтения"""
+        columns = ("student_name",)
+        chunk = split_csv_file(self.temp_file, 10**6)[0]
+
+        assert list(iter_rows([self.temp_file], ReadOptions("mmap"), columns)) == list(
+            iter_chunk_rows(chunk, "mmap", columns)
+        )
+        assert list(iter_rows([self.temp_file], ReadOptions(), columns)) == list(
+            iter_chunk_rows(chunk, "csv", columns)
+        )
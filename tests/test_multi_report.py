@@ -0,0 +1,246 @@
+import os
+import sys
+from typing import Any, Dict, Iterable, Iterator, Tuple
+from unittest.mock import patch
+
+import pytest
+
+from main import main
+from reports.multi_report import MultiReport
+from reports.report_factory import ReportFactory
+from reports.student_performance import StudentPerformanceReport
+from reports.student_performance_approx import ApproxStudentPerformanceReport
+from reports.teacher_performance import TeacherPerformanceReport
+from utils.cache import ParseCache, state_kind
+from utils.dataset import convert_csv
+from utils.file_reader import read_csv_files
+from utils.parallel import AggregateOptions, aggregate_files
+from utils.readers import ReadOptions, iter_rows
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+CSV_TEXT = (
+    "student_name,subject,grade\n"
+    "А,Математика,5\n"
+    "Б,Физика,x\n"
+    "Б,Физика,4\n"
+    "В\n"
+    "А,,3\n"
+)
+
+
+class SubjectCountReport(StudentPerformanceReport):
+    """Количество оценок по предметам, включая некорректные оценки"""
+
+    columns = ("subject",)
+    converters: dict = {}
+
+    def accumulate(
+        self, state: Dict[str, list], data: Iterable[Tuple[str]]
+    ) -> Dict[str, list]:
+        for (subject,) in data:
+            state.setdefault(subject, [0, 1])[0] += 1
+        return state
+
+    def finalize(self, state: Dict[str, list]) -> dict:
+        rows = [[subject, count] for subject, (count, _) in state.items()]
+        return {"headers": ["subject", "count"], "rows": rows}
+
+
+# Короткие строки без полей преподавателя и файл без этих колонок
+TEACHER_TEXT = (
+    "student_name,grade,subject,teacher_name\n"
+    "Г,5,Математика,Иванов\n"
+    "Д,4\n"
+    "Г,x,Физика,Петров\n"
+    "Е,3,Физика\n"
+)
+STUDENTS_TEXT = "student_name,grade\nЖ,5\nД,2\n"
+
+
+@pytest.fixture
+def csv_path(tmp_path: Any) -> str:
+    """CSV файл с некорректными строками"""
+    path = tmp_path / "grades.csv"
+    path.write_text(CSV_TEXT, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def subject_report() -> Iterator[None]:
+    """Временно зарегистрированный второй отчет"""
+    ReportFactory.register_report("subject-count", SubjectCountReport)
+    yield
+    del ReportFactory._reports["subject-count"]
+
+
+@pytest.fixture
+def teacher_paths(tmp_path: Any) -> list:
+    """Файлы, в которых не у всех строк есть колонки отчета по преподавателям"""
+    paths = [tmp_path / "teachers.csv", tmp_path / "students.csv"]
+    paths[0].write_text(TEACHER_TEXT, encoding="utf-8")
+    paths[1].write_text(STUDENTS_TEXT, encoding="utf-8")
+    return [str(path) for path in paths]
+
+
+def run_alone(report: Any, *paths: str, reader: str = "csv") -> dict:
+    """Результат отчета при отдельном проходе по файлам"""
+    state = report.accumulate(
+        report.initial_state(),
+        iter_rows(list(paths), ReadOptions(reader), report.columns, report.converters),
+    )
+    return report.finalize(state)
+
+
+class TestMultiReport:
+    """Тесты нескольких отчетов за один проход"""
+
+    def test_shared_projection(self, csv_path: str) -> None:
+        """Тест что отчеты с общими колонками читают кортежи один раз"""
+        reports = [
+            ("python", StudentPerformanceReport()),
+            ("approx", ApproxStudentPerformanceReport()),
+        ]
+        multi = MultiReport(reports)
+
+        result = run_alone(multi, csv_path)
+
+        assert multi.columns == ("student_name", "grade")
+        assert [part[1] for part in result["reports"]] == [
+            run_alone(StudentPerformanceReport(), csv_path),
+            run_alone(ApproxStudentPerformanceReport(), csv_path),
+        ]
+
+    def test_different_projections_match_separate_runs(self, csv_path: str) -> None:
+        """Тест что каждый отчет отбрасывает те же строки, что и отдельно"""
+        multi = MultiReport(
+            [("grades", StudentPerformanceReport()), ("subjects", SubjectCountReport())]
+        )
+
+        with patch("reports.multi_report.BATCH_SIZE", 2):
+            result = run_alone(multi, csv_path)
+
+        assert multi.columns == ("student_name", "grade", "subject")
+        assert result["reports"] == [
+            ["grades", run_alone(StudentPerformanceReport(), csv_path)],
+            ["subjects", run_alone(SubjectCountReport(), csv_path)],
+        ]
+        assert result["reports"][1][1]["rows"] == [
+            ["Математика", 1],
+            ["Физика", 2],
+            ["", 1],
+        ]
+
+    @pytest.mark.parametrize("reader", ["csv", "mmap", "dataset"])
+    def test_missing_fields_match_separate_runs(
+        self, teacher_paths: list, tmp_path: Any, reader: str
+    ) -> None:
+        """Тест что нехватка поля одного отчета не отбрасывает строку другого"""
+        if reader == "dataset":
+            for position, path in enumerate(list(teacher_paths)):
+                teacher_paths[position] = str(tmp_path / f"{position}.gcol")
+                convert_csv(path, teacher_paths[position])
+            reader = "csv"
+        reports = [
+            ("students", StudentPerformanceReport()),
+            ("teachers", TeacherPerformanceReport()),
+        ]
+
+        result = run_alone(MultiReport(reports), *teacher_paths, reader=reader)
+
+        assert result["reports"] == [
+            [name, run_alone(report, *teacher_paths, reader=reader)]
+            for name, report in reports
+        ]
+        assert len(result["reports"][0][1]["rows"]) == 4
+
+    def test_missing_fields_in_dict_rows(self, teacher_paths: list) -> None:
+        """Тест generate() по строкам-словарям с нехваткой полей"""
+        reports = [
+            ("students", StudentPerformanceReport()),
+            ("teachers", TeacherPerformanceReport()),
+        ]
+        rows = read_csv_files(teacher_paths)
+
+        assert MultiReport(reports).generate(rows)["reports"] == [
+            [name, report.generate(rows)] for name, report in reports
+        ]
+
+    def test_conflicting_converters_read_dicts(self, csv_path: str) -> None:
+        """Тест что при разных преобразованиях колонки отчеты читают словари"""
+        float_grades = StudentPerformanceReport()
+        float_grades.converters = {"grade": float}
+        multi = MultiReport(
+            [("grades", StudentPerformanceReport()), ("float", float_grades)]
+        )
+
+        result = run_alone(multi, csv_path)
+
+        assert multi.columns is None
+        assert result["reports"][0][1] == run_alone(
+            StudentPerformanceReport(), csv_path
+        )
+
+    def test_parallel_and_cache(self, csv_path: str, tmp_path: Any) -> None:
+        """Тест слияния состояний процессов и отдельного вида записи кэша"""
+        multi = MultiReport(
+            [("grades", StudentPerformanceReport()), ("subjects", SubjectCountReport())]
+        )
+        cache = ParseCache(str(tmp_path / "cache"))
+
+        _, state = aggregate_files(
+            multi, [csv_path, csv_path], AggregateOptions(jobs=2, cache=cache)
+        )
+        _, cached = aggregate_files(
+            multi, [csv_path, csv_path], AggregateOptions(cache=cache)
+        )
+
+        assert multi.finalize(state) == multi.finalize(cached)
+        assert multi.finalize(state)["reports"][0][1]["rows"] == [
+            [1, "А", 4.0],
+            [2, "Б", 4.0],
+        ]
+        assert state_kind(multi) != state_kind(StudentPerformanceReport())
+
+    def test_main_matches_separate_runs(self, teacher_paths: list, capsys: Any) -> None:
+        """Тест что вывод main с двумя отчетами совпадает с отдельными запусками"""
+        argv = ["main.py", "--files", *teacher_paths, "--output-format", "csv"]
+        outputs = []
+        for reports in (["student-performance"], ["teacher-performance"]):
+            with patch("sys.argv", argv + ["--report", *reports]):
+                main()
+            outputs.append(capsys.readouterr().out)
+
+        with patch(
+            "sys.argv",
+            argv + ["--report", "student-performance", "teacher-performance"],
+        ):
+            main()
+
+        assert capsys.readouterr().out == (
+            f"== student-performance ==\n{outputs[0]}"
+            f"\n== teacher-performance ==\n{outputs[1]}"
+        )
+
+    def test_main_writes_each_report(
+        self, csv_path: str, tmp_path: Any, subject_report: None, capsys: Any
+    ) -> None:
+        """Тест вывода нескольких отчетов в stdout и в отдельные файлы"""
+        argv = ["main.py", "--files", csv_path, "--output-format", "csv"]
+        argv += ["--report", "student-performance", "subject-count"]
+
+        with patch("sys.argv", argv):
+            main()
+        output = str(tmp_path / "{report}.csv")
+        with patch("sys.argv", argv + ["--output", output]):
+            main()
+
+        assert capsys.readouterr().out == (
+            "== student-performance ==\n"
+            ",student_name,grade\n1,А,4.0\n2,Б,4.0\n"
+            "\n== subject-count ==\n"
+            "subject,count\nМатематика,1\nФизика,2\n,1\n"
+        )
+        with open(tmp_path / "subject-count.csv", encoding="utf-8") as file:
+            assert file.read() == "subject,count\nМатематика,1\nФизика,2\n,1\n"
+        assert os.path.exists(tmp_path / "student-performance.csv")
@@ -0,0 +1,120 @@
+import csv
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List
+from unittest.mock import patch
+
+import pytest
+
+from reports.student_performance import StudentPerformanceReport
+from utils.file_reader import read_csv_files
+from utils.parallel import (
+    TASKS_PER_JOB,
+    AggregateOptions,
+    Task,
+    _submit_tasks,
+    aggregate_file,
+    aggregate_files,
+)
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+class TestParallel:
+    """Тесты параллельной агрегации файлов"""
+
+    def setup_method(self) -> None:
+        """Создание временных CSV файлов"""
+        self.files: List[str] = []
+        grades = [
+            [("Студент A", "5"), ("Студент B", "3")],
+            [],
+            [("Студент C", "4"), ("Студент A", "3"), ("Студент B", "x")],
+        ]
+        for file_grades in grades:
+            with tempfile.NamedTemporaryFile(
+                mode="w", suffix=".csv", delete=False, encoding="utf-8"
+            ) as f:
+                writer = csv.writer(f)
+                writer.writerow(["student_name", "grade"])
+                writer.writerows(file_grades)
+                self.files.append(f.name)
+
+    def teardown_method(self) -> None:
+        """Удаление временных файлов"""
+        for file in self.files:
+            os.unlink(file)
+
+    def test_aggregate_file(self) -> None:
+        """Тест агрегации одного файла"""
+        report = StudentPerformanceReport()
+
+        assert aggregate_file(report, self.files[0]) == (
+            True,
+            {"Студент A": [5, 1], "Студент B": [3, 1]},
+        )
+        assert aggregate_file(report, self.files[1]) == (False, {})
+
+    def test_aggregate_files_matches_serial(self) -> None:
+        """Тест что параллельный отчет совпадает с последовательным"""
+        report = StudentPerformanceReport()
+
+        has_rows, state = aggregate_files(report, self.files, AggregateOptions(jobs=2))
+
+        assert has_rows
+        assert report.finalize(state) == report.generate(read_csv_files(self.files))
+
+    def test_aggregate_files_without_rows(self) -> None:
+        """Тест параллельной агрегации файлов без строк"""
+        report = StudentPerformanceReport()
+
+        assert aggregate_files(report, [self.files[1]], AggregateOptions(jobs=2)) == (
+            False,
+            {},
+        )
+
+    def test_aggregate_files_missing_file(self) -> None:
+        """Тест отсутствующего файла при параллельной агрегации"""
+        report = StudentPerformanceReport()
+
+        with pytest.raises(FileNotFoundError, match="nonexistent.csv"):
+            aggregate_files(
+                report,
+                [self.files[0], "nonexistent.csv"],
+                AggregateOptions(jobs=2),
+            )
+
+    def test_aggregate_files_with_chunks_matches_serial(self) -> None:
+        """Тест что разбиение файлов на части не меняет отчет"""
+        report = StudentPerformanceReport()
+
+        has_rows, state = aggregate_files(
+            report, self.files, AggregateOptions(jobs=2, chunk_size=1)
+        )
+
+        assert has_rows
+        assert report.finalize(state) == report.generate(read_csv_files(self.files))
+
+    def test_tasks_submitted_within_window(self) -> None:
+        """Тест что в пуле одновременно не больше jobs * TASKS_PER_JOB задач"""
+        report = StudentPerformanceReport()
+        options = AggregateOptions(jobs=2)
+        tasks: List[Task] = self.files * 4
+        in_flight: List[int] = []
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            submit = executor.submit
+
+            def counted_submit(*args: Any) -> Any:
+                in_flight.append(1)
+                return submit(*args)
+
+            with patch.object(executor, "submit", counted_submit):
+                results = []
+                for result in _submit_tasks(executor, report, tasks, options):
+                    results.append(result)
+                    assert len(in_flight) - len(results) <= 2 * TASKS_PER_JOB
+
+        assert results == [aggregate_file(report, task) for task in tasks]
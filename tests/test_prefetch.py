@@ -0,0 +1,88 @@
+import csv
+import lzma
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+from utils.dataset import convert_csv
+from utils.file_reader import iter_csv_files
+from utils.prefetch import prefetch_files
+from utils.readers import ReadOptions, iter_rows
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+class TestPrefetch:
+    """Тесты упреждающего чтения файлов в пуле потоков"""
+
+    def setup_method(self) -> None:
+        """Создание нескольких CSV файлов"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.files = []
+        for index in range(5):
+            file_path = os.path.join(self.temp_dir, f"grades_{index}.csv")
+            with open(file_path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["student_name", "grade"])
+                writer.writerows([[f"Студент {index}", str(grade)] for grade in "5x43"])
+            self.files.append(file_path)
+
+    def teardown_method(self) -> None:
+        """Удаление временных файлов"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_files_in_order(self) -> None:
+        """Файлы отдаются в исходном порядке и читаются целиком"""
+        fetched = [
+            (file_path, stream.read())
+            for file_path, stream in prefetch_files(self.files, 3, block_size=7)
+            if stream is not None
+        ]
+
+        assert [file_path for file_path, _ in fetched] == self.files
+        for file_path, content in fetched:
+            with open(file_path, "rb") as f:
+                assert content == f.read()
+
+    def test_rows_match_sequential_reader(self) -> None:
+        """Строки совпадают с последовательным чтением, в том числе колоночных файлов"""
+        dataset_path = os.path.join(self.temp_dir, "grades.gcol")
+        convert_csv(self.files[0], dataset_path)
+        files = self.files + [dataset_path]
+        columns, converters = ("student_name", "grade"), {"grade": int}
+
+        assert list(
+            iter_rows(files, ReadOptions(io_threads=3), columns, converters)
+        ) == (list(iter_csv_files(files, columns, converters)))
+
+    def test_missing_file_after_previous_rows(self) -> None:
+        """Отсутствующий файл поднимает ошибку после строк предыдущих файлов"""
+        files = [self.files[0], os.path.join(self.temp_dir, "missing.csv")]
+        rows = iter_rows(files, ReadOptions(io_threads=2))
+
+        assert next(iter(rows))["student_name"] == "Студент 0"
+        with pytest.raises(FileNotFoundError, match="missing.csv не существует"):
+            list(rows)
+
+    def test_stop_before_end(self) -> None:
+        """Прерванное чтение останавливает потоки"""
+        fetched = prefetch_files(self.files * 10, 2, block_size=1, blocks=1)
+
+        file_path, _ = next(fetched)
+        fetched.close()
+
+        assert file_path == self.files[0]
+
+    def test_truncated_archive_raises(self) -> None:
+        """Ошибка распаковки обрезанного архива поднимается, а не зависает"""
+        file_path = os.path.join(self.temp_dir, "truncated.csv.xz")
+        with open(self.files[0], "rb") as f:
+            compressed = lzma.compress(f.read())
+        with open(file_path, "wb") as f:
+            f.write(compressed[: len(compressed) // 2])
+
+        with pytest.raises(EOFError):
+            list(iter_rows([self.files[1], file_path], ReadOptions(io_threads=2)))
@@ -0,0 +1,131 @@
+import csv
+import json
+import os
+import pstats
+import sys
+import tempfile
+
+from reports.student_performance import StudentPerformanceReport
+from utils import profiling
+from utils.parallel import AggregateOptions, aggregate_files
+from utils.profiling import Profiler, write_profile
+from utils.readers import ReadOptions, iter_rows
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+class TestProfiler:
+    """Тесты таймеров и счётчиков профиля"""
+
+    def teardown_method(self) -> None:
+        """Выключение профилирования после теста"""
+        profiling.disable()
+
+    def test_merge(self) -> None:
+        """Тест объединения профилей"""
+        first = Profiler()
+        first.count("rows_accepted", 3)
+        first.add_time("read", 1.0)
+        second = Profiler()
+        second.count("rows_dropped")
+        second.add_time("read", 0.5)
+
+        first.merge(second)
+
+        assert first.to_dict() == {
+            "timers": {"read": 1.5},
+            "counters": {"rows_accepted": 3, "rows_dropped": 1, "rows_read": 4},
+        }
+
+    def test_disabled_is_noop(self) -> None:
+        """Без профилирования строки не оборачиваются, счётчики не ведутся"""
+        rows = [("Студент A", 5)]
+
+        assert profiling.instrument_rows(rows) is rows
+        profiling.count("rows_dropped")
+        with profiling.stage("aggregate"):
+            pass
+        assert profiling.get_profiler() is None
+
+    def test_instrument_rows(self) -> None:
+        """Тест подсчёта строк и времени чтения"""
+        profiler = profiling.enable()
+
+        assert list(profiling.instrument_rows(iter([1, 2, 3]))) == [1, 2, 3]
+        with profiling.stage("finalize"):
+            pass
+
+        assert profiler.counters == {"rows_accepted": 3}
+        assert set(profiler.timers) == {"read", "finalize"}
+
+    def test_write_profile_json(self) -> None:
+        """Тест сохранения профиля в JSON файл"""
+        profiler = Profiler()
+        profiler.count("bytes_read", 10)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output = os.path.join(temp_dir, "profile.json")
+            write_profile(profiler, "json", output)
+            with open(output, "r", encoding="utf-8") as f:
+                assert json.load(f)["counters"] == {"bytes_read": 10}
+
+    def test_write_profile_cprofile(self) -> None:
+        """Тест сохранения статистики cProfile"""
+        import cProfile
+
+        stats = cProfile.Profile()
+        stats.enable()
+        sorted([3, 1, 2])
+        stats.disable()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output = os.path.join(temp_dir, "profile.pstats")
+            write_profile(Profiler(), "cprofile", output, stats)
+            assert "sorted" in str(pstats.Stats(output).get_stats_profile())
+
+
+class TestProfiledReading:
+    """Тесты счётчиков при чтении файлов"""
+
+    def setup_method(self) -> None:
+        """Создание CSV файла с некорректной оценкой"""
+        with tempfile.NamedTemporaryFile(
+            mode="w", suffix=".csv", delete=False, encoding="utf-8"
+        ) as f:
+            writer = csv.writer(f)
+            writer.writerow(["student_name", "grade"])
+            writer.writerows([["Студент A", "5"], ["Студент B", "x"], ["Студент C"]])
+            self.file_path = f.name
+
+    def teardown_method(self) -> None:
+        """Удаление файла и выключение профилирования"""
+        os.unlink(self.file_path)
+        profiling.disable()
+
+    def test_counts_dropped_rows(self) -> None:
+        """Тест подсчёта прочитанных и отброшенных строк"""
+        report = StudentPerformanceReport()
+        profiler = profiling.enable()
+
+        rows = list(
+            iter_rows([self.file_path], ReadOptions(), report.columns, {"grade": int})
+        )
+
+        counters = profiler.to_dict()["counters"]
+        assert len(rows) == 1
+        assert counters["rows_read"] == 3
+        assert counters["rows_dropped"] == 2
+        assert counters["bytes_read"] == os.path.getsize(self.file_path)
+
+    def test_merges_worker_profiles(self) -> None:
+        """Тест объединения профилей рабочих процессов"""
+        report = StudentPerformanceReport()
+        profiler = profiling.enable()
+
+        aggregate_files(
+            report, [self.file_path, self.file_path], AggregateOptions(jobs=2)
+        )
+
+        counters = profiler.to_dict()["counters"]
+        assert counters["rows_accepted"] == 2
+        assert counters["rows_dropped"] == 4
@@ -0,0 +1,78 @@
+import os
+import sys
+
+from utils.projection import INVALID, Lenient, make_projector, project_dicts
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+class TestProjection:
+    """Тесты проекции строк на колонки отчета"""
+
+    def test_make_projector(self) -> None:
+        """Тест проекции полей записи с преобразованием"""
+        project = make_projector(
+            ["name", "subject", "grade"], ["grade", "name"], {"grade": int}
+        )
+
+        assert project(["Иванов", "Математика", "5"]) == (5, "Иванов")
+        assert project(["Иванов", "Математика", "x"]) is None
+        assert project(["Иванов"]) is None
+
+    def test_make_projector_single_column(self) -> None:
+        """Тест проекции на одну колонку"""
+        project = make_projector(["name", "grade"], ["grade"], {"grade": int})
+
+        assert project(["Иванов", "4"]) == (4,)
+        assert project(["Иванов", None]) is None  # type: ignore
+
+    def test_make_projector_missing_column(self) -> None:
+        """Тест проекции на колонку, отсутствующую в заголовке"""
+        project = make_projector(["name"], ["grade"])
+
+        assert project(["Иванов"]) is None
+
+    def test_lenient_columns(self) -> None:
+        """Тест что ошибки нестрогой колонки дают INVALID, а не отбрасывают запись"""
+        converters = {"grade": int, "teacher": Lenient(), "room": Lenient(int)}
+        project = make_projector(
+            ["name", "grade", "teacher"],
+            ["name", "grade", "teacher", "room"],
+            converters,
+        )
+
+        assert project(["Иванов", "5", "Петров"]) == ("Иванов", 5, "Петров", INVALID)
+        assert project(["Иванов", "5"]) == ("Иванов", 5, INVALID, INVALID)
+        assert project(["Иванов"]) is None
+        assert list(
+            project_dicts(
+                [{"name": "Иванов", "grade": "5", "room": "x"}],
+                ["name", "teacher", "room"],
+                converters,
+            )
+        ) == [("Иванов", INVALID, INVALID)]
+
+    def test_project_dicts(self) -> None:
+        """Тест проекции строк-словарей"""
+        rows = [
+            {"name": "Иванов", "grade": "5"},
+            {"name": "Петров"},
+            {"name": "Сидоров", "grade": None},
+            {"name": "Смирнова", "grade": "3"},
+        ]
+
+        assert list(project_dicts(rows, ["name", "grade"], {"grade": int})) == [
+            ("Иванов", 5),
+            ("Смирнова", 3),
+        ]
+
+    def test_project_dicts_drops_missing_values_without_converter(self) -> None:
+        """Тест что отсутствующее значение отбрасывает строку, как make_projector"""
+        rows = [
+            {"name": "Иванов", "subject": "Физика"},
+            {"name": "Петров", "subject": None},
+        ]
+        project = make_projector(["name", "subject"], ["subject"])
+
+        assert list(project_dicts(rows, ["subject"])) == [("Физика",)]
+        assert project(["Петров"]) is None
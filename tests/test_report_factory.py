@@ -56,3 +56,45 @@ class TestReportFactory:
         assert hasattr(report, "print_report")
         assert callable(report.generate)
         assert callable(report.print_report)
+
+    def test_get_report_with_engine(self) -> None:
+        """Тест получения отчета с альтернативным движком"""
+
+        class FastReport(StudentPerformanceReport):
+            pass
+
+        ReportFactory.register_engine("student-performance", "fast", FastReport)
+
+        assert isinstance(
+            ReportFactory.get_report("student-performance", "fast"), FastReport
+        )
+        assert "fast" in ReportFactory.get_available_engines()
+        assert ReportFactory.get_available_engines()[0] == "python"
+
+    def test_get_report_unknown_engine(self) -> None:
+        """Тест запроса движка, который отчет не поддерживает"""
+        with pytest.raises(ValueError, match="не поддерживает движок unknown"):
+            ReportFactory.get_report("student-performance", "unknown")
+
+    def test_register_report_by_module_path(self) -> None:
+        """Тест что отчет по пути "модуль:Класс" импортируется при первом запросе"""
+        ReportFactory.register_report(
+            "lazy", "reports.student_performance:StudentPerformanceReport"
+        )
+
+        assert "lazy" in ReportFactory.get_available_reports()
+        assert isinstance(ReportFactory.get_report("lazy"), StudentPerformanceReport)
+        assert ReportFactory._reports["lazy"] is StudentPerformanceReport
+
+    def test_engine_requires_missing_module(self) -> None:
+        """Тест что движок без установленного модуля недоступен"""
+        ReportFactory.register_engine(
+            "student-performance",
+            "missing",
+            "reports.student_performance:StudentPerformanceReport",
+            requires="module_that_is_not_installed",
+        )
+
+        assert "missing" not in ReportFactory.get_available_engines()
+        with pytest.raises(ValueError, match="не поддерживает движок missing"):
+            ReportFactory.get_report("student-performance", "missing")
@@ -0,0 +1,296 @@
+import lzma
+import os
+import pickle
+import sys
+import threading
+import urllib.error
+import urllib.request
+from typing import Any, Iterator
+from unittest.mock import patch
+
+import pytest
+
+from server import main as server_main
+from utils.filters import parse_condition
+from utils.parallel import aggregate_files
+from utils.server import MemoryCache, ReportHTTPServer, ReportRequest, ReportService
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def write_csv(path: Any, rows: str, mtime_ns: int) -> None:
+    """Записывает CSV файл с заданным временем изменения"""
+    path.write_text("student_name,grade\n" + rows, encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+class TestMemoryCache:
+    """Тесты кэша разобранных файлов в памяти"""
+
+    def test_entry_valid_until_file_changes(self, tmp_path: Any) -> None:
+        """Тест что запись действительна до изменения файла"""
+        csv_path = tmp_path / "a.csv"
+        write_csv(csv_path, "А,5\n", 10**18)
+        cache = MemoryCache()
+        cache.store(str(csv_path), "kind", [1])
+
+        assert cache.load(str(csv_path), "kind") == [1]
+        assert cache.contains(str(csv_path), "kind")
+        assert cache.load(str(csv_path), "other") is None
+
+        write_csv(csv_path, "А,4\n", 2 * 10**18)
+        assert cache.load(str(csv_path), "kind") is None
+
+        os.unlink(csv_path)
+        assert cache.load(str(csv_path), "kind") is None
+
+    def test_evicts_least_recently_used(self, tmp_path: Any) -> None:
+        """Тест вытеснения давно не использованных записей сверх размера"""
+        paths = []
+        for name in "abc":
+            csv_path = tmp_path / f"{name}.csv"
+            write_csv(csv_path, "А,5\n", 10**18)
+            paths.append(str(csv_path))
+        payload = list(range(100))
+        cache = MemoryCache(max_bytes=2 * len(pickle.dumps(payload)))
+        cache.store(paths[0], "kind", payload)
+        cache.store(paths[1], "kind", payload)
+        assert cache.load(paths[0], "kind") == payload
+        cache.store(paths[2], "kind", payload)
+
+        assert set(cache.versions()) == {paths[0], paths[2]}
+        assert cache.total_bytes <= cache.max_bytes
+
+    def test_invalidate(self, tmp_path: Any) -> None:
+        """Тест удаления всех записей файла"""
+        csv_path = tmp_path / "a.csv"
+        write_csv(csv_path, "А,5\n", 10**18)
+        cache = MemoryCache()
+        cache.store(str(csv_path), "first", 1)
+        cache.store(str(csv_path), "second", 2)
+
+        cache.invalidate(str(csv_path))
+
+        assert cache.versions() == {}
+
+
+class TestReportService:
+    """Тесты сервиса отчетов с данными в памяти"""
+
+    def test_result_cache_and_refresh(self, tmp_path: Any) -> None:
+        """Тест что повторный отчет берется из кэша, а измененный файл разбирается"""
+        first, second = tmp_path / "a.csv", tmp_path / "b.csv"
+        write_csv(first, "А,5\nБ,3\n", 10**18)
+        write_csv(second, "Б,5\n", 10**18)
+        service = ReportService(data_root=str(tmp_path))
+        request = ReportRequest("student-performance", (str(tmp_path),))
+
+        with patch("utils.server.aggregate_files", wraps=aggregate_files) as mock:
+            _, result = service.run_report(request)
+            _, again = service.run_report(request._replace(files=("a.csv", "b.csv")))
+            assert again is result
+            assert mock.call_count == 1
+
+        assert result["rows"] == [[1, "А", 5.0], [2, "Б", 4.0]]
+
+        write_csv(second, "Б,1\n", 2 * 10**18)
+        assert service.refresh() == [str(second)]
+        assert str(first) in service.cache.versions()
+
+        _, result = service.run_report(request)
+        assert result["rows"] == [[1, "А", 5.0], [2, "Б", 2.0]]
+
+    def test_cached_result_does_not_wait(self, tmp_path: Any) -> None:
+        """Тест что готовый результат не ждет построения другого отчета"""
+        write_csv(tmp_path / "a.csv", "А,5\nБ,3\n", 10**18)
+        service = ReportService(data_root=str(tmp_path))
+        request = ReportRequest("student-performance", ("a.csv",))
+        service.run_report(request)
+        started, release = threading.Event(), threading.Event()
+
+        def slow_aggregate(*args: Any) -> Any:
+            started.set()
+            release.wait(10)
+            return aggregate_files(*args)
+
+        with patch("utils.server.aggregate_files", slow_aggregate):
+            slow = threading.Thread(
+                target=service.run_report, args=(request._replace(limit=1),)
+            )
+            slow.start()
+            assert started.wait(5)
+            cached = threading.Thread(target=service.run_report, args=(request,))
+            cached.start()
+            cached.join(2)
+            finished = not cached.is_alive()
+            release.set()
+            slow.join()
+
+        assert finished
+
+    def test_lru_size_and_page(self, tmp_path: Any) -> None:
+        """Тест вытеснения давних результатов и страницы отчета"""
+        csv_path = tmp_path / "a.csv"
+        write_csv(csv_path, "А,5\nБ,3\nВ,4\n", 10**18)
+        service = ReportService(result_cache_size=1, data_root=str(tmp_path))
+        request = ReportRequest("student-performance", (str(csv_path),))
+
+        _, result = service.run_report(request._replace(offset=1, limit=1))
+        service.run_report(request)
+
+        assert result["rows"] == [[2, "В", 4.0]]
+        assert len(service._results) == 1
+
+    def test_where(self, tmp_path: Any) -> None:
+        """Тест что условия входят в ключ кэша результатов"""
+        csv_path = tmp_path / "a.csv"
+        csv_path.write_text(
+            "student_name,subject,grade\nА,Математика,5\nБ,Физика,3\n",
+            encoding="utf-8",
+        )
+        service = ReportService(data_root=str(tmp_path))
+        request = ReportRequest("student-performance", (str(csv_path),))
+
+        _, everything = service.run_report(request)
+        _, physics = service.run_report(
+            request._replace(where=(parse_condition("subject=Физика"),))
+        )
+
+        assert everything["rows"] == [[1, "А", 5.0], [2, "Б", 3.0]]
+        assert physics["rows"] == [[1, "Б", 3.0]]
+
+    def test_missing_file(self, tmp_path: Any) -> None:
+        """Тест ошибки для отсутствующего файла"""
+        with pytest.raises(FileNotFoundError):
+            ReportService(data_root=str(tmp_path)).run_report(
+                ReportRequest("student-performance", ("none.csv",))
+            )
+
+    @pytest.mark.parametrize(
+        "spec",
+        [
+            "../outside.csv",
+            "{outside}",
+            "@{outside}",
+            "link.csv",
+            "*.csv",
+            "@manifest.txt",
+        ],
+    )
+    def test_files_outside_data_root(self, tmp_path: Any, spec: str) -> None:
+        """Тест что файлы вне каталога данных не читаются"""
+        data_root = tmp_path / "data"
+        data_root.mkdir()
+        outside = tmp_path / "outside.csv"
+        write_csv(outside, "А,5\n", 10**18)
+        (data_root / "link.csv").symlink_to(outside)
+        secret = tmp_path / "secret.txt"
+        secret.write_text("секретная строка\n", encoding="utf-8")
+        (data_root / "manifest.txt").symlink_to(secret)
+        service = ReportService(data_root=str(data_root))
+
+        with pytest.raises(PermissionError, match="вне каталога данных") as error:
+            service.run_report(
+                ReportRequest("student-performance", (spec.format(outside=outside),))
+            )
+
+        assert "секретная" not in str(error.value)
+
+
+@pytest.fixture
+def server_url(tmp_path: Any) -> Iterator[str]:
+    """HTTP сервер отчетов на свободном порту с каталогом данных tmp_path"""
+    server = ReportHTTPServer(("127.0.0.1", 0), ReportService(data_root=str(tmp_path)))
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    with patch("sys.stderr"):
+        yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestReportHTTPServer:
+    """Тесты HTTP сервера отчетов"""
+
+    def test_report(self, server_url: str, tmp_path: Any) -> None:
+        """Тест отчета в формате csv"""
+        csv_path = tmp_path / "a.csv"
+        write_csv(csv_path, "А,5\nБ,3\nА,4\n", 10**18)
+
+        with urllib.request.urlopen(
+            f"{server_url}/report?report=student-performance"
+            f"&files={csv_path}&format=csv&top=1"
+        ) as response:
+            assert response.headers["Content-Type"] == "text/csv; charset=utf-8"
+            assert response.read().decode("utf-8") == (",student_name,grade\n1,А,4.5\n")
+
+    @pytest.mark.parametrize(
+        "query, status",
+        [
+            ("report=unknown&files=a.csv", 400),
+            ("report=student-performance", 400),
+            ("report=student-performance&files=a.csv&top=x", 400),
+            ("report=student-performance&files=a.csv&format=xml", 400),
+            ("report=student-performance&files=a.csv&where=grade=5", 400),
+            ("report=student-performance&files=nonexistent.csv", 404),
+            ("report=student-performance&files=/etc/passwd", 403),
+        ],
+    )
+    def test_errors(self, server_url: str, query: str, status: int) -> None:
+        """Тест ответов на некорректные запросы"""
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{server_url}/report?{query}")
+
+        assert error.value.code == status
+
+    def test_truncated_archive(self, server_url: str, tmp_path: Any) -> None:
+        """Тест что обрезанный архив дает ответ 400, а не обрыв соединения"""
+        compressed = lzma.compress(b"student_name,grade\n" + b"A,5\n" * 1000)
+        (tmp_path / "a.csv.xz").write_bytes(compressed[: len(compressed) // 2])
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(
+                f"{server_url}/report?report=student-performance&files=a.csv.xz"
+            )
+
+        assert error.value.code == 400
+        assert error.value.read().decode("utf-8").startswith("Ошибка в данных:")
+
+    def test_unknown_path(self, server_url: str) -> None:
+        """Тест неизвестного адреса"""
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{server_url}/other")
+
+        assert error.value.code == 404
+
+
+class TestServerMain:
+    """Тесты запуска сервера из командной строки"""
+
+    def test_unix_socket_lifecycle(self, tmp_path: Any) -> None:
+        """Тест что сокет создается при запуске и удаляется при остановке"""
+        socket_path = str(tmp_path / "reports.sock")
+
+        def stop(server: Any) -> None:
+            assert os.path.exists(socket_path)
+            raise KeyboardInterrupt
+
+        with patch(
+            "sys.argv", ["server.py", "--socket", socket_path, "--watch-interval", "1"]
+        ):
+            with patch("utils.server.ReportUnixServer.serve_forever", stop):
+                with patch("sys.stderr"):
+                    server_main()
+
+        assert not os.path.exists(socket_path)
+
+    def test_port_in_use(self) -> None:
+        """Тест ошибки, если порт занят"""
+        server = ReportHTTPServer(("127.0.0.1", 0), ReportService())
+        argv = ["server.py", "--port", str(server.server_port)]
+        try:
+            with patch("sys.argv", argv), patch("sys.stderr"):
+                with pytest.raises(SystemExit):
+                    server_main()
+        finally:
+            server.server_close()
@@ -0,0 +1,186 @@
+import math
+import os
+import pickle
+import random
+import sys
+from collections import Counter
+
+import pytest
+
+from utils.sketches import BloomFilter, HyperLogLog, QuantileSketch, SpaceSaving
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def zipf_keys(count: int, keys: int, seed: int = 1) -> list:
+    """Ключи с частотами по закону Ципфа"""
+    generator = random.Random(seed)
+    weights = [1 / rank for rank in range(1, keys + 1)]
+    return generator.choices(range(keys), weights, k=count)
+
+
+class TestSpaceSaving:
+    """Тесты сводки самых частых ключей"""
+
+    def test_exact_while_keys_fit(self) -> None:
+        """Тест что без вытеснения суммы и количества точные"""
+        summary = SpaceSaving(capacity=2)
+        for key, value in [("a", 5), ("b", 3), ("a", 4), ("c", 2)]:
+            summary.add(key, value)
+
+        assert summary.entries == {"a": [9, 2, 0], "b": [3, 1, 0], "c": [2, 1, 0]}
+        assert summary.threshold == 0
+
+    def test_error_bounds_true_counts(self) -> None:
+        """Тест что истинное количество между учтенным и учтенным + ошибка"""
+        keys = zipf_keys(20000, 2000)
+        summary = SpaceSaving(capacity=50)
+        for key in keys:
+            summary.add(key, 1)
+
+        true_counts = Counter(keys)
+        assert len(summary.entries) <= 100
+        assert summary.threshold <= len(keys) / 50
+        for key, (_, count, error) in summary.entries.items():
+            assert count <= true_counts[key] <= count + error
+        # Ключи чаще threshold в таблице обязательно есть
+        for key, count in true_counts.items():
+            if count > summary.threshold:
+                assert key in summary.entries
+
+    def test_merge_keeps_bounds(self) -> None:
+        """Тест что после слияния границы количеств сохраняются"""
+        keys = zipf_keys(20000, 2000, seed=2)
+        left, right = SpaceSaving(capacity=50), SpaceSaving(capacity=50)
+        for key in keys[:12000]:
+            left.add(key, 1)
+        for key in keys[12000:]:
+            right.add(key, 1)
+
+        merged = pickle.loads(pickle.dumps(left)).merge(right)
+
+        true_counts = Counter(keys)
+        assert len(merged.entries) <= 100
+        for key, (_, count, error) in merged.entries.items():
+            assert count <= true_counts[key] <= count + error
+        for key, count in true_counts.items():
+            if count > merged.threshold:
+                assert key in merged.entries
+
+
+class TestHyperLogLog:
+    """Тесты оценки числа различных значений"""
+
+    def test_precision_for_error(self) -> None:
+        """Тест выбора точности по ошибке"""
+        assert HyperLogLog.precision_for(0.01) == 14
+        assert HyperLogLog(14).error <= 0.01
+        assert HyperLogLog.precision_for(0.9) == 4
+
+    def test_invalid_precision(self) -> None:
+        """Тест недопустимой точности"""
+        with pytest.raises(ValueError):
+            HyperLogLog(2)
+
+    @pytest.mark.parametrize("distinct", [10, 1000, 50000])
+    def test_estimate(self, distinct: int) -> None:
+        """Тест что оценка в пределах трех стандартных ошибок"""
+        sketch = HyperLogLog(12)
+        for value in range(distinct):
+            sketch.add(f"Студент {value}")
+            sketch.add(f"Студент {value}")
+
+        assert abs(sketch.estimate() - distinct) <= 3 * sketch.error * distinct
+
+    def test_merge_with_different_precision(self) -> None:
+        """Тест слияния сводок разной точности"""
+        left, right = HyperLogLog(12), HyperLogLog(10)
+        for value in range(20000):
+            left.add(value)
+        for value in range(10000, 30000):
+            right.add(value)
+
+        folded = HyperLogLog(12)
+        for value in range(20000):
+            folded.add(value)
+        expected = HyperLogLog(10)
+        for value in range(30000):
+            expected.add(value)
+
+        assert left.merge(right).registers == expected.registers
+        assert folded.folded(10) == HyperLogLog(10).merge(folded).registers
+
+
+class TestQuantileSketch:
+    """Тесты квантилей с относительной ошибкой"""
+
+    def test_relative_error(self) -> None:
+        """Тест что квантили отличаются от точных не больше чем на error"""
+        generator = random.Random(3)
+        values = [generator.lognormvariate(0, 2) for _ in range(10000)]
+        values += [0.0, -1.5, -20.0]
+        sketch = QuantileSketch(0.01)
+        for value in values:
+            sketch.add(value)
+
+        ordered = sorted(values)
+        for level in (0.0, 0.1, 0.5, 0.9, 0.99, 1.0):
+            exact = ordered[int(level * (len(values) - 1))]
+            assert abs(sketch.quantile(level) - exact) <= 0.01 * abs(exact) + 1e-12
+
+    def test_merge(self) -> None:
+        """Тест слияния сводок с одинаковой и разной ошибкой"""
+        left, right = QuantileSketch(0.01), QuantileSketch(0.01)
+        left.add(1, 3)
+        right.add(5, 2)
+        other = QuantileSketch(0.05)
+        other.add(10)
+
+        left.merge(right).merge(other)
+
+        assert left.count == 6
+        assert (left.min, left.max) == (1, 10)
+        assert left.quantile(0.5) == pytest.approx(1, rel=0.01)
+        assert left.quantile(0.8) == pytest.approx(5, rel=0.01)
+
+    def test_empty_and_invalid(self) -> None:
+        """Тест пустой сводки и недопустимой ошибки"""
+        assert math.isnan(QuantileSketch(0.01).quantile(0.5))
+        with pytest.raises(ValueError):
+            QuantileSketch(1)
+
+
+class TestBloomFilter:
+    """Тесты фильтра Блума"""
+
+    def test_no_false_negatives(self) -> None:
+        """Тест что добавленные значения всегда находятся"""
+        bloom = BloomFilter.for_capacity(1000, 0.01)
+        for value in range(1000):
+            bloom.add(f"Студент {value}")
+
+        assert all(f"Студент {value}" in bloom for value in range(1000))
+
+    def test_false_positive_rate(self) -> None:
+        """Тест что доля ложных срабатываний близка к заданной"""
+        bloom = BloomFilter.for_capacity(1000, 0.01)
+        for value in range(1000):
+            bloom.add(value)
+
+        false_positives = sum(value in bloom for value in range(1000, 21000))
+        assert false_positives / 20000 < 0.02
+
+    def test_restore_from_bits(self) -> None:
+        """Тест восстановления фильтра по сохранённым битам"""
+        bloom = BloomFilter.for_capacity(10, 0.01)
+        bloom.add("a")
+
+        restored = BloomFilter(bloom.size, bloom.hashes, bytes(bloom.bits))
+
+        assert "a" in restored
+        assert "b" not in BloomFilter(bloom.size, bloom.hashes)
+
+    def test_invalid_size(self) -> None:
+        """Тест недопустимого размера"""
+        with pytest.raises(ValueError):
+            BloomFilter(0, 1)
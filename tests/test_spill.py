@@ -0,0 +1,235 @@
+import csv
+import gc
+import os
+import pickle
+import random
+import sys
+from typing import Any, List, Optional
+from unittest.mock import patch
+
+import pytest
+
+from main import main
+from reports.group_by import GroupByReport, Metric
+from reports.student_performance import StudentPerformanceReport
+from reports.teacher_performance import TeacherPerformanceReport
+from utils import profiling
+from utils.parallel import AggregateOptions, accumulate_rows, aggregate_files
+from utils.spill import GroupSpill, read_run, write_run
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+HEADER = ["student_name", "subject", "grade", "teacher_name"]
+
+
+class SubjectOrderReport(GroupByReport):
+    """Наименьшие оценки по предметам в порядке первого появления"""
+
+    group_by = ("subject",)
+    metrics = (Metric("min", "min", "grade"), Metric("grades", "count"))
+    converters = {"grade": int}
+
+
+class LowestFirstReport(StudentPerformanceReport):
+    """Рейтинг студентов по возрастанию средней оценки"""
+
+    descending = False
+
+
+def random_rows(count: int) -> List[List[str]]:
+    """Строки со многими студентами, повторами и некорректными оценками"""
+    rng = random.Random(7)
+    return [
+        [
+            f"Студент {rng.randrange(count // 3)}",
+            f"Предмет {rng.randrange(5)}",
+            str(rng.randrange(1, 6)) if rng.random() > 0.05 else "x",
+            f"Преподаватель {rng.randrange(3)}",
+        ]
+        for _ in range(count)
+    ]
+
+
+def project(report: GroupByReport, rows: List[List[str]]) -> Any:
+    """Строки файла в виде, который отчет получает от читателя"""
+    return report.project(dict(zip(HEADER, row)) for row in rows)
+
+
+def finalize(report: GroupByReport, state: Any) -> dict:
+    """Итог отчета со строками в виде списка"""
+    result = report.finalize(state)
+    return {**result, "rows": list(result["rows"])}
+
+
+class TestGroupSpill:
+    """Тесты сброса таблицы групп на диск"""
+
+    def teardown_method(self) -> None:
+        """Выключение профилирования"""
+        profiling.disable()
+
+    def test_run_roundtrip(self, tmp_path: Any) -> None:
+        """Записи файла читаются в том же порядке"""
+        path = str(tmp_path / "run")
+        records = [(f"ключ {i}", i, [i, {i: 1}]) for i in range(10000)]
+        write_run(path, iter(records))
+
+        assert list(read_run(path)) == records
+
+    @pytest.mark.parametrize(
+        "report_class",
+        [
+            StudentPerformanceReport,
+            TeacherPerformanceReport,
+            SubjectOrderReport,
+            LowestFirstReport,
+        ],
+    )
+    @pytest.mark.parametrize("offset, limit", [(0, None), (3, 5), (0, 1000)])
+    def test_matches_in_memory(
+        self, report_class: type, offset: int, limit: Optional[int]
+    ) -> None:
+        """Отчет со сбросами на диск совпадает с отчетом в памяти"""
+        rows = random_rows(3000)
+        report = report_class()
+        report.offset, report.limit = offset, limit
+        expected = report.generate(dict(zip(HEADER, row)) for row in rows)
+
+        profiler = profiling.enable()
+        with patch("utils.parallel.SPILL_CHECK_ROWS", 100):
+            has_rows, state = accumulate_rows(report, project(report, rows), 1)
+
+        assert has_rows
+        assert isinstance(state, GroupSpill)
+        assert finalize(report, state) == expected
+        assert profiler.counters["spill_runs"] > 10
+
+    def test_temporary_files_removed(self) -> None:
+        """Временные файлы удаляются после вывода строк"""
+        report = StudentPerformanceReport()
+        with patch("utils.parallel.SPILL_CHECK_ROWS", 100):
+            _, state = accumulate_rows(report, project(report, random_rows(500)), 1)
+        directory = state._files.directory
+
+        assert os.listdir(directory)
+        list(report.finalize(state)["rows"])
+        assert not os.path.exists(directory)
+
+    def test_no_spill_under_limit(self) -> None:
+        """Пока таблица помещается в предел, состояние - обычный словарь"""
+        report = StudentPerformanceReport()
+        has_rows, state = accumulate_rows(
+            report, project(report, random_rows(500)), 1024 * 1024
+        )
+
+        assert has_rows
+        assert isinstance(state, dict)
+
+    def test_aggregate_files(self, tmp_path: Any) -> None:
+        """Состояния файлов объединяются со сбросом общей таблицы"""
+        rows = random_rows(1200)
+        files = []
+        for number in range(4):
+            path = str(tmp_path / f"{number}.csv")
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(HEADER)
+                writer.writerows(rows[number * 300 : (number + 1) * 300])
+            files.append(path)
+        report = TeacherPerformanceReport()
+
+        has_rows, state = aggregate_files(
+            report, files, AggregateOptions(memory_limit=1)
+        )
+
+        assert has_rows
+        assert isinstance(state, GroupSpill)
+        assert finalize(report, state) == finalize(
+            report, aggregate_files(report, files)[1]
+        )
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_tasks_spill(self, tmp_path: Any, monkeypatch: Any, jobs: int) -> None:
+        """Задачи сбрасывают свои таблицы, и их файлы удаляются после вывода"""
+        path = str(tmp_path / "grades.csv")
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(HEADER)
+            writer.writerows(random_rows(3000))
+        spill_dir = tmp_path / "spill"
+        spill_dir.mkdir()
+        monkeypatch.setattr("tempfile.tempdir", str(spill_dir))
+        report = LowestFirstReport()
+        expected = finalize(report, aggregate_files(report, [path])[1])
+
+        with patch("utils.parallel.SPILL_CHECK_ROWS", 100):
+            has_rows, state = aggregate_files(
+                report,
+                [path],
+                AggregateOptions(jobs=jobs, chunk_size=4096, memory_limit=4096),
+            )
+
+        assert has_rows
+        assert isinstance(state, GroupSpill)
+        assert finalize(report, state) == expected
+        assert not os.listdir(spill_dir)
+
+    def test_pickled_spill(self) -> None:
+        """Переданная таблица читается по порядку и удаляет каталог получатель"""
+        report = StudentPerformanceReport()
+        with patch("utils.parallel.SPILL_CHECK_ROWS", 100):
+            _, state = accumulate_rows(report, project(report, random_rows(500)), 1)
+        state.table["Новый студент"] = [5, 1]
+        records = list(state.records())
+
+        copy = pickle.loads(pickle.dumps(state))
+        del state
+        gc.collect()
+
+        assert os.path.isdir(copy._files.directory)
+        assert list(copy.records()) == records
+        assert [ordinal for _, ordinal, _ in records] == sorted(
+            ordinal for _, ordinal, _ in records
+        )
+        assert records[-1] == ("Новый студент", copy.spilled, [5, 1])
+        copy.close()
+
+    def test_main_memory_limit(self, tmp_path: Any, capsys: Any) -> None:
+        """--memory-limit не меняет вывод отчета"""
+        path = str(tmp_path / "grades.csv")
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(HEADER)
+            writer.writerows(random_rows(300))
+        arguments = ["main.py", "--files", path, "--report", "student-performance"]
+
+        with patch("sys.argv", arguments + ["--output-format", "csv"]):
+            main()
+        expected = capsys.readouterr().out
+        with patch("utils.spill.DICT_ENTRY_BYTES", 1024 * 1024):
+            with patch("utils.parallel.SPILL_CHECK_ROWS", 50):
+                with patch(
+                    "sys.argv",
+                    arguments + ["--output-format", "csv", "--memory-limit", "1"],
+                ):
+                    main()
+
+        assert capsys.readouterr().out == expected
+
+    def test_main_memory_limit_requires_group_by(self) -> None:
+        """--memory-limit с отчетом другого вида - ошибка аргументов"""
+        arguments = [
+            "main.py",
+            "--files",
+            "a.csv",
+            "--report",
+            "student-performance",
+            "--engine",
+            "approx",
+            "--memory-limit",
+            "1",
+        ]
+        with patch("sys.argv", arguments):
+            with patch("sys.stderr"):
+                with pytest.raises(SystemExit):
+                    main()
@@ -101,3 +101,49 @@ class TestStudentPerformanceReport:
         assert isinstance(result["rows"], list)
         assert len(result["headers"]) == 3
         assert result["headers"] == ["", "student_name", "grade"]
+
+    def test_generate_consumes_iterator(self) -> None:
+        """Тест формирования отчета по генератору строк"""
+        report = StudentPerformanceReport()
+        data = (
+            {"student_name": f"Студент {i % 2}", "grade": str(3 + i % 2)}
+            for i in range(4)
+        )
+
+        result = report.generate(data)
+
+        assert result["rows"] == [[1, "Студент 1", 4.0], [2, "Студент 0", 3.0]]
+
+    def test_merge_partial_states_matches_generate(self) -> None:
+        """Тест что слияние частичных состояний дает тот же отчет"""
+        report = StudentPerformanceReport()
+        data = [
+            {"student_name": "Студент A", "grade": "5"},
+            {"student_name": "Студент B", "grade": "3"},
+            {"student_name": "Студент A", "grade": "4"},
+            {"student_name": "Студент C", "grade": "4"},
+            {"student_name": "Студент B", "grade": "bad"},
+        ]
+
+        left = report.accumulate(report.initial_state(), report.project(data[:2]))
+        right = report.accumulate(report.initial_state(), report.project(data[2:]))
+
+        assert left == {"Студент A": [5, 1], "Студент B": [3, 1]}
+        assert report.finalize(report.merge(left, right)) == report.generate(data)
+
+    def test_top_and_page_match_full_ranking(self) -> None:
+        """Первые K строк и страница совпадают с полным рейтингом, включая ничьи"""
+        state = {
+            f"Студент {i}": [grade, 1] for i, grade in enumerate([4, 5, 4, 3, 5, 4, 4])
+        }
+        full = StudentPerformanceReport().finalize(dict(state))["rows"]
+
+        report = StudentPerformanceReport()
+        report.limit = 3
+        assert report.finalize(dict(state))["rows"] == full[:3]
+
+        report.offset = 2
+        assert report.finalize(dict(state))["rows"] == full[2:5]
+
+        report.limit = None
+        assert report.finalize(dict(state))["rows"] == full[2:]
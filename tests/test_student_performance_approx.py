@@ -0,0 +1,122 @@
+import os
+import pickle
+import sys
+from typing import Any
+
+from reports.student_performance import StudentPerformanceReport
+from reports.student_performance_approx import (
+    ApproxStudentPerformanceReport,
+    _average_error,
+)
+from utils.cache import ParseCache
+from utils.parallel import AggregateOptions, aggregate_files
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def grade_rows(count: int, students: int) -> list:
+    """Оценки, где у студентов с меньшим номером больше оценок"""
+    return [(f"Студент {i % (i % students + 1)}", i % 5 + 1) for i in range(count)]
+
+
+class TestApproxStudentPerformanceReport:
+    """Тесты приближенного отчета об успеваемости"""
+
+    def test_matches_exact_report_while_students_fit(self) -> None:
+        """Тест что без вытеснения рейтинг совпадает с точным, ошибка 0"""
+        data = [
+            {"student_name": f"Студент {i % 7}", "grade": str(i % 5 + 1)}
+            for i in range(100)
+        ]
+        data.append({"student_name": "Студент 1", "grade": "invalid"})
+
+        result = ApproxStudentPerformanceReport().generate(data)
+        expected = StudentPerformanceReport().generate(data)
+
+        assert result["headers"] == ["", "student_name", "grade", "error"]
+        assert [row[:3] for row in result["rows"]] == expected["rows"]
+        assert all(row[3] == 0 for row in result["rows"])
+        assert dict(result["summary"])["Оценок"] == "100"
+        assert dict(result["summary"])["Студентов"].startswith("≈7 ")
+
+    def test_error_bound_covers_true_average(self) -> None:
+        """Тест что точная средняя в пределах указанной ошибки"""
+        rows = grade_rows(20000, 500)
+        report = ApproxStudentPerformanceReport()
+        report.sketch_error = 0.05
+
+        state = report.accumulate(report.initial_state(), rows)
+        result = report.finalize(state)
+
+        exact = {
+            row[1]: row[2]
+            for row in StudentPerformanceReport().finalize(
+                StudentPerformanceReport().accumulate({}, rows)
+            )["rows"]
+        }
+        assert 0 < len(result["rows"]) <= 40
+        for _, student, average, error in result["rows"]:
+            assert abs(exact[student] - average) <= error + 0.01
+
+    def test_merge_partial_states(self) -> None:
+        """Тест что частичные состояния объединяются после передачи в процесс"""
+        report = ApproxStudentPerformanceReport()
+        left = report.accumulate(report.initial_state(), [("А", 5), ("Б", 3)])
+        right = report.accumulate(report.initial_state(), [("Б", 4), ("В", 2)])
+
+        state = report.merge(pickle.loads(pickle.dumps(left)), right)
+
+        assert state.ranking.entries == {
+            "А": [5, 1, 0],
+            "Б": [7, 2, 0],
+            "В": [2, 1, 0],
+        }
+        assert state.students.estimate() == 3
+        assert state.grades.count == 4
+
+    def test_top_enlarges_capacity(self) -> None:
+        """Тест что таблица вмещает запрошенную страницу рейтинга"""
+        report = ApproxStudentPerformanceReport()
+        report.sketch_error = 0.5
+        report.offset, report.limit = 5, 10
+
+        result = report.finalize(
+            report.accumulate(report.initial_state(), grade_rows(1000, 30))
+        )
+
+        assert report.capacity() == 15
+        assert [row[0] for row in result["rows"]] == list(range(6, 16))
+
+    def test_cached_state_depends_on_parameters(self, tmp_path: Any) -> None:
+        """Тест что состояние из кэша не берется при другой ошибке или странице"""
+        csv_path = tmp_path / "grades.csv"
+        lines = [f"Студент {i},{i % 5 + 1}" for i in range(50)]
+        csv_path.write_text("student_name,grade\n" + "\n".join(lines) + "\n")
+        options = AggregateOptions(cache=ParseCache(str(tmp_path / "cache")))
+
+        def ranking(sketch_error: float, limit: Any = None) -> int:
+            report = ApproxStudentPerformanceReport()
+            report.sketch_error, report.limit = sketch_error, limit
+            _, state = aggregate_files(report, [str(csv_path)], options)
+            return len(report.finalize(state)["rows"])
+
+        assert ranking(0.2) <= 10
+        assert ranking(0.01) == 50
+        assert ranking(0.2, limit=30) == 30
+        assert ranking(0.2) <= 10
+
+    def test_average_error(self) -> None:
+        """Тест границы ошибки средней"""
+        assert _average_error(4.0, 10, 0, 1, 5) == 0.0
+        assert _average_error(4.0, 3, 1, 1, 5) == 0.75
+
+    def test_print_report_summary(self, capsys: Any) -> None:
+        """Тест вывода итогов сводок под таблицей"""
+        report = ApproxStudentPerformanceReport()
+        report.print_report(
+            report.finalize(report.accumulate(report.initial_state(), [("А", 5)]))
+        )
+
+        output = capsys.readouterr().out
+        assert "|  1 |       А        |       5 |       0 |" in output
+        assert "Медиана оценки" in output
@@ -0,0 +1,63 @@
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from reports.student_performance import StudentPerformanceReport
+
+pytest.importorskip("numpy")
+
+from reports.group_by_columnar import parse_grades
+from reports.student_performance_columnar import ColumnarStudentPerformanceReport
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+class TestColumnarStudentPerformanceReport:
+    """Тесты отчета успеваемости на массивах NumPy"""
+
+    def test_parse_grades_masks_invalid_values(self) -> None:
+        """Тест что некорректные оценки помечаются маской"""
+        values, valid = parse_grades(["5", " 4", "+3", "плохо", "", "٣"])
+
+        assert valid.tolist() == [True, True, True, False, False, True]
+        assert values[valid].tolist() == [5, 4, 3, 3]
+
+    def test_generate_matches_python_engine(self) -> None:
+        """Тест что рейтинг, округление и порядок совпадают с обычным отчетом"""
+        data = [
+            {"student_name": f"Студент {i % 7}", "grade": str(i % 5 + 1)}
+            for i in range(100)
+        ]
+        data.append({"student_name": "Студент 1", "grade": "invalid"})
+        data.append({"student_name": "Без оценок", "grade": "x"})
+        data.append({"student_name": "Студент 8"})
+
+        expected = StudentPerformanceReport().generate(data)
+
+        with patch("reports.group_by_columnar.BATCH_SIZE", 16):
+            result = ColumnarStudentPerformanceReport().generate(data)
+
+        assert result == expected
+
+    def test_merge_partial_states(self) -> None:
+        """Тест слияния частичных состояний разных пачек"""
+        report = ColumnarStudentPerformanceReport()
+        left = report.accumulate(report.initial_state(), [("A", "5"), ("B", "3")])
+        right = report.accumulate(report.initial_state(), [("B", "4"), ("C", "x")])
+
+        assert report.merge(left, right) == {"A": [5, 1], "B": [7, 2]}
+
+    def test_tie_order_ignores_invalid_first_grade(self) -> None:
+        """Тест что порядок равных оценок задает первая корректная оценка"""
+        data = [
+            {"student_name": "Б", "grade": "x"},
+            {"student_name": "А", "grade": "5"},
+            {"student_name": "Б", "grade": "5"},
+        ]
+
+        result = ColumnarStudentPerformanceReport().generate(data)
+
+        assert result == StudentPerformanceReport().generate(data)
+        assert [row[1] for row in result["rows"]] == ["А", "Б"]
@@ -0,0 +1,91 @@
+import json
+import os
+import sys
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from utils import writers
+from utils.writers import open_output, write_csv, write_jsonl, write_text, write_tsv
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+HEADERS = ["", "student_name", "grade"]
+ROWS = [[1, "Семенова Елена", 5.0], [2, "Власова, Алина", 4.5]]
+
+
+class TestWriters:
+    """Тесты потоковых форматов вывода"""
+
+    def test_write_csv(self) -> None:
+        """Тест вывода в CSV с экранированием запятых"""
+        stream = StringIO()
+
+        write_csv(HEADERS, iter(ROWS), stream)
+
+        assert stream.getvalue() == (
+            ',student_name,grade\n1,Семенова Елена,5.0\n2,"Власова, Алина",4.5\n'
+        )
+
+    def test_write_tsv(self) -> None:
+        """Тест вывода в TSV"""
+        stream = StringIO()
+
+        write_tsv(HEADERS, ROWS, stream)
+
+        assert stream.getvalue().splitlines()[2] == "2\tВласова, Алина\t4.5"
+
+    def test_write_jsonl(self) -> None:
+        """Тест вывода в JSON Lines"""
+        stream = StringIO()
+
+        write_jsonl(HEADERS, ROWS, stream)
+
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert lines[0] == {"": 1, "student_name": "Семенова Елена", "grade": 5.0}
+        assert len(lines) == 2
+
+    def test_write_text(self) -> None:
+        """Тест таблицы с колонками фиксированной ширины"""
+        stream = StringIO()
+
+        write_text(HEADERS, ROWS, stream)
+
+        assert stream.getvalue().splitlines() == [
+            "   student_name    grade",
+            "-  --------------  -----",
+            "1  Семенова Елена    5.0",
+            "2  Власова, Алина    4.5",
+        ]
+
+    def test_write_text_pages(self) -> None:
+        """Ширина колонок растёт на следующих страницах"""
+        stream = StringIO()
+        rows = [[1, "A", 5], [2, "Длинное имя", 4]]
+
+        with patch.object(writers, "PAGE_SIZE", 1):
+            write_text(["", "student_name", "grade"], rows, stream)
+
+        lines = stream.getvalue().splitlines()
+        assert lines[2] == "1  A                 5"
+        assert lines[3] == "2  Длинное имя       4"
+
+    def test_write_text_without_rows(self) -> None:
+        """Без строк выводится только заголовок"""
+        stream = StringIO()
+
+        write_text(HEADERS, [], stream)
+
+        assert stream.getvalue() == "  student_name  grade\n"
+
+    def test_open_output(self) -> None:
+        """Тест вывода в файл и в stdout"""
+        with open_output() as stream:
+            assert stream is sys.stdout
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, "report.csv")
+            with open_output(file_path) as stream:
+                write_csv(HEADERS, ROWS, stream)
+            with open(file_path, "r", encoding="utf-8") as f:
+                assert f.readline() == ",student_name,grade\n"
@@ -0,0 +1,41 @@
+import argparse
+
+from utils.filters import Condition, parse_condition
+
+MEGABYTE = 1024 * 1024
+
+
+def positive_int(value: str) -> int:
+    """Проверяет, что аргумент командной строки - натуральное число"""
+
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"ожидается число >= 1, получено {value}")
+    return number
+
+
+def non_negative_int(value: str) -> int:
+    """Проверяет, что аргумент командной строки - целое число не меньше нуля"""
+
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"ожидается число >= 0, получено {value}")
+    return number
+
+
+def fraction(value: str) -> float:
+    """Проверяет, что аргумент командной строки - число строго между 0 и 1"""
+
+    number = float(value)
+    if not 0 < number < 1:
+        raise argparse.ArgumentTypeError(f"ожидается число от 0 до 1, получено {value}")
+    return number
+
+
+def condition(value: str) -> Condition:
+    """Разбирает условие --where"""
+
+    try:
+        return parse_condition(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
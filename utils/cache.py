@@ -0,0 +1,176 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import IO, Any, Optional, Protocol
+
+from reports.base_report import BaseReport
+from utils.filters import describe_where
+
+# Размер кэша по умолчанию, после которого удаляются давно не читавшиеся записи
+DEFAULT_CACHE_SIZE = 1024 * 1024 * 1024
+
+# Суффикс файлов записей кэша
+ENTRY_SUFFIX = ".cache"
+
+
+def projection_kind(report: BaseReport) -> str:
+    """Вид записи кэша для колонок, которые читает отчёт, и условий фильтра"""
+
+    converters = ",".join(
+        f"{column}={getattr(convert, '__qualname__', repr(convert))}"
+        for column, convert in sorted(report.converters.items())
+    )
+    kind = f"columns:{','.join(report.columns or ())}:{converters}"
+    if report.where:
+        kind += f":where:{describe_where(report.where)}"
+    return kind
+
+
+def state_kind(report: BaseReport) -> str:
+    """Вид записи кэша для частичного состояния отчёта"""
+
+    return f"state:{report.state_name()}:{projection_kind(report)}"
+
+
+def dump_atomic(path: str, *objects: Any) -> None:
+    """Записывает объекты в файл через временный файл и атомарную замену"""
+
+    descriptor, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or ".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            for obj in objects:
+                pickle.dump(obj, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def file_digest(file_path: str) -> str:
+    """Вычисляет хэш содержимого файла"""
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as file:
+        while block := file.read(1024 * 1024):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class FileCache(Protocol):
+    """
+    Кэш разобранных файлов, который принимает aggregate_files
+
+    Для каждого файла и вида данных (kind: колонки или частичное
+    состояние отчёта, см. projection_kind и state_kind) хранится
+    отдельная запись, действительная, пока файл не изменился.
+    """
+
+    def load(self, file_path: str, kind: str) -> Optional[Any]:
+        """Возвращает данные или None, если записи нет или она устарела"""
+
+    def contains(self, file_path: str, kind: str) -> bool:
+        """Проверяет, есть ли действительная запись"""
+
+    def store(self, file_path: str, kind: str, payload: Any) -> None:
+        """Сохраняет данные для текущей версии файла"""
+
+    def evict(self) -> None:
+        """Удаляет давно не использованные записи сверх размера кэша"""
+
+
+class ParseCache:
+    """
+    Кэш результатов разбора CSV файлов на диске
+
+    Для каждого файла и вида данных (колонки, частичное состояние отчёта)
+    хранится отдельная запись. Запись действительна, если совпадают путь
+    и размер файла, а также время изменения или, если оно другое,
+    хэш содержимого. Прочитанные записи считаются недавно использованными,
+    при превышении размера кэша удаляются самые давние.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_CACHE_SIZE) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _entry_path(self, file_path: str, kind: str) -> str:
+        """Возвращает путь записи кэша для файла и вида данных"""
+
+        key = f"{os.path.abspath(file_path)}\0{kind}".encode("utf-8")
+        return os.path.join(
+            self.directory, hashlib.sha256(key).hexdigest() + ENTRY_SUFFIX
+        )
+
+    def _read_meta(self, file_path: str, kind: str, entry: IO[bytes]) -> bool:
+        """Читает заголовок записи и проверяет, что она относится к файлу"""
+
+        stat = os.stat(file_path)
+        meta = pickle.load(entry)
+        if (
+            meta["path"] != os.path.abspath(file_path)
+            or meta["kind"] != kind
+            or meta["size"] != stat.st_size
+        ):
+            return False
+        return bool(
+            meta["mtime_ns"] == stat.st_mtime_ns
+            or meta["digest"] == file_digest(file_path)
+        )
+
+    def contains(self, file_path: str, kind: str) -> bool:
+        """Проверяет, есть ли в кэше действительная запись"""
+
+        try:
+            with open(self._entry_path(file_path, kind), "rb") as entry:
+                return self._read_meta(file_path, kind, entry)
+        except (OSError, EOFError, KeyError, TypeError, pickle.UnpicklingError):
+            return False
+
+    def load(self, file_path: str, kind: str) -> Optional[Any]:
+        """Возвращает данные из кэша или None, если записи нет или она устарела"""
+
+        entry_path = self._entry_path(file_path, kind)
+        try:
+            with open(entry_path, "rb") as entry:
+                if not self._read_meta(file_path, kind, entry):
+                    return None
+                payload = pickle.load(entry)
+        except (OSError, EOFError, KeyError, TypeError, pickle.UnpicklingError):
+            return None
+
+        os.utime(entry_path)
+        return payload
+
+    def store(self, file_path: str, kind: str, payload: Any) -> None:
+        """Сохраняет данные в кэш, атомарно заменяя прежнюю запись"""
+
+        stat = os.stat(file_path)
+        meta = {
+            "path": os.path.abspath(file_path),
+            "kind": kind,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "digest": file_digest(file_path),
+        }
+
+        dump_atomic(self._entry_path(file_path, kind), meta, payload)
+
+    def evict(self) -> None:
+        """Удаляет давно не использованные записи, пока кэш больше max_bytes"""
+
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(ENTRY_SUFFIX):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.unlink(path)
+            total -= size
@@ -0,0 +1,90 @@
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+# Закодированная колонка: ("int", байты array('q')) или
+# ("dict", словарь уникальных значений, байты array('I') с их номерами)
+EncodedColumn = Tuple[Any, ...]
+
+
+class ColumnsBuilder:
+    """
+    Собирает строки-кортежи в компактные колонки
+
+    Целые числа хранятся массивом array('q'), остальные значения -
+    словарём уникальных значений и массивом их номеров.
+    """
+
+    def __init__(self, width: int) -> None:
+        self._values: List[List[Any]] = [[] for _ in range(width)]
+        self._codes = [array("I") for _ in range(width)]
+        self._ints = [array("q") for _ in range(width)]
+        self._indexes: List[Dict[Any, int]] = [{} for _ in range(width)]
+        self._is_int = [True] * width
+        self.rows = 0
+
+    def add(self, row: Sequence[Any]) -> None:
+        """Добавляет строку в колонки"""
+
+        for position, value in enumerate(row):
+            if self._is_int[position]:
+                if (
+                    isinstance(value, int)
+                    and not isinstance(value, bool)
+                    and -(2**63) <= value < 2**63
+                ):
+                    self._ints[position].append(value)
+                    continue
+                self._to_dictionary(position)
+
+            self._add_to_dictionary(position, value)
+        self.rows += 1
+
+    def _to_dictionary(self, position: int) -> None:
+        """Переводит целочисленную колонку в словарное кодирование"""
+
+        self._is_int[position] = False
+        for value in self._ints[position]:
+            self._add_to_dictionary(position, value)
+        self._ints[position] = array("q")
+
+    def _add_to_dictionary(self, position: int, value: Any) -> None:
+        """Добавляет значение в словарную колонку"""
+
+        index = self._indexes[position]
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(index)
+            self._values[position].append(value)
+        self._codes[position].append(code)
+
+    def encode(self) -> List[EncodedColumn]:
+        """Возвращает закодированные колонки"""
+
+        columns: List[EncodedColumn] = []
+        for position, is_int in enumerate(self._is_int):
+            if is_int:
+                columns.append(("int", self._ints[position].tobytes()))
+            else:
+                columns.append(
+                    ("dict", self._values[position], self._codes[position].tobytes())
+                )
+        return columns
+
+
+def iter_column(column: EncodedColumn) -> Iterator[Any]:
+    """Лениво раскодирует колонку"""
+
+    if column[0] == "int":
+        values = array("q")
+        values.frombytes(column[1])
+        return iter(values)
+
+    codes = array("I")
+    codes.frombytes(column[2])
+    return map(column[1].__getitem__, codes)
+
+
+def iter_encoded_rows(columns: Iterable[EncodedColumn]) -> Iterator[tuple]:
+    """Раскодирует колонки обратно в строки-кортежи"""
+
+    return zip(*[iter_column(column) for column in columns])
@@ -0,0 +1,101 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+import zlib
+from typing import Any, BinaryIO, Callable, Dict, Optional, Tuple, Type
+
+try:
+    from compression import zstd  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - Python < 3.14
+    zstd = None
+
+try:
+    import zstandard  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - zstandard не установлен
+    zstandard = None
+
+# Ошибки распаковки повреждённого или обрезанного сжатого файла
+DECOMPRESSION_ERRORS: Tuple[Type[Exception], ...] = (
+    EOFError,
+    lzma.LZMAError,
+    zlib.error,
+    *(module.ZstdError for module in (zstd, zstandard) if module is not None),
+)
+
+# Расширения сжатых файлов и их форматы
+EXTENSIONS = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz", ".zst": "zstd"}
+
+# Первые байты сжатых файлов
+MAGIC_BYTES = {
+    b"\x1f\x8b": "gzip",
+    b"BZh": "bz2",
+    b"\xfd7zXZ\x00": "xz",
+    b"\x28\xb5\x2f\xfd": "zstd",
+}
+
+
+def _open_zstd(file_path: str) -> BinaryIO:
+    """Открывает файл zstd модулем compression.zstd или пакетом zstandard"""
+
+    if zstd is not None:
+        stream: BinaryIO = zstd.open(file_path, "rb")
+        return stream
+    if zstandard is not None:
+        # Файл закрывает stream_reader (closefd=True)
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            open(file_path, "rb"),  # pylint: disable=consider-using-with
+            closefd=True,
+        )
+        return io.BufferedReader(reader)
+    raise ValueError(
+        f"Для чтения {file_path} нужен пакет zstandard (pip install zstandard)"
+    )
+
+
+# Функции, открывающие поток распакованных байтов
+OPENERS: Dict[str, Callable[[str], Any]] = {
+    "gzip": lambda file_path: gzip.open(file_path, "rb"),
+    "bz2": lambda file_path: bz2.open(file_path, "rb"),
+    "xz": lambda file_path: lzma.open(file_path, "rb"),
+    "zstd": _open_zstd,
+}
+
+
+def detect_compression(file_path: str) -> Optional[str]:
+    """
+    Определяет формат сжатия файла по расширению или первым байтам
+
+    Returns:
+        gzip, bz2, xz, zstd или None для несжатого файла.
+    """
+
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in EXTENSIONS:
+        return EXTENSIONS[extension]
+
+    try:
+        with open(file_path, "rb") as file:
+            head = file.read(max(map(len, MAGIC_BYTES)))
+    except OSError:
+        return None
+
+    for magic, compression in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def open_input(file_path: str) -> BinaryIO:
+    """
+    Открывает файл как поток байтов, распаковывая сжатые файлы на лету
+
+    Файл распаковывается по мере чтения и целиком на диск не пишется.
+    """
+
+    compression = detect_compression(file_path)
+    if compression is None:
+        return open(file_path, "rb")
+    stream: BinaryIO = OPENERS[compression](file_path)
+    return stream
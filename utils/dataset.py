@@ -0,0 +1,531 @@
+import csv
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from datetime import date
+from itertools import compress, repeat
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from utils import profiling
+from utils.compression import open_input
+from utils.filters import Condition, value_matches
+from utils.projection import INVALID, Converters, Lenient
+
+# Первые байты файла в колоночном формате
+DATASET_MAGIC = b"GRADECOL"
+
+# Расширение файлов, которые создаёт convert.py
+DATASET_SUFFIX = ".gcol"
+
+FORMAT_VERSION = 1
+
+# Длина заголовка записывается после сигнатуры как uint64
+_LENGTH = struct.Struct("<Q")
+
+# Разделы колонок выравниваются по 8 байтам
+_ALIGNMENT = 8
+
+# Признак значения, которое не удалось преобразовать
+_INVALID = object()
+
+# Сколько номеров значений колонки держится в памяти при конвертации
+ENCODE_BATCH_ROWS = 65536
+
+# Типы целых по возрастанию размера: код array и границы значений
+_INT_TYPECODES = [
+    ("b", -(2**7), 2**7),
+    ("h", -(2**15), 2**15),
+    ("i", -(2**31), 2**31),
+    ("q", -(2**63), 2**63),
+]
+
+
+class _ColumnEncoder:
+    """
+    Словарное кодирование колонки при чтении CSV
+
+    В памяти держится только словарь значений, номера значений строк
+    порциями по ENCODE_BATCH_ROWS сбрасываются во временный файл (flush()).
+    После чтения всех строк колонка сохраняется как целые числа, если все
+    значения - целые в каноничной записи, как номера дней, если все
+    значения - даты ГГГГ-ММ-ДД, иначе как словарь и номера значений.
+    """
+
+    def __init__(self) -> None:
+        self.values: List[Optional[str]] = []
+        self._codes = array("I")
+        self._index: Dict[Optional[str], int] = {}
+        self._spool = tempfile.TemporaryFile()
+        # Тип раздела и числа значений словаря, которые выбирает describe()
+        self._typecode = "I"
+        self._numbers: Optional[List[int]] = None
+
+    def add(self, value: Optional[str]) -> None:
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+        self._codes.append(code)
+
+    def flush(self) -> None:
+        """Сбрасывает накопленные номера во временный файл"""
+
+        self._codes.tofile(self._spool)
+        self._codes = array("I")
+
+    def describe(self) -> Dict[str, Any]:
+        """Выбирает кодировку колонки и возвращает её описание"""
+
+        for encoding, parse in (("int", _parse_int), ("day", _parse_day)):
+            self._numbers = _parse_all(self.values, parse)
+            if self._numbers is not None:
+                self._typecode = _smallest_typecode(
+                    min(self._numbers), max(self._numbers)
+                )
+                return {"encoding": encoding, "typecode": self._typecode}
+
+        self._typecode = _smallest_typecode(0, len(self.values) - 1, unsigned=True)
+        return {"encoding": "dict", "typecode": self._typecode, "values": self.values}
+
+    def write(self, output: BinaryIO) -> None:
+        """Записывает раздел колонки, перекодируя номера порциями"""
+
+        self.flush()
+        self._spool.seek(0)
+        while data := self._spool.read(ENCODE_BATCH_ROWS * self._codes.itemsize):
+            codes = array("I", data)
+            if self._numbers is None:
+                array(self._typecode, codes).tofile(output)
+            else:
+                values = map(self._numbers.__getitem__, codes)
+                array(self._typecode, values).tofile(output)
+
+    def close(self) -> None:
+        """Удаляет временный файл номеров"""
+
+        self._spool.close()
+
+
+def _parse_int(value: str) -> Optional[int]:
+    """Возвращает число, если строка - его каноничная запись"""
+
+    try:
+        number = int(value)
+    except ValueError:
+        return None
+    return number if str(number) == value else None
+
+
+def _parse_day(value: str) -> Optional[int]:
+    """Возвращает номер дня, если строка - дата ГГГГ-ММ-ДД"""
+
+    try:
+        day = date.fromisoformat(value)
+    except ValueError:
+        return None
+    return day.toordinal() if day.isoformat() == value else None
+
+
+def _parse_all(
+    values: Sequence[Optional[str]], parse: Callable[[str], Optional[int]]
+) -> Optional[List[int]]:
+    """Разбирает все значения или возвращает None, если хоть одно не подходит"""
+
+    if not values:
+        return None
+
+    numbers = []
+    for value in values:
+        number = None if value is None else parse(value)
+        if number is None:
+            return None
+        numbers.append(number)
+    return numbers
+
+
+def _smallest_typecode(low: int, high: int, unsigned: bool = False) -> str:
+    """Выбирает самый узкий тип array для значений от low до high"""
+
+    for typecode, minimum, maximum in _INT_TYPECODES:
+        if unsigned:
+            typecode, minimum, maximum = typecode.upper(), 0, maximum * 2
+        if minimum <= low and high < maximum:
+            return typecode
+    raise ValueError(f"Значения вне диапазона 64-битных целых: {low}..{high}")
+
+
+def convert_csv(csv_path: str, output_path: str) -> int:
+    """
+    Переводит CSV файл в колоночный двоичный формат
+
+    Сжатый CSV распаковывается по мере чтения. Поля, которых нет
+    в короткой строке, сохраняются как отсутствующие,
+    лишние поля длинной строки отбрасываются. В памяти держатся только
+    словари значений колонок и порции номеров (см. _ColumnEncoder).
+
+    Returns:
+        Количество записанных строк.
+    """
+
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"Файл {csv_path} не существует")
+
+    header, encoders, rows = _encode_csv(csv_path)
+    try:
+        columns = []
+        offset = 0
+        for name, encoder in zip(header, encoders):
+            description = encoder.describe()
+            length = rows * array(description["typecode"]).itemsize
+            description.update(name=name, offset=offset, length=length)
+            columns.append(description)
+            offset += _padded(length)
+
+        metadata = json.dumps(
+            {
+                "version": FORMAT_VERSION,
+                "byteorder": sys.byteorder,
+                "rows": rows,
+                "columns": columns,
+            },
+            ensure_ascii=False,
+        ).encode("utf-8")
+        _write_dataset(output_path, metadata, encoders)
+    finally:
+        for encoder in encoders:
+            encoder.close()
+    return rows
+
+
+def _encode_csv(csv_path: str) -> Tuple[List[str], List[_ColumnEncoder], int]:
+    """
+    Собирает колонки CSV файла в кодировщики
+
+    Файл открывается так же, как в читателях CSV (utils.file_reader),
+    с универсальными переводами строк, поэтому значения полей
+    совпадают с теми, что получает отчёт при чтении CSV.
+
+    Returns:
+        Тройка (заголовок, кодировщики колонок, количество строк).
+    """
+
+    with io.TextIOWrapper(open_input(csv_path), encoding="utf-8") as file:
+        reader = csv.reader(file)
+        header = next(reader, [])
+        encoders = [_ColumnEncoder() for _ in header]
+        rows = 0
+        try:
+            for fields in reader:
+                if not fields:
+                    continue
+                for position, encoder in enumerate(encoders):
+                    encoder.add(fields[position] if position < len(fields) else None)
+                rows += 1
+                if rows % ENCODE_BATCH_ROWS == 0:
+                    for encoder in encoders:
+                        encoder.flush()
+        except BaseException:
+            for encoder in encoders:
+                encoder.close()
+            raise
+    return header, encoders, rows
+
+
+def _write_dataset(
+    output_path: str, metadata: bytes, encoders: Sequence[_ColumnEncoder]
+) -> None:
+    """
+    Записывает описание и разделы колонок через временный файл
+
+    Если запись не удалась, временный файл удаляется.
+    """
+
+    temp_path = output_path + ".tmp"
+    try:
+        with open(temp_path, "wb") as output:
+            output.write(DATASET_MAGIC + _LENGTH.pack(len(metadata)) + metadata)
+            _pad(output)
+            for encoder in encoders:
+                encoder.write(output)
+                _pad(output)
+        os.replace(temp_path, output_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def _pad(output: BinaryIO) -> None:
+    """Дописывает нули до границы выравнивания"""
+
+    output.write(b"\0" * (_padded(output.tell()) - output.tell()))
+
+
+def _padded(size: int) -> int:
+    """Округляет размер вверх до границы выравнивания"""
+
+    return -(-size // _ALIGNMENT) * _ALIGNMENT
+
+
+def is_dataset(file_path: str) -> bool:
+    """Проверяет по сигнатуре, что файл записан в колоночном формате"""
+
+    try:
+        with open(file_path, "rb") as file:
+            return file.read(len(DATASET_MAGIC)) == DATASET_MAGIC
+    except OSError:
+        return False
+
+
+def _read_metadata(buffer: mmap.mmap) -> Tuple[Dict[str, Any], int]:
+    """Читает описание колонок и смещение первого раздела"""
+
+    start = len(DATASET_MAGIC)
+    (length,) = _LENGTH.unpack_from(buffer, start)
+    start += _LENGTH.size
+    metadata = json.loads(buffer[start : start + length].decode("utf-8"))
+    if metadata.get("version") != FORMAT_VERSION:
+        raise ValueError(
+            f"Неподдерживаемая версия колоночного файла: {metadata.get('version')}"
+        )
+    return metadata, _padded(start + length)
+
+
+def _raw_values(column: Dict[str, Any]) -> Callable[[Any], Optional[str]]:
+    """Функция, восстанавливающая исходную строку по сохранённому значению"""
+
+    if column["encoding"] == "dict":
+        values: List[Optional[str]] = column["values"]
+        return values.__getitem__
+    if column["encoding"] == "day":
+        return lambda day: date.fromordinal(day).isoformat()
+    return str
+
+
+class _Decoded(dict):
+    """Значения колонки по сохранённому значению, вычисляемые по требованию"""
+
+    def __init__(self, decode: Callable[[Any], Any]) -> None:
+        super().__init__()
+        self._decode = decode
+
+    def __missing__(self, key: Any) -> Any:
+        value = self[key] = self._decode(key)
+        return value
+
+
+def _converted(
+    raw: Callable[[Any], Optional[str]], convert: Optional[Callable[[str], Any]]
+) -> Callable[[Any], Any]:
+    """Функция от сохранённого значения к значению колонки отчёта"""
+
+    def decode(stored: Any) -> Any:
+        value = raw(stored)
+        if isinstance(convert, Lenient):
+            return convert(value)
+        if value is None:
+            return _INVALID
+        if convert is None:
+            return value
+        try:
+            return convert(value)
+        except (ValueError, TypeError):
+            return _INVALID
+
+    return decode
+
+
+class _ColumnViews:
+    """
+    Разделы колонок отображённого колоночного файла как массивы значений
+
+    Созданные представления запоминаются, чтобы release() освободил
+    их до закрытия mmap.
+    """
+
+    def __init__(self, buffer: mmap.mmap, data_start: int, byteorder: str) -> None:
+        self._buffer = buffer
+        self._data_start = data_start
+        self._byteorder = byteorder
+        self._views: List[memoryview] = []
+
+    def view(self, column: Dict[str, Any]) -> memoryview:
+        """Отображает раздел колонки как массив её значений"""
+
+        start = self._data_start + column["offset"]
+        view = memoryview(self._buffer)[start : start + column["length"]]
+        self._views.append(view)
+        if self._byteorder != sys.byteorder:
+            swapped = array(column["typecode"], view.tobytes())
+            swapped.byteswap()
+            view = memoryview(swapped)
+        else:
+            view = view.cast(column["typecode"])
+        self._views.append(view)
+        return view
+
+    def release(self) -> None:
+        """Освобождает все созданные представления"""
+
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+
+
+def _matcher(column: Dict[str, Any], condition: Condition) -> Callable[[Any], bool]:
+    """Проверка условия по сохранённому значению колонки"""
+
+    raw = _raw_values(column)
+    return lambda stored: value_matches(condition, raw(stored))
+
+
+def iter_dataset_file(
+    file_path: str,
+    columns: Optional[Sequence[str]] = None,
+    converters: Optional[Converters] = None,
+    where: Sequence[Condition] = (),
+) -> Iterator[Any]:
+    """
+    Построчно читает колоночный файл через mmap
+
+    Разделы колонок не копируются: номера и числа читаются прямо
+    из отображённых страниц. Значения словаря раскодируются и
+    преобразуются converters один раз на уникальное значение.
+    Без columns строки отдаются словарями исходных строк, как
+    csv.DictReader; с columns - кортежами, строки с отсутствующими
+    или некорректными значениями пропускаются (у колонок с Lenient
+    такие значения - INVALID).
+    Условия where тоже проверяются один раз на уникальное значение
+    колонки, до раскодирования остальных колонок строки.
+    """
+
+    with open(file_path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            metadata, data_start = _read_metadata(buffer)
+            described = {column["name"]: column for column in metadata["columns"]}
+            names = [column["name"] for column in metadata["columns"]]
+
+            if any(condition.column not in described for condition in where):
+                profiling.count("rows_filtered", metadata["rows"])
+                return
+            if columns is not None and any(
+                name not in described
+                and not isinstance((converters or {}).get(name), Lenient)
+                for name in columns
+            ):
+                profiling.count("rows_dropped", metadata["rows"])
+                return
+
+            sections = _ColumnViews(buffer, data_start, metadata["byteorder"])
+            try:
+                mask = _where_mask(sections, described, where) if where else None
+                rows: Iterator[tuple] = zip(
+                    *_column_iterators(sections, described, names, columns, converters)
+                )
+                if mask is not None:
+                    rows = compress(rows, mask)
+
+                if columns is None:
+                    for values in rows:
+                        yield {
+                            name: None if value is _INVALID else value
+                            for name, value in zip(names, values)
+                        }
+                    return
+
+                for row in rows:
+                    if _INVALID in row:
+                        profiling.count("rows_dropped")
+                        continue
+                    yield row
+            finally:
+                sections.release()
+
+
+def _where_mask(
+    sections: _ColumnViews,
+    described: Dict[str, Dict[str, Any]],
+    where: Sequence[Condition],
+) -> bytearray:
+    """Маска строк колоночного файла, подходящих под все условия where"""
+
+    flags = [
+        map(
+            _Decoded(_matcher(described[condition.column], condition)).__getitem__,
+            sections.view(described[condition.column]),
+        )
+        for condition in where
+    ]
+    mask = bytearray(map(all, zip(*flags)))
+    profiling.count("rows_filtered", mask.count(0))
+    return mask
+
+
+def _column_iterators(
+    sections: _ColumnViews,
+    described: Dict[str, Dict[str, Any]],
+    names: Sequence[str],
+    columns: Optional[Sequence[str]],
+    converters: Optional[Converters],
+) -> List[Iterator[Any]]:
+    """Итераторы значений колонок columns (без columns - всех колонок names)"""
+
+    iterators: List[Iterator[Any]] = []
+    for name in names if columns is None else columns:
+        convert = None
+        if columns is not None:
+            convert = (converters or {}).get(name)
+        if name not in described:
+            # Нестрогой колонки нет в файле
+            iterators.append(repeat(INVALID))
+            continue
+        column = described[name]
+        iterators.append(_iter_column(column, sections.view(column), columns, convert))
+    return iterators
+
+
+def _iter_column(
+    column: Dict[str, Any],
+    view: memoryview,
+    columns: Optional[Sequence[str]],
+    convert: Optional[Callable[[str], Any]],
+) -> Iterator[Any]:
+    """Раскодирует значения колонки в том виде, в каком их отдал бы читатель CSV"""
+
+    if columns is not None and column["encoding"] == "int" and convert is int:
+        return iter(view)
+
+    decode = _converted(_raw_values(column), convert)
+    if column["encoding"] == "dict":
+        values = [decode(code) for code in range(len(column["values"]))]
+        return map(values.__getitem__, view)
+    return map(_Decoded(decode).__getitem__, view)
+
+
+def iter_dataset_files(
+    file_paths: Sequence[str],
+    columns: Optional[Sequence[str]] = None,
+    converters: Optional[Converters] = None,
+    where: Sequence[Condition] = (),
+) -> Iterator[Any]:
+    """Построчно читает несколько колоночных файлов"""
+
+    for file_path in file_paths:
+        profiling.count("files_read")
+        profiling.count("bytes_read", os.path.getsize(file_path))
+        yield from iter_dataset_file(file_path, columns, converters, where)
@@ -0,0 +1,75 @@
+import glob
+import os
+from typing import Iterable, Iterator
+
+from utils.compression import EXTENSIONS
+from utils.dataset import DATASET_SUFFIX
+
+# Префикс файла со списком входных файлов: --files @manifest.txt
+MANIFEST_PREFIX = "@"
+
+# Файлы, которые берутся из каталогов: CSV (в том числе сжатые) и колоночные
+INPUT_SUFFIXES = (".csv", DATASET_SUFFIX) + tuple(
+    f".csv{extension}" for extension in EXTENSIONS
+)
+
+
+def _is_glob(spec: str) -> bool:
+    """Проверяет, что путь - шаблон с *, ? или [...]"""
+
+    return any(char in spec for char in "*?[")
+
+
+def _walk(directory: str) -> Iterator[str]:
+    """Рекурсивно обходит каталог в порядке имён, отдавая входные файлы"""
+
+    for root, directories, files in os.walk(directory):
+        directories.sort()
+        for name in sorted(files):
+            if name.lower().endswith(INPUT_SUFFIXES):
+                yield os.path.join(root, name)
+
+
+def _read_manifest(manifest_path: str) -> Iterator[str]:
+    """
+    Читает манифест: по пути, шаблону или каталогу на строку
+
+    Пустые строки и строки с # пропускаются, относительные пути
+    считаются от каталога манифеста.
+    """
+
+    if not os.path.exists(manifest_path):
+        raise FileNotFoundError(f"Файл {manifest_path} не существует")
+
+    base = os.path.dirname(manifest_path)
+    with open(manifest_path, "r", encoding="utf-8") as manifest:
+        for line in manifest:
+            spec = line.strip()
+            if spec and not spec.startswith("#"):
+                yield os.path.join(base, spec)
+
+
+def expand_inputs(specs: Iterable[str]) -> Iterator[str]:
+    """
+    Раскрывает аргументы --files в пути файлов
+
+    Каждый аргумент - путь к файлу, шаблон файлов (data/*.csv,
+    logs/**/*.csv.gz), каталог (обходится рекурсивно, берутся .csv,
+    .csv.gz и т.п. и .gcol) или @манифест со списком таких аргументов.
+    Пути отдаются лениво, по мере обхода, поэтому разбор первого файла
+    начинается до того, как найдены остальные. Несуществующий путь
+    отдаётся как есть: ошибку поднимет читатель, дойдя до него.
+    """
+
+    for spec in specs:
+        if spec.startswith(MANIFEST_PREFIX):
+            yield from expand_inputs(_read_manifest(spec[len(MANIFEST_PREFIX) :]))
+        elif os.path.isdir(spec):
+            yield from _walk(spec)
+        elif _is_glob(spec) and not os.path.exists(spec):
+            matches = sorted(glob.iglob(spec, recursive=True))
+            if not matches:
+                raise FileNotFoundError(f"Нет файлов по шаблону {spec}")
+            yield from filter(os.path.isfile, matches)
+        else:
+            yield spec
@@ -0,0 +1,434 @@
+import base64
+import csv
+import json
+import os
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from utils import profiling
+from utils.compression import detect_compression
+from utils.dataset import is_dataset
+from utils.file_reader import CsvChunk, iter_csv_files
+from utils.filters import FILTER_COLUMNS, Condition, range_may_match, value_matches
+from utils.sketches import BloomFilter
+
+# Суффикс файла индекса, который лежит рядом с файлом данных
+SIDECAR_SUFFIX = ".idx"
+
+INDEX_VERSION = 2
+
+# Через сколько строк CSV файла запоминается смещение следующего блока
+DEFAULT_BLOCK_ROWS = 65536
+
+# Колонки, для которых хранится множество различных значений
+VALUE_SET_COLUMNS = ("subject", "teacher_name")
+
+# Больше стольких различных значений множество колонки не хранится
+MAX_VALUE_SET = 4096
+
+# Колонка, значения которой попадают в фильтр Блума, и доля его ложных ответов
+BLOOM_COLUMN = "student_name"
+BLOOM_ERROR = 0.01
+
+# Наименьшее и наибольшее значение колонок; колонки без значений не попадают
+Ranges = Dict[str, Tuple[str, str]]
+
+
+class Block(NamedTuple):
+    """Блок строк CSV файла: диапазон байтов и диапазоны значений колонок"""
+
+    start: int
+    end: int
+    rows: int
+    ranges: Ranges
+
+
+class FileIndex(NamedTuple):
+    """Статистика файла данных для пропуска файлов и блоков при фильтрации"""
+
+    # Размер и время изменения файла, по которым построен индекс
+    size: int
+    mtime_ns: int
+    # Количество строк
+    rows: int
+    # Диапазоны значений колонок FILTER_COLUMNS во всём файле
+    ranges: Ranges
+    # Различные значения колонок VALUE_SET_COLUMNS, если их немного
+    values: Dict[str, List[str]]
+    # Фильтр Блума значений BLOOM_COLUMN
+    students: Optional[BloomFilter]
+    # Заголовок и блоки по DEFAULT_BLOCK_ROWS строк; только у несжатых CSV
+    header: Optional[List[str]]
+    blocks: List[Block]
+
+
+class _Collector:
+    """Собирает статистику строк по блокам и по всему файлу"""
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.ranges: Ranges = {}
+        self.distinct: Dict[str, Optional[Set[str]]] = {
+            column: set() for column in VALUE_SET_COLUMNS
+        }
+        self.students: Set[str] = set()
+        self._block: Dict[str, List[str]] = {column: [] for column in FILTER_COLUMNS}
+        self.block_rows = 0
+
+    def add(self, values: Sequence[Optional[str]]) -> None:
+        """Добавляет значения колонок FILTER_COLUMNS одной строки"""
+
+        for column_values, value in zip(self._block.values(), values):
+            if value is not None:
+                column_values.append(value)
+        self.block_rows += 1
+
+    def close_block(self) -> Tuple[int, Ranges]:
+        """Завершает блок и возвращает его количество строк и диапазоны"""
+
+        ranges: Ranges = {}
+        for column, values in self._block.items():
+            if not values:
+                continue
+            ranges[column] = low, high = min(values), max(values)
+            if column in self.ranges:
+                known_low, known_high = self.ranges[column]
+                low, high = min(low, known_low), max(high, known_high)
+            self.ranges[column] = low, high
+
+            distinct = self.distinct.get(column)
+            if distinct is not None:
+                distinct.update(values)
+                if len(distinct) > MAX_VALUE_SET:
+                    self.distinct[column] = None
+            if column == BLOOM_COLUMN:
+                self.students.update(values)
+
+        rows = self.block_rows
+        self.rows += rows
+        self._block = {column: [] for column in FILTER_COLUMNS}
+        self.block_rows = 0
+        return rows, ranges
+
+    def students_filter(self) -> Optional[BloomFilter]:
+        """Фильтр Блума всех увиденных значений BLOOM_COLUMN"""
+
+        if not self.students:
+            return None
+        bloom = BloomFilter.for_capacity(len(self.students), BLOOM_ERROR)
+        for student in self.students:
+            bloom.add(student)
+        return bloom
+
+
+def sidecar_path(file_path: str) -> str:
+    """Путь файла индекса для файла данных"""
+
+    return file_path + SIDECAR_SUFFIX
+
+
+def _iter_raw_records(file: BinaryIO) -> Iterator[Tuple[bytes, int]]:
+    """
+    Отдаёт записи CSV в байтах и смещения их концов
+
+    Перевод строки внутри поля в кавычках не завершает запись.
+    """
+
+    offset = 0
+    record = b""
+    in_quotes = False
+    for line in file:
+        offset += len(line)
+        in_quotes ^= line.count(b'"') % 2 == 1
+        record = record + line if record else line
+        if not in_quotes:
+            yield record, offset
+            record = b""
+    if record:
+        yield record, offset
+
+
+def _parse_record(record: bytes) -> List[str]:
+    """
+    Разбирает запись, как основной читатель
+
+    Переводы строк, в том числе внутри кавычек, приводятся к \\n, как
+    при чтении CSV с универсальными переводами строк (utils.file_reader).
+    """
+
+    text = record.decode("utf-8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = text.rstrip("\n")
+    if not text:
+        return []
+    if '"' in text:
+        return next(csv.reader([text]), [])
+    return text.split(",")
+
+
+def _scan_csv(
+    file_path: str, block_rows: int, collector: _Collector
+) -> Tuple[List[str], List[Block]]:
+    """Разбирает несжатый CSV файл по записям, запоминая границы блоков"""
+
+    blocks: List[Block] = []
+    with open(file_path, "rb") as file:
+        records = _iter_raw_records(file)
+        header_record, start = next(records, (b"", 0))
+        header = _parse_record(header_record)
+        positions = [
+            header.index(column) if column in header else None
+            for column in FILTER_COLUMNS
+        ]
+
+        end = start
+        for record, end in records:
+            fields = _parse_record(record)
+            if not fields:
+                continue
+            collector.add(
+                [
+                    (
+                        None
+                        if position is None or position >= len(fields)
+                        else fields[position]
+                    )
+                    for position in positions
+                ]
+            )
+            if collector.block_rows == block_rows:
+                blocks.append(Block(start, end, *collector.close_block()))
+                start = end
+
+        if collector.block_rows:
+            blocks.append(Block(start, end, *collector.close_block()))
+    return header, blocks
+
+
+def build_index(file_path: str, block_rows: int = DEFAULT_BLOCK_ROWS) -> FileIndex:
+    """
+    Читает файл и собирает его статистику
+
+    Несжатый CSV разбирается по записям, и через каждые block_rows строк
+    запоминается смещение блока с диапазонами его значений. Сжатые
+    и колоночные файлы читаются обычным читателем и получают только
+    статистику всего файла. Размер и время изменения берутся до чтения,
+    поэтому индекс файла, изменённого во время чтения, при загрузке
+    окажется устаревшим.
+    """
+
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"Файл {file_path} не существует")
+
+    stat = os.stat(file_path)
+    collector = _Collector()
+    header: Optional[List[str]] = None
+    blocks: List[Block] = []
+
+    if is_dataset(file_path) or detect_compression(file_path) is not None:
+        for row in iter_csv_files([file_path]):
+            collector.add([row.get(column) for column in FILTER_COLUMNS])
+        collector.close_block()
+    else:
+        header, blocks = _scan_csv(file_path, block_rows, collector)
+
+    return FileIndex(
+        stat.st_size,
+        stat.st_mtime_ns,
+        collector.rows,
+        collector.ranges,
+        {
+            column: sorted(values)
+            for column, values in collector.distinct.items()
+            if values is not None
+        },
+        collector.students_filter(),
+        header,
+        blocks,
+    )
+
+
+def write_index(file_path: str, index: FileIndex) -> str:
+    """Записывает индекс рядом с файлом данных и возвращает его путь"""
+
+    path = sidecar_path(file_path)
+    students = None
+    if index.students is not None:
+        students = {
+            "size": index.students.size,
+            "hashes": index.students.hashes,
+            "bits": base64.b64encode(index.students.bits).decode("ascii"),
+        }
+    payload: Dict[str, Any] = {
+        "version": INDEX_VERSION,
+        "size": index.size,
+        "mtime_ns": index.mtime_ns,
+        "rows": index.rows,
+        "ranges": index.ranges,
+        "values": index.values,
+        "students": students,
+        "header": index.header,
+        "blocks": [list(block) for block in index.blocks],
+    }
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as output:
+        json.dump(payload, output, ensure_ascii=False)
+    os.replace(temp_path, path)
+    return path
+
+
+def _ranges(payload: Dict[str, Any]) -> Ranges:
+    return {column: (low, high) for column, (low, high) in payload.items()}
+
+
+def load_index(file_path: str) -> Optional[FileIndex]:
+    """
+    Читает индекс файла данных
+
+    Возвращает None, если индекса нет, он повреждён или построен
+    для другой версии файла (другие размер или время изменения).
+    """
+
+    try:
+        with open(sidecar_path(file_path), encoding="utf-8") as sidecar:
+            payload = json.load(sidecar)
+        stat = os.stat(file_path)
+        if (
+            payload["version"] != INDEX_VERSION
+            or payload["size"] != stat.st_size
+            or payload["mtime_ns"] != stat.st_mtime_ns
+        ):
+            return None
+
+        students = payload["students"]
+        return FileIndex(
+            payload["size"],
+            payload["mtime_ns"],
+            payload["rows"],
+            _ranges(payload["ranges"]),
+            payload["values"],
+            (
+                None
+                if students is None
+                else BloomFilter(
+                    students["size"],
+                    students["hashes"],
+                    base64.b64decode(students["bits"]),
+                )
+            ),
+            payload["header"],
+            [
+                Block(start, end, rows, _ranges(ranges))
+                for start, end, rows, ranges in payload["blocks"]
+            ],
+        )
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _ranges_may_match(ranges: Ranges, where: Sequence[Condition]) -> bool:
+    """Могут ли значения из диапазонов подойти под все условия"""
+
+    for condition in where:
+        bounds = ranges.get(condition.column)
+        if bounds is None or not range_may_match(condition, *bounds):
+            return False
+    return True
+
+
+def index_may_match(index: FileIndex, where: Sequence[Condition]) -> bool:
+    """
+    Могут ли в файле с индексом быть строки, подходящие под условия
+
+    Файл исключают: отсутствие строк, диапазоны значений, множества
+    значений колонок и фильтр Блума для условия на равенство.
+    """
+
+    if not index.rows or not _ranges_may_match(index.ranges, where):
+        return False
+
+    for condition in where:
+        values = index.values.get(condition.column)
+        if values is not None and not any(
+            value_matches(condition, value) for value in values
+        ):
+            return False
+        if (
+            condition.column == BLOOM_COLUMN
+            and condition.operator == "="
+            and index.students is not None
+            and condition.value not in index.students
+        ):
+            return False
+    return True
+
+
+def may_match(file_path: str, where: Sequence[Condition]) -> bool:
+    """
+    Могут ли в файле быть строки, подходящие под условия where
+
+    Без действительного индекса файл нужно читать.
+    """
+
+    if not where:
+        return True
+
+    index = load_index(file_path)
+    return index is None or index_may_match(index, where)
+
+
+def select_chunks(
+    file_path: str, where: Sequence[Condition], chunk_size: Optional[int] = None
+) -> Optional[List[CsvChunk]]:
+    """
+    Части файла, которые нужно прочитать, по его индексу
+
+    Соседние блоки, которые могут содержать строки под условия where,
+    объединяются в части не больше chunk_size байт (без chunk_size -
+    в части любого размера), поэтому файл делится на части без
+    повторного поиска границ записей.
+
+    Returns:
+        None, если файл читается целиком: индекса нет, в нём нет
+        блоков или все блоки подходят, а файл не больше chunk_size.
+        Пустой список, если в файле нет подходящих строк.
+    """
+
+    index = load_index(file_path)
+    if index is None:
+        return None
+    if where and not index_may_match(index, where):
+        profiling.count("files_skipped")
+        return []
+    if not index.blocks or index.header is None:
+        return None
+
+    blocks = [block for block in index.blocks if _ranges_may_match(block.ranges, where)]
+    if len(blocks) == len(index.blocks) and (
+        chunk_size is None or index.size <= chunk_size
+    ):
+        return None
+
+    profiling.count("blocks_skipped", len(index.blocks) - len(blocks))
+    chunks: List[CsvChunk] = []
+    for block in blocks:
+        if (
+            chunks
+            and chunks[-1].end == block.start
+            and (chunk_size is None or block.end - chunks[-1].start <= chunk_size)
+        ):
+            chunks[-1] = chunks[-1]._replace(end=block.end)
+        else:
+            chunks.append(CsvChunk(file_path, index.header, block.start, block.end))
+    return chunks
@@ -1,19 +1,283 @@
 import csv
+import io
 import os
+from typing import (
+    Any,
+    BinaryIO,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Union,
+)
 
+from utils import profiling
+from utils.compression import open_input
+from utils.dataset import is_dataset, iter_dataset_files
+from utils.filters import Condition, make_row_filter
+from utils.projection import Converters, fields_to_dict, make_projector
 
-def read_csv_files(file_paths: list) -> list[dict]:
-    """Читает данные из нескольких CSV файлов"""
+# Размер блока, которым файл просматривается при поиске границ записей
+SCAN_BLOCK_SIZE = 1024 * 1024
+
+
+class CsvChunk(NamedTuple):
+    """Диапазон байтов CSV файла, выровненный по границам записей"""
+
+    file_path: str
+    header: List[str]
+    start: int
+    end: int
+
+
+def _iter_records(
+    file: TextIO,
+    header: Optional[List[str]],
+    columns: Optional[Sequence[str]],
+    converters: Optional[Converters],
+    where: Sequence[Condition] = (),
+) -> Iterator[Union[dict, tuple]]:
+    """
+    Разбирает записи CSV из текстового потока
+
+    Без columns отдаются словари со всеми колонками. С columns отдаются
+    кортежи только этих колонок с применёнными преобразованиями,
+    записи с отсутствующими или некорректными значениями пропускаются.
+    Записи, не подходящие под условия where, отбрасываются по исходным
+    полям, до сборки словаря или преобразования значений.
+    """
 
-    all_data = []
+    if columns is None and not where:
+        yield from csv.DictReader(file, fieldnames=header)
+        return
+
+    reader = csv.reader(file)
+    if header is None:
+        header = next(reader, [])
+
+    if columns is None:
+        accept = make_row_filter(header, where)
+        for fields in reader:
+            if not fields:
+                continue
+            if accept(fields):
+                yield fields_to_dict(header, fields)
+            else:
+                profiling.count("rows_filtered")
+        return
+
+    project = make_projector(header, columns, converters, where)
+    for fields in reader:
+        row = project(fields)
+        if row is not None:
+            yield row
+
+
+def iter_csv_files(
+    file_paths: Iterable[str],
+    columns: Optional[Sequence[str]] = None,
+    converters: Optional[Converters] = None,
+    where: Sequence[Condition] = (),
+) -> Iterator[Any]:
+    """
+    Построчно читает данные из нескольких CSV файлов
+
+    Файлы открываются по очереди, строки отдаются по одной,
+    поэтому в памяти одновременно находится только текущая строка.
+    Если указаны columns, строки отдаются кортежами только этих колонок.
+    Строки, не подходящие под условия where, пропускаются.
+    Файлы в колоночном формате (convert.py) читаются напрямую, сжатые
+    файлы (.gz, .bz2, .xz, .zst) распаковываются по мере чтения.
+    """
 
     for file_path in file_paths:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Файл {file_path} не существует")
 
-        with open(file_path, "r", encoding="utf-8") as file:
-            csv_reader = csv.DictReader(file)
-            for row in csv_reader:
-                all_data.append(row)
+        if is_dataset(file_path):
+            yield from iter_dataset_files([file_path], columns, converters, where)
+            continue
+
+        profiling.count("files_read")
+        profiling.count("bytes_read", os.path.getsize(file_path))
+        with io.TextIOWrapper(open_input(file_path), encoding="utf-8") as file:
+            yield from _iter_records(file, None, columns, converters, where)
+
+
+def iter_csv_streams(
+    streams: Iterable[Tuple[str, Optional[BinaryIO]]],
+    columns: Optional[Sequence[str]] = None,
+    converters: Optional[Converters] = None,
+    where: Sequence[Condition] = (),
+) -> Iterator[Any]:
+    """
+    Построчно читает CSV из уже открытых двоичных потоков
+
+    Принимает пары (путь, поток), например от utils.prefetch.prefetch_files;
+    вместо потока None передаётся для файлов в колоночном формате.
+    """
+
+    for file_path, stream in streams:
+        if stream is None:
+            yield from iter_dataset_files([file_path], columns, converters, where)
+            continue
+
+        with io.TextIOWrapper(stream, encoding="utf-8") as file:
+            yield from _iter_records(file, None, columns, converters, where)
+
+
+def read_csv_files(file_paths: list) -> list[dict]:
+    """Читает данные из нескольких CSV файлов"""
+
+    return list(iter_csv_files(file_paths))
+
+
+def _record_boundaries(file: BinaryIO, chunk_size: int) -> Iterator[int]:
+    """
+    Находит смещения концов записей для разбиения файла на части
+
+    Первая граница - конец заголовка, каждая следующая - конец первой
+    записи, начинающейся не ближе chunk_size байт от предыдущей границы.
+    Перевод строки считается концом записи, только если до него
+    встретилось чётное число кавычек, поэтому переводы строк внутри
+    полей в кавычках не разрывают запись.
+    """
+
+    target = 0
+    block_offset = 0
+    in_quotes = False
+
+    while block := file.read(SCAN_BLOCK_SIZE):
+        position = 0
+        while True:
+            newline = block.find(b"\n", max(position, target - block_offset))
+            if newline == -1:
+                break
+
+            in_quotes ^= block.count(b'"', position, newline) % 2 == 1
+            position = newline + 1
+            if not in_quotes:
+                yield block_offset + position
+                target = block_offset + position + chunk_size
+
+        in_quotes ^= block.count(b'"', position) % 2 == 1
+        block_offset += len(block)
+
+
+def complete_records_end(file_path: str, start: int) -> int:
+    """
+    Возвращает смещение конца последней полной записи после start
+
+    start должен быть границей записи. Запись считается полной, если
+    она завершена переводом строки вне кавычек; недописанный хвост
+    файла не учитывается.
+    """
+
+    end = start
+    offset = start
+    in_quotes = False
+
+    with open(file_path, "rb") as file:
+        file.seek(start)
+        while block := file.read(SCAN_BLOCK_SIZE):
+            newline = block.rfind(b"\n")
+            while newline != -1:
+                if not in_quotes ^ (block.count(b'"', 0, newline) % 2 == 1):
+                    end = offset + newline + 1
+                    break
+                newline = block.rfind(b"\n", 0, newline)
+
+            in_quotes ^= block.count(b'"') % 2 == 1
+            offset += len(block)
+
+    return end
+
+
+def read_csv_header(file_path: str) -> Tuple[List[str], int]:
+    """
+    Читает заголовок CSV файла
+
+    Returns:
+        Пара (имена колонок, смещение первой записи после заголовка).
+        Если заголовок не завершён переводом строки, смещение равно -1.
+    """
+
+    with open(file_path, "rb") as file:
+        header_end = next(_record_boundaries(file, 0), -1)
+        file.seek(0)
+        header_text = file.read(max(header_end, 0)).decode("utf-8")
+
+    return next(csv.reader(io.StringIO(header_text)), []), header_end
+
+
+def split_csv_file(file_path: str, chunk_size: int) -> List[CsvChunk]:
+    """
+    Разбивает CSV файл на диапазоны байтов примерно по chunk_size
+
+    Заголовок читается один раз из начала файла и передаётся
+    в каждый диапазон, чтобы части можно было разбирать независимо.
+    """
+
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"Файл {file_path} не существует")
+
+    file_size = os.path.getsize(file_path)
+
+    with open(file_path, "rb") as file:
+        boundaries = _record_boundaries(file, chunk_size)
+        header_end = next(boundaries, file_size)
+        starts = [header_end]
+        starts.extend(boundary for boundary in boundaries if boundary < file_size)
+
+        file.seek(0)
+        header_text = file.read(header_end).decode("utf-8")
+
+    header = next(csv.reader(io.StringIO(header_text)), [])
+    ends = starts[1:] + [file_size]
+
+    return [
+        CsvChunk(file_path, header, start, end)
+        for start, end in zip(starts, ends)
+        if start < end
+    ]
+
+
+class _ByteRange(io.RawIOBase):
+    """Поток, ограниченный заданным количеством байтов открытого файла"""
+
+    def __init__(self, file: io.BufferedReader, length: int) -> None:
+        super().__init__()
+        self._file = file
+        self._remaining = length
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+
+        read = self._file.readinto(memoryview(buffer)[:size])
+        self._remaining -= read
+        return read
+
+
+def iter_csv_chunk(
+    chunk: CsvChunk,
+    columns: Optional[Sequence[str]] = None,
+    converters: Optional[Converters] = None,
+    where: Sequence[Condition] = (),
+) -> Iterator[Any]:
+    """Построчно читает строки из диапазона байтов CSV файла"""
 
-    return all_data
+    profiling.count("bytes_read", chunk.end - chunk.start)
+    with open(chunk.file_path, "rb") as file:
+        file.seek(chunk.start)
+        byte_range = io.BufferedReader(_ByteRange(file, chunk.end - chunk.start))
+        with io.TextIOWrapper(byte_range, encoding="utf-8") as text:
+            yield from _iter_records(text, chunk.header, columns, converters, where)
@@ -0,0 +1,152 @@
+import operator
+import re
+from datetime import date
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from utils import profiling
+
+# Колонки, по которым можно фильтровать строки
+FILTER_COLUMNS = ("student_name", "subject", "teacher_name", "date")
+
+# Колонки, значения которых сравниваются как даты ГГГГ-ММ-ДД
+DATE_COLUMNS = ("date",)
+
+# Операторы сравнения; строки дат ГГГГ-ММ-ДД сравниваются как даты
+OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+
+# Операторы, допустимые только для дат
+RANGE_OPERATORS = (">=", "<=", ">", "<")
+
+_CONDITION = re.compile(r"^\s*(\w+)\s*(!=|>=|<=|=|>|<)\s*(.*?)\s*$", re.DOTALL)
+
+
+class Condition(NamedTuple):
+    """Условие на значение колонки: subject=Математика, date>=2024-09-01"""
+
+    column: str
+    operator: str
+    value: str
+
+    def __str__(self) -> str:
+        return f"{self.column}{self.operator}{self.value}"
+
+
+# Условия фильтра, объединяемые через И
+Where = Tuple[Condition, ...]
+
+
+def parse_condition(text: str) -> Condition:
+    """
+    Разбирает условие вида колонка<оператор>значение
+
+    Колонки - FILTER_COLUMNS, операторы - OPERATORS; сравнения
+    >, >=, <, <= допустимы только для дат.
+    """
+
+    match = _CONDITION.match(text)
+    if match is None:
+        raise ValueError(f"Условие должно иметь вид колонка=значение: {text}")
+
+    column, operator_name, value = match.groups()
+    if column not in FILTER_COLUMNS:
+        raise ValueError(
+            f"Фильтровать можно только по колонкам {', '.join(FILTER_COLUMNS)}: "
+            f"{column}"
+        )
+    if column in DATE_COLUMNS:
+        try:
+            value = date.fromisoformat(value).isoformat()
+        except ValueError:
+            raise ValueError(f"Дата должна иметь вид ГГГГ-ММ-ДД: {value}") from None
+    elif operator_name in RANGE_OPERATORS:
+        raise ValueError(f"Оператор {operator_name} применим только к датам: {text}")
+    return Condition(column, operator_name, value)
+
+
+def value_matches(condition: Condition, value: Optional[str]) -> bool:
+    """Проверяет исходное значение колонки; отсутствующее не подходит"""
+
+    return value is not None and OPERATORS[condition.operator](value, condition.value)
+
+
+def make_row_filter(
+    header: Sequence[str], where: Sequence[Condition]
+) -> Callable[[Sequence[str]], bool]:
+    """
+    Создаёт проверку полей записи до их преобразования
+
+    Функция принимает список исходных строк полей в порядке заголовка.
+    Даты ГГГГ-ММ-ДД сравниваются как строки, без разбора. Запись, в которой
+    нет поля из условия, не подходит; если колонки нет в заголовке,
+    не подходит ни одна запись.
+    """
+
+    if any(condition.column not in header for condition in where):
+        return lambda fields: False
+
+    checks = [
+        (header.index(condition.column), OPERATORS[condition.operator], condition.value)
+        for condition in where
+    ]
+
+    def accept(fields: Sequence[str]) -> bool:
+        try:
+            for position, compare, value in checks:
+                if not compare(fields[position], value):
+                    return False
+        except (IndexError, TypeError):
+            return False
+        return True
+
+    return accept
+
+
+def filter_dicts(rows: Iterable[dict], where: Sequence[Condition]) -> Iterator[dict]:
+    """Оставляет строки-словари, подходящие под все условия"""
+
+    if not where:
+        yield from rows
+        return
+
+    for row in rows:
+        if all(
+            value_matches(condition, row.get(condition.column)) for condition in where
+        ):
+            yield row
+        else:
+            profiling.count("rows_filtered")
+
+
+def range_may_match(condition: Condition, low: str, high: str) -> bool:
+    """Может ли какое-нибудь значение от low до high подойти под условие"""
+
+    if condition.operator == "=":
+        return low <= condition.value <= high
+    if condition.operator == "!=":
+        return not low == high == condition.value
+    if condition.operator in (">=", ">"):
+        return OPERATORS[condition.operator](high, condition.value)
+    return OPERATORS[condition.operator](low, condition.value)
+
+
+def describe_where(where: Sequence[Condition]) -> str:
+    """Строка условий для ключей кэша"""
+
+    return "&".join(str(condition) for condition in where)
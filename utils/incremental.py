@@ -0,0 +1,188 @@
+import hashlib
+import os
+import pickle
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+from reports.base_report import BaseReport
+from utils.cache import dump_atomic, state_kind
+from utils.file_reader import (
+    CsvChunk,
+    complete_records_end,
+    read_csv_header,
+    split_csv_file,
+)
+
+# Сколько байтов начала и конца обработанной части файла проверяется,
+# чтобы заметить, что файл был переписан, а не дописан
+FINGERPRINT_SIZE = 64 * 1024
+
+
+class Progress(NamedTuple):
+    """Докуда дочитан файл и как проверить, что прочитанное не изменилось"""
+
+    offset: int
+    inode: int
+    header: List[str]
+    fingerprint: str
+
+
+def fingerprint(file_path: str, offset: int) -> str:
+    """Хэш начала и конца первых offset байтов файла"""
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as file:
+        digest.update(file.read(min(offset, FINGERPRINT_SIZE)))
+        tail_start = max(offset - FINGERPRINT_SIZE, 0)
+        file.seek(tail_start)
+        digest.update(file.read(offset - tail_start))
+    return digest.hexdigest()
+
+
+class IncrementalStore:
+    """
+    Хранилище прогресса чтения дописываемых CSV файлов
+
+    Для каждого файла и отчёта хранится смещение конца последней
+    обработанной записи и частичное состояние отчёта по этой части.
+    Прогресс и состояние записываются отдельными объектами, чтобы при
+    планировании читался только прогресс.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _entry_path(self, file_path: str, report: BaseReport) -> str:
+        """Возвращает путь записи для файла и отчёта"""
+
+        key = f"{os.path.abspath(file_path)}\0{state_kind(report)}".encode("utf-8")
+        return os.path.join(
+            self.directory, hashlib.sha256(key).hexdigest() + ".progress"
+        )
+
+    def load(self, file_path: str, report: BaseReport) -> Optional[Progress]:
+        """
+        Возвращает сохранённый прогресс, если файл только дописывался
+
+        Если файл укорочен, заменён другим или его прочитанная часть
+        изменилась, возвращается None и файл нужно прочитать заново.
+        Состояние отчёта не читается, его возвращает load_state().
+        """
+
+        try:
+            with open(self._entry_path(file_path, report), "rb") as entry:
+                progress = pickle.load(entry)
+            stat = os.stat(file_path)
+        except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError):
+            return None
+
+        if (
+            not isinstance(progress, Progress)
+            or stat.st_size < progress.offset
+            or stat.st_ino != progress.inode
+            or fingerprint(file_path, progress.offset) != progress.fingerprint
+        ):
+            return None
+        return progress
+
+    def load_state(
+        self, file_path: str, report: BaseReport, progress: Progress
+    ) -> Optional[Tuple[bool, Any]]:
+        """
+        Возвращает has_rows и состояние, сохранённые вместе с progress
+
+        Если запись с тех пор заменена или не читается, возвращается None.
+        """
+
+        try:
+            with open(self._entry_path(file_path, report), "rb") as entry:
+                if pickle.load(entry) != progress:
+                    return None
+                has_rows, state = pickle.load(entry)
+        except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError):
+            return None
+        return has_rows, state
+
+    def save(
+        self,
+        file_path: str,
+        report: BaseReport,
+        progress: Progress,
+        has_rows: bool,
+        state: Any,
+    ) -> None:
+        """Сохраняет прогресс чтения файла вместе с состоянием отчёта"""
+
+        dump_atomic(self._entry_path(file_path, report), progress, (has_rows, state))
+
+
+def plan_increment(
+    file_path: str,
+    report: BaseReport,
+    store: IncrementalStore,
+    chunk_size: int,
+) -> Tuple[Optional[Progress], List[CsvChunk], List[CsvChunk], Optional[Progress]]:
+    """
+    Определяет, какую часть файла нужно прочитать
+
+    Если прогресс сохранён и действителен, читается только дописанный
+    хвост, иначе весь файл по частям не больше chunk_size. Недописанная
+    последняя запись (без перевода строки) читается отдельной частью:
+    она учитывается в текущем запуске, но не входит в сохраняемый
+    прогресс и читается снова, когда будет дописана.
+
+    Returns:
+        Четвёрка (сохранённый прогресс, состояние которого загружается
+        IncrementalStore.load_state(), или None, части файла до конца
+        последней полной записи, часть с недописанной записью, прогресс
+        для сохранения после разбора).
+    """
+
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"Файл {file_path} не существует")
+
+    file_size = os.path.getsize(file_path)
+    saved = store.load(file_path, report)
+    if saved is not None:
+        end = complete_records_end(file_path, saved.offset)
+        chunks = []
+        if end > saved.offset:
+            chunks.append(CsvChunk(file_path, saved.header, saved.offset, end))
+        return (
+            saved,
+            chunks,
+            _tail(file_path, saved.header, end, file_size),
+            _progress(file_path, saved.header, end),
+        )
+
+    header, header_end = read_csv_header(file_path)
+    if header_end < 0:
+        return None, [], [], None
+
+    chunks = split_csv_file(file_path, chunk_size)
+    end = complete_records_end(file_path, chunks[-1].start if chunks else header_end)
+    chunks = [
+        chunk._replace(end=min(chunk.end, end)) for chunk in chunks if chunk.start < end
+    ]
+    return (
+        None,
+        chunks,
+        _tail(file_path, header, end, file_size),
+        _progress(file_path, header, end),
+    )
+
+
+def _tail(
+    file_path: str, header: List[str], end: int, file_size: int
+) -> List[CsvChunk]:
+    """Часть файла после последней полной записи, если она не пуста"""
+
+    return [CsvChunk(file_path, header, end, file_size)] if end < file_size else []
+
+
+def _progress(file_path: str, header: List[str], offset: int) -> Progress:
+    """Описывает прогресс чтения файла до offset"""
+
+    return Progress(
+        offset, os.stat(file_path).st_ino, header, fingerprint(file_path, offset)
+    )
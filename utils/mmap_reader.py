@@ -0,0 +1,250 @@
+import csv
+import mmap
+import os
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from utils import profiling
+from utils.compression import detect_compression
+from utils.dataset import is_dataset
+from utils.file_reader import CsvChunk, iter_csv_files
+from utils.filters import Condition, make_row_filter
+from utils.projection import Converters, fields_to_dict, make_projector
+
+# Размер блока, которым файл делится на записи без участия модуля csv
+BLOCK_SIZE = 4 * 1024 * 1024
+
+
+def _record_end(buffer: mmap.mmap, start: int, end: int) -> int:
+    """
+    Возвращает смещение перевода строки, завершающего запись
+
+    Переводы строк внутри полей в кавычках пропускаются.
+    """
+
+    newline = buffer.find(b"\n", start, end)
+    if newline == -1:
+        return end
+
+    quotes = buffer[start:newline].count(b'"')
+    while quotes % 2 == 1:
+        next_newline = buffer.find(b"\n", newline + 1, end)
+        if next_newline == -1:
+            return end
+        quotes += buffer[newline:next_newline].count(b'"')
+        newline = next_newline
+
+    return newline
+
+
+def _parse_quoted(record: bytes) -> List[str]:
+    """Разбирает запись с кавычками стандартным модулем csv"""
+
+    text = record.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+    return next(csv.reader([text]), [])
+
+
+def _split_quoted_rows(
+    buffer: mmap.mmap, start: int, end: int, stop: int
+) -> Tuple[List[List[str]], int]:
+    """
+    Разбирает записи по одной, пока не будет пройдено смещение stop
+
+    Returns:
+        Пара (декодированные поля записей, смещение следующей записи).
+    """
+
+    rows: List[List[str]] = []
+    position = start
+    while position < stop:
+        record_end = _record_end(buffer, position, end)
+        record = buffer[position:record_end].rstrip(b"\r")
+        position = record_end + 1
+
+        if not record:
+            continue
+        if b'"' in record:
+            rows.append(_parse_quoted(record))
+        else:
+            rows.append(record.decode("utf-8").split(","))
+
+    return rows, position
+
+
+def _split_lines(block: bytes) -> List[str]:
+    """Декодирует блок без кавычек и делит его на непустые строки"""
+
+    if b"\r" in block:
+        block = block.replace(b"\r\n", b"\n")
+    return [line for line in block.decode("utf-8").split("\n") if line]
+
+
+def _required_bytes(where: Sequence[Condition]) -> List[bytes]:
+    """
+    Байты значений условий на равенство
+
+    Блок, в котором нет таких байтов, не содержит ни одной подходящей
+    записи. Значения с кавычками и переводами строк в CSV записываются
+    иначе, для них проверка не делается.
+    """
+
+    return [
+        condition.value.encode("utf-8")
+        for condition in where
+        if condition.operator == "="
+        and not any(symbol in condition.value for symbol in '"\r\n')
+    ]
+
+
+def _records_filter(
+    header: Sequence[str], where: Sequence[Condition]
+) -> Callable[[List[str]], bool]:
+    """Проверка полей записи, считающая отброшенные записи"""
+
+    accept = make_row_filter(header, where)
+
+    def check(fields: List[str]) -> bool:
+        if accept(fields):
+            return True
+        profiling.count("rows_filtered")
+        return False
+
+    return check
+
+
+def _iter_projected(
+    buffer: mmap.mmap,
+    chunk: CsvChunk,
+    columns: Optional[Sequence[str]],
+    converters: Optional[Converters],
+    where: Sequence[Condition] = (),
+) -> Iterator[Any]:
+    """
+    Построчно разбирает диапазон файла, декодируя только нужные колонки
+
+    Диапазон обрабатывается блоками по границам строк. Блок без кавычек
+    декодируется целиком и делится по переводам строк и запятым без
+    участия модуля csv, из полей выбираются только columns. Блоки
+    с кавычками разбираются по записям, записи с кавычками - модулем csv,
+    как в основном читателе. Без columns отдаются словари со всеми
+    колонками, с columns - кортежи.
+
+    Условия where проверяются до преобразований и сборки словарей;
+    блок, в байтах которого нет значения из условия на равенство,
+    пропускается без декодирования.
+    """
+
+    project = make_projector(
+        chunk.header,
+        list(chunk.header) if columns is None else list(columns),
+        converters,
+        where,
+    )
+    accept = _records_filter(chunk.header, where) if where else None
+    required = _required_bytes(where)
+    position = chunk.start
+
+    while position < chunk.end:
+        block_end = _block_end(buffer, position, chunk.end)
+        block = buffer[position:block_end]
+
+        if (
+            required
+            and b'"' not in block
+            and not all(value in block for value in required)
+        ):
+            if profiling.get_profiler() is not None:
+                profiling.count("rows_filtered", len(_split_lines(block)))
+        elif b'"' in block:
+            records, block_end = _split_quoted_rows(
+                buffer, position, chunk.end, block_end
+            )
+            if columns is None:
+                yield from (
+                    fields_to_dict(chunk.header, values)
+                    for values in filter(accept, records)
+                )
+            else:
+                yield from filter(None, map(project, records))
+        elif columns is None:
+            for line in _split_lines(block):
+                fields = line.split(",")
+                if accept is None or accept(fields):
+                    yield fields_to_dict(chunk.header, fields)
+        else:
+            for line in _split_lines(block):
+                row = project(line.split(","))
+                if row is not None:
+                    yield row
+
+        position = block_end
+
+
+def _block_end(buffer: mmap.mmap, start: int, end: int) -> int:
+    """Конец блока: первый перевод строки после start + BLOCK_SIZE или end"""
+
+    newline = buffer.find(b"\n", min(start + BLOCK_SIZE, end) - 1, end)
+    return end if newline == -1 else newline + 1
+
+
+def _read_header(buffer: mmap.mmap) -> Tuple[List[str], int]:
+    """Читает заголовок и возвращает его вместе со смещением первой записи"""
+
+    header_end = _record_end(buffer, 0, len(buffer))
+    record = buffer[:header_end].rstrip(b"\r")
+    header = (
+        _parse_quoted(record) if b'"' in record else record.decode("utf-8").split(",")
+    )
+    return header, header_end + 1
+
+
+def iter_mmap_files(
+    file_paths: Iterable[str],
+    columns: Optional[Sequence[str]] = None,
+    converters: Optional[Converters] = None,
+    where: Sequence[Condition] = (),
+) -> Iterator[Any]:
+    """
+    Построчно читает CSV файлы через mmap
+
+    Файл не читается в память целиком: страницы отображаются по мере
+    разбора блоков, а из записей выбираются только поля из columns.
+    Если columns не указан, строки отдаются словарями всех колонок.
+    Строки, не подходящие под условия where, пропускаются.
+    Файлы в колоночном формате (convert.py) читаются напрямую.
+    """
+
+    for file_path in file_paths:
+        if (
+            not os.path.exists(file_path)
+            or is_dataset(file_path)
+            or detect_compression(file_path) is not None
+        ):
+            # Колоночный и сжатый файлы нельзя отобразить в память,
+            # их (и отсутствующий файл) читает основной читатель
+            yield from iter_csv_files([file_path], columns, converters, where)
+            continue
+
+        profiling.count("files_read")
+        profiling.count("bytes_read", os.path.getsize(file_path))
+        if os.path.getsize(file_path) == 0:
+            continue
+
+        with open(file_path, "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                header, data_start = _read_header(buffer)
+                chunk = CsvChunk(file_path, header, data_start, len(buffer))
+                yield from _iter_projected(buffer, chunk, columns, converters, where)
+
+
+def iter_mmap_chunk(
+    chunk: CsvChunk,
+    columns: Optional[Sequence[str]] = None,
+    converters: Optional[Converters] = None,
+    where: Sequence[Condition] = (),
+) -> Iterator[Any]:
+    """Построчно читает диапазон байтов CSV файла через mmap"""
+
+    profiling.count("bytes_read", chunk.end - chunk.start)
+    with open(chunk.file_path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield from _iter_projected(buffer, chunk, columns, converters, where)
@@ -0,0 +1,550 @@
+import os
+from itertools import chain, islice, repeat
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from reports.base_report import BaseReport
+from utils import profiling
+from utils.cache import FileCache, projection_kind, state_kind
+from utils.columnar import ColumnsBuilder, iter_encoded_rows
+from utils.compression import detect_compression
+from utils.dataset import is_dataset
+from utils.discovery import expand_inputs
+from utils.file_index import may_match, select_chunks
+from utils.file_reader import CsvChunk, read_csv_header, split_csv_file
+from utils.filters import Condition
+from utils.incremental import IncrementalStore, Progress, plan_increment
+from utils.profiling import Profiler
+from utils.readers import ReadOptions, iter_chunk_rows, iter_rows
+from utils.spill import SPILL_CHECK_ROWS, GroupSpill
+
+# Файлы больше этого размера разбиваются на части для разных процессов
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024
+
+# Сколько задач на процесс находится в пуле одновременно
+TASKS_PER_JOB = 2
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+
+Task = Union[str, CsvChunk]
+
+
+class FilePlan(NamedTuple):
+    """План разбора одного файла"""
+
+    file_path: str
+    # Уже известные has_rows и состояние (у файла, который не разбирается)
+    known: Optional[Tuple[bool, Any]]
+    # Задачи, результаты которых добавляются к known
+    tasks: List[Task]
+    # Прогресс, который сохраняется после разбора в инкрементальном режиме
+    progress: Optional[Progress] = None
+    # Задачи, которые учитываются в результате, но не в сохраняемом прогрессе
+    tail: Sequence[Task] = ()
+    # Состояние файла есть в кэше и загружается при объединении
+    cached: bool = False
+    # Сохранённый прогресс, состояние которого загружается при объединении
+    saved: Optional[Progress] = None
+
+
+class AggregateOptions(NamedTuple):
+    """Параметры разбора файлов в aggregate_files"""
+
+    # Количество процессов; при 1 задачи выполняются в текущем процессе
+    jobs: int = 1
+    # Файлы больше этого размера (байт) делятся на части
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+    reader: str = "csv"
+    cache: Optional[FileCache] = None
+    # Прогресс чтения дописываемых файлов (инкрементальный режим)
+    progress_store: Optional[IncrementalStore] = None
+    # Предел памяти таблиц групп (общей, файлов и задач) в байтах
+    memory_limit: Optional[int] = None
+
+
+def accumulate_rows(
+    report: BaseReport, rows: Iterable[Any], memory_limit: Optional[int] = None
+) -> Tuple[bool, Any]:
+    """
+    Агрегирует строки в новое частичное состояние отчёта
+
+    С memory_limit (байт; только для отчётов-группировок) строки
+    передаются отчёту порциями по SPILL_CHECK_ROWS, и таблица групп,
+    превысившая предел, сбрасывается на диск (utils.spill.GroupSpill).
+
+    Returns:
+        Пара (были ли строки, частичное состояние отчёта).
+    """
+
+    data = iter(rows)
+    first_row = next(data, None)
+    state = report.initial_state()
+
+    if first_row is None:
+        return False, state
+
+    data = chain([first_row], data)
+    if memory_limit is None:
+        return True, report.accumulate(state, data)
+
+    spill = GroupSpill(memory_limit)
+    spill.table = state
+    while batch := list(islice(data, SPILL_CHECK_ROWS)):
+        spill.table = report.accumulate(spill.table, batch)
+        spill.check()
+    return True, spill.result()
+
+
+def _collect(builder: ColumnsBuilder, rows: Iterable[tuple]) -> Iterator[tuple]:
+    """Пропускает строки дальше, попутно складывая их в колонки"""
+
+    for row in rows:
+        builder.add(row)
+        yield row
+
+
+def aggregate_file(
+    report: BaseReport,
+    file_path: str,
+    reader: str = "csv",
+    cache: Optional[FileCache] = None,
+    memory_limit: Optional[int] = None,
+) -> Tuple[bool, Any]:
+    """
+    Агрегирует один CSV файл в частичное состояние отчёта
+
+    Если передан кэш и отчёт объявляет columns, колонки файла берутся
+    из кэша, а при промахе сохраняются в него после разбора.
+    memory_limit передаётся accumulate_rows.
+
+    Returns:
+        Пара (были ли в файле строки, частичное состояние отчёта).
+    """
+
+    rows = iter_rows(
+        [file_path],
+        ReadOptions(reader),
+        report.columns,
+        report.converters,
+        report.where,
+    )
+    if cache is None or report.columns is None:
+        return accumulate_rows(report, rows, memory_limit)
+
+    kind = projection_kind(report)
+    columns = cache.load(file_path, kind)
+    if columns is not None:
+        profiling.count("cache_hits")
+        return accumulate_rows(report, iter_encoded_rows(columns), memory_limit)
+
+    builder = ColumnsBuilder(len(report.columns))
+    result = accumulate_rows(report, _collect(builder, rows), memory_limit)
+    cache.store(file_path, kind, builder.encode())
+    return result
+
+
+def aggregate_chunk(
+    report: BaseReport,
+    chunk: CsvChunk,
+    reader: str = "csv",
+    memory_limit: Optional[int] = None,
+) -> Tuple[bool, Any]:
+    """Агрегирует диапазон байтов CSV файла в частичное состояние отчёта"""
+
+    return accumulate_rows(
+        report,
+        iter_chunk_rows(chunk, reader, report.columns, report.converters, report.where),
+        memory_limit,
+    )
+
+
+def _aggregate_task(
+    report: BaseReport, options: AggregateOptions, task: Task
+) -> Tuple[bool, Any]:
+    """Агрегирует задачу: целый файл или его часть"""
+
+    if isinstance(task, CsvChunk):
+        return aggregate_chunk(report, task, options.reader, options.memory_limit)
+    return aggregate_file(
+        report, task, options.reader, options.cache, options.memory_limit
+    )
+
+
+def _profiled_task(
+    report: BaseReport, options: AggregateOptions, task: Task
+) -> Tuple[Tuple[bool, Any], Optional[Profiler]]:
+    """Агрегирует задачу в рабочем процессе, собирая её профиль"""
+
+    profiling.enable()
+    try:
+        result = _aggregate_task(report, options, task)
+    finally:
+        profiler = profiling.disable()
+    return result, profiler
+
+
+def _merge_profiles(
+    results: Iterator[Tuple[Tuple[bool, Any], Optional[Profiler]]],
+    profiler: Profiler,
+) -> Iterator[Tuple[bool, Any]]:
+    """Отдаёт результаты задач, добавляя их профили к профилю родителя"""
+
+    for result, task_profiler in results:
+        if task_profiler is not None:
+            profiler.merge(task_profiler)
+        yield result
+
+
+def is_plain_csv(file_path: str) -> bool:
+    """Проверяет, что файл - несжатый CSV, который можно делить по байтам"""
+
+    return not is_dataset(file_path) and detect_compression(file_path) is None
+
+
+def task_size(task: Task) -> int:
+    """Размер задачи в байтах: части файла или всего файла"""
+
+    if isinstance(task, CsvChunk):
+        return task.end - task.start
+    return os.path.getsize(task) if os.path.exists(task) else 0
+
+
+def plan_tasks(
+    file_paths: Iterable[str],
+    chunk_size: int,
+    where: Sequence[Condition] = (),
+) -> Iterator[Task]:
+    """
+    Разбивает CSV файлы больше chunk_size на части, остальные отдаёт целиком
+
+    Файлы в колоночном формате и сжатые файлы всегда разбираются целиком.
+    У файла с индексом (utils.file_index) части собираются из его блоков
+    без поиска границ записей, а блоки без строк под условия where
+    пропускаются.
+    """
+
+    for file_path in file_paths:
+        chunks = select_chunks(file_path, where, chunk_size)
+        if chunks is not None:
+            yield from chunks
+        elif (
+            os.path.exists(file_path)
+            and os.path.getsize(file_path) > chunk_size
+            and is_plain_csv(file_path)
+        ):
+            yield from split_csv_file(file_path, chunk_size)
+        else:
+            yield file_path
+
+
+def _plan_files(
+    report: BaseReport, file_paths: Iterable[str], options: AggregateOptions
+) -> List[FilePlan]:
+    """
+    Составляет план разбора файлов
+
+    Файлы, которые по индексу не содержат строк под условия отчёта,
+    не разбираются. В инкрементальном режиме разбирается только
+    дописанный хвост несжатых CSV файлов (сохранённое состояние
+    загружает _merge_results).
+    Иначе файлы с состоянием в кэше не разбираются (состояние только
+    проверяется, загружает его _merge_results), файлы с колонками в кэше
+    не делятся на части, остальные большие файлы делятся по chunk_size.
+    """
+
+    cache = options.cache
+    plans: List[FilePlan] = []
+    for file_path in file_paths:
+        if report.where and not may_match(file_path, report.where):
+            profiling.count("files_skipped")
+            plans.append(FilePlan(file_path, (False, report.initial_state()), []))
+            continue
+
+        if options.progress_store is not None and is_plain_csv(file_path):
+            saved, chunks, tail, progress = plan_increment(
+                file_path, report, options.progress_store, options.chunk_size
+            )
+            plans.append(
+                FilePlan(file_path, None, list(chunks), progress, tail, saved=saved)
+            )
+            continue
+
+        if cache is not None and cache.contains(file_path, state_kind(report)):
+            plans.append(FilePlan(file_path, None, [], cached=True))
+            continue
+
+        tasks: List[Task] = list(
+            plan_tasks([file_path], options.chunk_size, report.where)
+        )
+        if cache is not None and cache.contains(file_path, projection_kind(report)):
+            tasks = [file_path]
+        plans.append(FilePlan(file_path, None, tasks))
+
+    return plans
+
+
+def _known_state(
+    report: BaseReport, plan: FilePlan, options: AggregateOptions
+) -> Tuple[bool, Any]:
+    """
+    Уже известные has_rows и состояние файла, к которым добавляются задачи
+
+    Состояние из кэша или сохранённого прогресса загружается только при
+    объединении, поэтому в памяти одновременно находится не больше одного
+    загруженного состояния файла. Если запись пропала или заменена после
+    планирования, файл (или его уже прочитанная часть) разбирается заново.
+    """
+
+    if plan.cached and options.cache is not None:
+        cached = options.cache.load(plan.file_path, state_kind(report))
+        if cached is not None:
+            profiling.count("cache_hits")
+            has_rows, state = cached
+            return has_rows, state
+        return _aggregate_task(report, options, plan.file_path)
+
+    if plan.saved is not None and options.progress_store is not None:
+        known = options.progress_store.load_state(plan.file_path, report, plan.saved)
+        if known is not None:
+            return known
+        _, header_end = read_csv_header(plan.file_path)
+        chunk = CsvChunk(
+            plan.file_path, plan.saved.header, header_end, plan.saved.offset
+        )
+        return aggregate_chunk(report, chunk, options.reader, options.memory_limit)
+
+    return plan.known or (False, report.initial_state())
+
+
+def _absorb(report: BaseReport, spill: GroupSpill, state: Any) -> None:
+    """
+    Добавляет частичное состояние к таблице групп с пределом памяти
+
+    Сброшенное на диск состояние (GroupSpill задачи или файла, в том числе
+    из рабочего процесса) добавляется порциями групп в порядке их первого
+    появления, поэтому порядок групп с равной метрикой совпадает
+    с последовательным чтением; его временные файлы затем удаляются.
+    """
+
+    if not isinstance(state, GroupSpill):
+        spill.table = report.merge(spill.table, state)
+        spill.check()
+        return
+
+    batch: Dict[Any, Any] = {}
+    try:
+        for key, _, totals in state.records():
+            # Повторная запись группы начинает новую порцию
+            if key in batch or len(batch) == SPILL_CHECK_ROWS:
+                spill.table = report.merge(spill.table, batch)
+                spill.check()
+                batch = {}
+            batch[key] = totals
+        spill.table = report.merge(spill.table, batch)
+        spill.check()
+    finally:
+        state.close()
+
+
+class _MergedState:
+    """
+    Состояние, к которому по очереди добавляются частичные состояния
+
+    С memory_limit состояние - таблица групп GroupSpill, которая
+    сбрасывается на диск при превышении предела (см. _absorb).
+    """
+
+    def __init__(
+        self, report: BaseReport, memory_limit: Optional[int], known: Tuple[bool, Any]
+    ) -> None:
+        self.report = report
+        self.has_rows, self.state = known
+        self.spill: Optional[GroupSpill] = None
+        if memory_limit is not None:
+            self.spill = GroupSpill(memory_limit)
+            if isinstance(self.state, GroupSpill):
+                _absorb(report, self.spill, self.state)
+            else:
+                self.spill.table = self.state
+
+    def add(self, has_rows: bool, state: Any) -> None:
+        """Добавляет частичное состояние"""
+
+        self.has_rows = self.has_rows or has_rows
+        if self.spill is None:
+            self.state = self.report.merge(self.state, state)
+        else:
+            _absorb(self.report, self.spill, state)
+
+    def result(self) -> Tuple[bool, Any]:
+        """Пара (были ли строки, состояние); со сбросами состояние - GroupSpill"""
+
+        if self.spill is None:
+            return self.has_rows, self.state
+        return self.has_rows, self.spill.result()
+
+
+def _save_state(
+    report: BaseReport,
+    plan: FilePlan,
+    options: AggregateOptions,
+    has_rows: bool,
+    state: Any,
+) -> None:
+    """Сохраняет состояние разобранного файла как прогресс или в кэш"""
+
+    if options.progress_store is not None and plan.progress is not None:
+        options.progress_store.save(
+            plan.file_path, report, plan.progress, has_rows, state
+        )
+    elif options.cache is not None and plan.known is None and not plan.cached:
+        options.cache.store(plan.file_path, state_kind(report), (has_rows, state))
+
+
+def _merge_results(
+    report: BaseReport,
+    plans: List[FilePlan],
+    results: Iterator[Tuple[bool, Any]],
+    options: AggregateOptions,
+) -> Tuple[bool, Any]:
+    """
+    Объединяет результаты задач по файлам, а файлы - в общее состояние
+
+    Уже известное состояние файла (из кэша или сохранённого прогресса)
+    загружается и добавляется к общему, когда до файла доходит очередь.
+    С options.memory_limit и общее состояние, и состояния файлов - таблицы
+    групп, которые сбрасываются на диск при превышении предела; сброшенное
+    состояние файла не кэшируется и не сохраняется как прогресс.
+    """
+
+    total = _MergedState(report, options.memory_limit, (False, report.initial_state()))
+    for plan in plans:
+        merged = _MergedState(
+            report, options.memory_limit, _known_state(report, plan, options)
+        )
+        for _ in plan.tasks:
+            merged.add(*next(results))
+
+        file_has_rows, file_state = merged.result()
+        # Файлы сброшенного на диск состояния временные, его не сохранить
+        if not isinstance(file_state, GroupSpill):
+            _save_state(report, plan, options, file_has_rows, file_state)
+
+        # Недописанная запись входит в результат, но не в сохранённый прогресс
+        for _ in plan.tail:
+            merged.add(*next(results))
+
+        total.add(*merged.result())
+
+    return total.result()
+
+
+def aggregate_files(
+    report: BaseReport,
+    file_paths: Iterable[str],
+    options: AggregateOptions = AggregateOptions(),
+) -> Tuple[bool, Any]:
+    """
+    Агрегирует несколько CSV файлов, разбирая их в пуле процессов
+
+    Каждый файл (или часть большого файла) разбирается и агрегируется
+    в отдельном процессе, в родительский процесс возвращаются только
+    частичные состояния. Состояния объединяются в порядке файлов и частей,
+    поэтому итоговый отчёт совпадает с последовательным чтением.
+    Задачи отправляются в пул окном (см. _submit_tasks), первые - от больших
+    к меньшим, чтобы крупный файл не достался процессу последним.
+    При options.jobs == 1 задачи выполняются в текущем процессе.
+    file_paths раскрываются expand_inputs.
+    С options.progress_store файлы читаются инкрементально: разбирается
+    только дописанный с прошлого запуска хвост. С включённым профилированием
+    профили рабочих процессов добавляются к профилю родителя.
+    options.memory_limit ограничивает таблицы групп задач, файлов и общую
+    (см. _merge_results), а число задач в пуле - TASKS_PER_JOB на процесс.
+    """
+
+    with profiling.stage("plan"):
+        plans = _plan_files(report, expand_inputs(file_paths), options)
+    tasks = [task for plan in plans for task in chain(plan.tasks, plan.tail)]
+
+    results: Iterator[Tuple[bool, Any]]
+    if options.jobs == 1:
+        results = map(_aggregate_task, repeat(report), repeat(options), tasks)
+        result = _merge_results(report, plans, results, options)
+    else:
+        # concurrent.futures тянет за собой logging и multiprocessing,
+        # поэтому импортируется, только когда нужны процессы
+        # pylint: disable-next=import-outside-toplevel
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=options.jobs) as executor:
+            results = _submit_tasks(executor, report, tasks, options)
+            result = _merge_results(report, plans, results, options)
+
+    if options.cache is not None:
+        options.cache.evict()
+    return result
+
+
+def _submit_tasks(
+    executor: "Executor",
+    report: BaseReport,
+    tasks: List[Task],
+    options: AggregateOptions,
+) -> Iterator[Tuple[bool, Any]]:
+    """
+    Отправляет задачи в пул, держа в нём не больше jobs * TASKS_PER_JOB задач
+
+    Первые задачи отправляются от больших к меньшим, следующие - по мере
+    того, как забираются результаты, поэтому готовые, но ещё не объединённые
+    состояния не копятся в памяти.
+
+    Returns:
+        Результаты задач в исходном порядке; с включённым профилированием
+        профили рабочих процессов добавляются к профилю родителя.
+    """
+
+    profiler = profiling.get_profiler()
+    function = _aggregate_task if profiler is None else _profiled_task
+    outcomes = _windowed_results(executor, function, report, tasks, options)
+    if profiler is None:
+        return outcomes
+    return _merge_profiles(outcomes, profiler)
+
+
+def _windowed_results(
+    executor: "Executor",
+    function: Callable[..., Any],
+    report: BaseReport,
+    tasks: List[Task],
+    options: AggregateOptions,
+) -> Iterator[Any]:
+    """Результаты задач в исходном порядке из окна отправленных задач"""
+
+    window = options.jobs * TASKS_PER_JOB
+    futures: Dict[int, "Future[Any]"] = {}
+    for index in sorted(
+        range(min(window, len(tasks))),
+        key=lambda index: task_size(tasks[index]),
+        reverse=True,
+    ):
+        futures[index] = executor.submit(function, report, options, tasks[index])
+
+    for index in range(len(tasks)):
+        if index + window < len(tasks):
+            futures[index + window] = executor.submit(
+                function, report, options, tasks[index + window]
+            )
+        yield futures.pop(index).result()
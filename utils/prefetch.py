@@ -0,0 +1,149 @@
+import io
+import os
+import queue
+import threading
+from collections import deque
+from typing import Any, Deque, Generator, Iterable, Optional, Tuple
+
+from utils import profiling
+from utils.compression import open_input
+from utils.dataset import is_dataset
+
+# Размер блока, которым потоки читают файлы
+PREFETCH_BLOCK_SIZE = 4 * 1024 * 1024
+
+# Сколько прочитанных блоков каждого файла может ждать разбора
+PREFETCH_BLOCKS = 4
+
+# Метка файла в колоночном формате: он читается через mmap, а не потоком
+_DATASET = object()
+
+# Как часто поток чтения проверяет, не остановлена ли загрузка, в секундах
+_STOP_CHECK_INTERVAL = 0.1
+
+
+class _BlocksReader(io.RawIOBase):
+    """Поток байтов файла из очереди блоков, которые читает другой поток"""
+
+    def __init__(self, blocks: "queue.Queue[Any]", first: bytes) -> None:
+        super().__init__()
+        self._blocks = blocks
+        self._block = memoryview(first)
+        self._finished = not first
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        while not self._block and not self._finished:
+            block = self._blocks.get()
+            if isinstance(block, BaseException):
+                raise block
+            self._finished = not block
+            self._block = memoryview(block)
+            profiling.count("bytes_read", len(block))
+
+        size = min(len(buffer), len(self._block))
+        buffer[:size] = self._block[:size]
+        self._block = self._block[size:]
+        return size
+
+
+def _put(blocks: "queue.Queue[Any]", item: Any, stop: threading.Event) -> bool:
+    """Кладёт блок в очередь, ожидая места; False - загрузка остановлена"""
+
+    while not stop.is_set():
+        try:
+            blocks.put(item, timeout=_STOP_CHECK_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _fetch(
+    file_path: str, blocks: "queue.Queue[Any]", block_size: int, stop: threading.Event
+) -> None:
+    """
+    Читает файл блоками в очередь
+
+    Сжатые файлы распаковываются здесь же, параллельно с разбором
+    предыдущих файлов. Пустой блок означает конец файла. Ошибка чтения
+    или распаковки кладётся в очередь и поднимается в потоке разбора,
+    когда он дойдёт до этого файла.
+    """
+
+    try:
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Файл {file_path} не существует")
+
+        if is_dataset(file_path):
+            _put(blocks, _DATASET, stop)
+            return
+
+        with open_input(file_path) as file:
+            while block := file.read(block_size):
+                if not _put(blocks, block, stop):
+                    return
+        _put(blocks, b"", stop)
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        # Любую ошибку (в том числе распаковки) поднимает поток разбора;
+        # иначе он бесконечно ждал бы следующего блока
+        _put(blocks, error, stop)
+
+
+def prefetch_files(
+    file_paths: Iterable[str],
+    threads: int,
+    block_size: int = PREFETCH_BLOCK_SIZE,
+    blocks: int = PREFETCH_BLOCKS,
+) -> Generator[Tuple[str, Optional[io.BufferedReader]], None, None]:
+    """
+    Читает файлы в пуле потоков с упреждением
+
+    Одновременно читается не больше threads файлов, для каждого в памяти
+    держится не больше blocks блоков. Файлы отдаются в исходном порядке
+    парами (путь, двоичный поток), пока следующие файлы читаются в фоне.
+    Для файлов в колоночном формате вместо потока отдаётся None.
+    Отсутствующий файл поднимает FileNotFoundError, когда до него доходит
+    очередь, как при последовательном чтении.
+    """
+
+    stop = threading.Event()
+    pending: Deque[Tuple[str, "queue.Queue[Any]"]] = deque()
+    paths = iter(file_paths)
+
+    # concurrent.futures тянет за собой logging, поэтому импортируется,
+    # только когда включено упреждающее чтение
+    # pylint: disable-next=import-outside-toplevel
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+
+        def submit() -> None:
+            file_path = next(paths, None)
+            if file_path is not None:
+                file_blocks: "queue.Queue[Any]" = queue.Queue(maxsize=blocks)
+                executor.submit(_fetch, file_path, file_blocks, block_size, stop)
+                pending.append((file_path, file_blocks))
+
+        try:
+            for _ in range(threads):
+                submit()
+
+            while pending:
+                file_path, file_blocks = pending.popleft()
+                submit()
+
+                first = file_blocks.get()
+                if isinstance(first, BaseException):
+                    raise first
+                if first is _DATASET:
+                    yield file_path, None
+                    continue
+
+                profiling.count("files_read")
+                profiling.count("bytes_read", len(first))
+                yield file_path, io.BufferedReader(_BlocksReader(file_blocks, first))
+        finally:
+            stop.set()
@@ -0,0 +1,216 @@
+import cProfile
+import io
+import json
+import sys
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+from typing import Any, ContextManager, Dict, Iterable, Iterator, Optional
+
+# Форматы вывода профиля для --profile
+PROFILE_FORMATS = ["text", "json", "cprofile"]
+
+
+class Profiler:
+    """
+    Именованные таймеры и счётчики этапов обработки
+
+    Таймеры накапливают секунды, счётчики - целые значения. Профили
+    из рабочих процессов объединяются с профилем родителя через merge().
+    """
+
+    def __init__(self) -> None:
+        self.timers: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+
+    def add_time(self, name: str, seconds: float) -> None:
+        """Добавляет время к таймеру"""
+
+        self.timers[name] = self.timers.get(name, 0.0) + seconds
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Увеличивает счётчик"""
+
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Замеряет время выполнения блока"""
+
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, perf_counter() - started)
+
+    def merge(self, other: "Profiler") -> None:
+        """Добавляет таймеры и счётчики другого профиля"""
+
+        for name, seconds in other.timers.items():
+            self.add_time(name, seconds)
+        for name, value in other.counters.items():
+            self.count(name, value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Возвращает таймеры и счётчики
+
+        rows_read - все разобранные записи: принятые и отброшенные.
+        """
+
+        counters = dict(self.counters)
+        if "rows_accepted" in counters or "rows_dropped" in counters:
+            counters["rows_read"] = counters.get("rows_accepted", 0) + counters.get(
+                "rows_dropped", 0
+            )
+        return {"timers": dict(self.timers), "counters": counters}
+
+    def format_text(self) -> str:
+        """Форматирует разбивку по этапам для вывода в консоль"""
+
+        profile = self.to_dict()
+        lines = ["Этапы, с:"]
+        lines.extend(
+            f"  {name:<16} {seconds:10.4f}"
+            for name, seconds in profile["timers"].items()
+        )
+        lines.append("Счётчики:")
+        lines.extend(
+            f"  {name:<16} {value:10d}"
+            for name, value in sorted(profile["counters"].items())
+        )
+        return "\n".join(lines)
+
+    def format_json(self) -> str:
+        """Форматирует профиль как JSON"""
+
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+
+def write_profile(
+    profiler: Profiler,
+    profile_format: str,
+    output: Optional[str] = None,
+    stats: Optional[cProfile.Profile] = None,
+) -> None:
+    """
+    Выводит профиль в stderr или сохраняет его в файл output
+
+    text - разбивка по этапам, json - таймеры и счётчики в JSON,
+    cprofile - статистика cProfile по функциям; в файл она сохраняется
+    в двоичном формате pstats.
+    """
+
+    if profile_format == "cprofile" and stats is not None:
+        if output:
+            stats.dump_stats(output)
+            return
+        # pstats нужен только для текстового вывода cProfile
+        # pylint: disable-next=import-outside-toplevel
+        import pstats
+
+        text = io.StringIO()
+        pstats.Stats(stats, stream=text).sort_stats("cumulative").print_stats(25)
+        content = text.getvalue()
+    elif profile_format == "json":
+        content = profiler.format_json()
+    else:
+        content = profiler.format_text()
+
+    if output:
+        with open(output, "w", encoding="utf-8") as file:
+            file.write(content + "\n")
+    else:
+        print(content, file=sys.stderr)
+
+
+class _ProcessProfile:
+    """Профиль текущего процесса; profiler None - профилирование выключено"""
+
+    def __init__(self) -> None:
+        self.profiler: Optional[Profiler] = None
+
+    def enable(self) -> Profiler:
+        """Начинает новый профиль"""
+
+        profiler = self.profiler = Profiler()
+        return profiler
+
+    def disable(self) -> Optional[Profiler]:
+        """Завершает профиль и возвращает его"""
+
+        profiler, self.profiler = self.profiler, None
+        return profiler
+
+
+_CURRENT = _ProcessProfile()
+
+
+def enable() -> Profiler:
+    """Включает профилирование в текущем процессе"""
+
+    return _CURRENT.enable()
+
+
+def disable() -> Optional[Profiler]:
+    """Выключает профилирование и возвращает собранный профиль"""
+
+    return _CURRENT.disable()
+
+
+def get_profiler() -> Optional[Profiler]:
+    """Возвращает профиль текущего процесса, если профилирование включено"""
+
+    return _CURRENT.profiler
+
+
+def count(name: str, value: int = 1) -> None:
+    """Увеличивает счётчик; без включённого профилирования ничего не делает"""
+
+    profiler = _CURRENT.profiler
+    if profiler is not None:
+        profiler.count(name, value)
+
+
+def stage(name: str) -> ContextManager[None]:
+    """Замеряет время блока; без профилирования возвращает пустой контекст"""
+
+    profiler = _CURRENT.profiler
+    if profiler is None:
+        return nullcontext()
+    return profiler.stage(name)
+
+
+def instrument_rows(rows: Iterable[Any]) -> Iterable[Any]:
+    """
+    Считает строки читателя и время их получения
+
+    Без профилирования возвращает rows без обёртки, поэтому
+    на каждую строку не тратится ни одного лишнего вызова.
+    """
+
+    profiler = _CURRENT.profiler
+    if profiler is None:
+        return rows
+    return _timed_rows(rows, profiler)
+
+
+def _timed_rows(rows: Iterable[Any], profiler: Profiler) -> Iterator[Any]:
+    """Отдаёт строки, накапливая время чтения и количество строк"""
+
+    iterator = iter(rows)
+    accepted = 0
+    seconds = 0.0
+    try:
+        while True:
+            started = perf_counter()
+            try:
+                row = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                seconds += perf_counter() - started
+            accepted += 1
+            yield row
+    finally:
+        profiler.add_time("read", seconds)
+        profiler.count("rows_accepted", accepted)
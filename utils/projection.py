@@ -0,0 +1,206 @@
+from enum import Enum
+from operator import itemgetter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from utils import profiling
+from utils.filters import Condition, make_row_filter
+
+# Преобразования значений колонок: имя колонки -> функция от строки
+Converters = Mapping[str, Callable[[str], Any]]
+
+# Функция, превращающая поля записи в кортеж колонок или None
+RowProjector = Callable[[Sequence[str]], Optional[tuple]]
+
+
+class _Marker(Enum):
+    """Значение нестрогой колонки, которого нет или которое не удалось преобразовать"""
+
+    # Член Enum распаковывается из кэша колонок тем же объектом
+    INVALID = "invalid"
+
+
+INVALID = _Marker.INVALID
+
+
+class Lenient:
+    """
+    Нестрогая колонка: её ошибки не отбрасывают запись
+
+    Если поля нет (короткая запись или колонки нет в файле) или
+    преобразование convert не удалось, значение колонки - INVALID,
+    а остальные колонки записи отдаются как обычно.
+    """
+
+    def __init__(self, convert: Optional[Callable[[str], Any]] = None) -> None:
+        self.convert = convert
+
+    def __call__(self, value: Any) -> Any:
+        if value is None or value is INVALID:
+            return INVALID
+        if self.convert is None:
+            return value
+        try:
+            return self.convert(value)
+        except (ValueError, TypeError):
+            return INVALID
+
+    def __repr__(self) -> str:
+        # repr входит в ключ кэша (utils.cache.projection_kind)
+        name = getattr(self.convert, "__qualname__", repr(self.convert))
+        return f"lenient({name})"
+
+
+def _missing_column(_fields: Sequence[str]) -> Any:
+    """Выборка колонок, если какой-то нет в заголовке: поля записи всегда не хватает"""
+
+    raise IndexError("в заголовке нет колонки отчёта")
+
+
+def _lenient_fields(
+    indexes: Sequence[Optional[int]], strict: Sequence[bool]
+) -> Callable[[Sequence[str]], List[Any]]:
+    """Выборка полей, в которой отсутствующее поле нестрогой колонки - INVALID"""
+
+    def select(fields: Sequence[str]) -> List[Any]:
+        values: List[Any] = []
+        for index, required in zip(indexes, strict):
+            if index is not None and index < len(fields):
+                values.append(fields[index])
+            elif required:
+                raise IndexError("не хватает поля колонки отчёта")
+            else:
+                values.append(INVALID)
+        return values
+
+    return select
+
+
+def _conversions(
+    columns: Sequence[str], converters: Converters
+) -> List[Tuple[int, Callable[[Any], Any]]]:
+    """Позиции колонок и их преобразования; Lenient без convert не вызывается"""
+
+    return [
+        (position, convert)
+        for position, convert in enumerate(map(converters.get, columns))
+        if convert is not None
+        and not (isinstance(convert, Lenient) and convert.convert is None)
+    ]
+
+
+def make_projector(
+    header: Sequence[str],
+    columns: Sequence[str],
+    converters: Optional[Converters] = None,
+    where: Sequence[Condition] = (),
+) -> RowProjector:
+    """
+    Создаёт функцию проекции записи на колонки отчёта
+
+    Функция принимает список полей записи в порядке заголовка и возвращает
+    кортеж значений columns с применёнными преобразованиями. Если поля
+    не хватает или преобразование не удалось, возвращается None;
+    для колонок с преобразованием Lenient значение становится INVALID.
+    Отброшенные записи учитываются в счётчике rows_dropped профиля.
+    Условия where проверяются на исходных строках полей до преобразований,
+    не подошедшие записи возвращают None и учитываются в rows_filtered.
+    """
+
+    converters = converters or {}
+    indexes = [header.index(column) if column in header else None for column in columns]
+    strict = [not isinstance(converters.get(column), Lenient) for column in columns]
+    # Медленная выборка нужна только коротким записям и файлам без колонок
+    fallback = None if all(strict) else _lenient_fields(indexes, strict)
+
+    getter: Callable[[Sequence[str]], Any] = _missing_column
+    if None not in indexes:
+        getter = itemgetter(*indexes)
+    elif fallback is not None and all(
+        index is not None or not required for index, required in zip(indexes, strict)
+    ):
+        getter = fallback
+    single = len(columns) == 1 and None not in indexes
+    steps = _conversions(columns, converters)
+
+    def project(fields: Sequence[str]) -> Optional[tuple]:
+        try:
+            try:
+                values = [getter(fields)] if single else list(getter(fields))
+            except IndexError:
+                if fallback is None:
+                    raise
+                values = fallback(fields)
+            for position, convert in steps:
+                values[position] = convert(values[position])
+            return tuple(values)
+        except (IndexError, ValueError, TypeError):
+            profiling.count("rows_dropped")
+            return None
+
+    if not where:
+        return project
+
+    accept = make_row_filter(header, where)
+
+    def project_matching(fields: Sequence[str]) -> Optional[tuple]:
+        if not accept(fields):
+            profiling.count("rows_filtered")
+            return None
+        return project(fields)
+
+    return project_matching
+
+
+def fields_to_dict(header: Sequence[str], values: Sequence[str]) -> dict:
+    """Собирает словарь всех колонок, как csv.DictReader"""
+
+    row: Dict[Optional[str], Any] = dict(zip(header, values))
+    for name in header[len(values) :]:
+        row[name] = None
+    if len(values) > len(header):
+        row[None] = list(values[len(header) :])
+    return row
+
+
+def project_dicts(
+    rows: Iterable[dict],
+    columns: Sequence[str],
+    converters: Optional[Converters] = None,
+) -> Iterator[tuple]:
+    """
+    Превращает строки-словари в кортежи колонок, пропуская некорректные
+
+    Отсутствующее значение (None у короткой строки csv.DictReader)
+    отбрасывает строку, как нехватка поля в make_projector(), а у колонки
+    с преобразованием Lenient становится INVALID.
+    """
+
+    converters = converters or {}
+    steps = _conversions(columns, converters)
+    strict = [not isinstance(converters.get(column), Lenient) for column in columns]
+
+    for row in rows:
+        try:
+            values = [row.get(column) for column in columns]
+            for position, value in enumerate(values):
+                if value is None:
+                    if strict[position]:
+                        raise KeyError(columns[position])
+                    values[position] = INVALID
+            for position, convert in steps:
+                values[position] = convert(values[position])
+            yield tuple(values)
+        except (KeyError, ValueError, TypeError):
+            profiling.count("rows_dropped")
+            continue
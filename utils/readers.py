@@ -0,0 +1,135 @@
+from itertools import groupby
+from typing import Any, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from utils import profiling
+from utils.discovery import expand_inputs
+from utils.file_index import select_chunks
+from utils.file_reader import (
+    CsvChunk,
+    iter_csv_chunk,
+    iter_csv_files,
+    iter_csv_streams,
+)
+from utils.filters import Condition
+from utils.mmap_reader import iter_mmap_chunk, iter_mmap_files
+from utils.prefetch import prefetch_files
+from utils.projection import Converters
+
+# Доступные способы чтения CSV файлов
+READERS = ["csv", "mmap"]
+
+
+class ReadOptions(NamedTuple):
+    """Способ чтения файлов в iter_rows"""
+
+    # csv - модуль csv; mmap - разбор байтов через mmap
+    reader: str = "csv"
+    # Количество потоков упреждающего чтения файлов для читателя csv
+    io_threads: int = 1
+
+
+def _iter_files(
+    file_paths: Iterable[str],
+    options: ReadOptions,
+    columns: Optional[Sequence[str]],
+    converters: Optional[Converters],
+    where: Sequence[Condition],
+) -> Iterator[Any]:
+    """Читает файлы целиком выбранным способом"""
+
+    if options.reader == "mmap":
+        return iter_mmap_files(file_paths, columns, converters, where)
+    if options.io_threads > 1:
+        return iter_csv_streams(
+            prefetch_files(file_paths, options.io_threads), columns, converters, where
+        )
+    return iter_csv_files(file_paths, columns, converters, where)
+
+
+def _iter_pruned(
+    file_paths: Iterable[str],
+    options: ReadOptions,
+    columns: Optional[Sequence[str]],
+    converters: Optional[Converters],
+    where: Sequence[Condition],
+) -> Iterator[Any]:
+    """
+    Читает файлы, пропуская по индексам файлы и блоки без подходящих строк
+
+    Файлы, для которых индекс выбрал части, читаются по частям,
+    идущие подряд остальные файлы - обычным читателем, в том числе
+    с упреждающим чтением.
+    """
+
+    planned = ((file_path, select_chunks(file_path, where)) for file_path in file_paths)
+
+    def pruned(item: Tuple[str, Optional[List[CsvChunk]]]) -> bool:
+        return item[1] is not None
+
+    for is_pruned, group in groupby(planned, key=pruned):
+        if not is_pruned:
+            yield from _iter_files(
+                (file_path for file_path, _ in group),
+                options,
+                columns,
+                converters,
+                where,
+            )
+            continue
+
+        for _, chunks in group:
+            if chunks:
+                profiling.count("files_read")
+            for chunk in chunks or []:
+                if options.reader == "mmap":
+                    yield from iter_mmap_chunk(chunk, columns, converters, where)
+                else:
+                    yield from iter_csv_chunk(chunk, columns, converters, where)
+
+
+def iter_rows(
+    file_paths: Iterable[str],
+    options: ReadOptions = ReadOptions(),
+    columns: Optional[Sequence[str]] = None,
+    converters: Optional[Converters] = None,
+    where: Sequence[Condition] = (),
+) -> Iterable[Any]:
+    """
+    Построчно читает CSV файлы способом options.reader
+
+    csv - модуль csv; mmap - разбор байтов через mmap.
+    Без columns строки отдаются словарями всех колонок, с columns -
+    кортежами только этих колонок с применёнными converters.
+    При options.io_threads больше 1 читатель csv получает файлы из пула потоков,
+    которые читают следующие файлы, пока разбирается текущий.
+    file_paths раскрываются utils.discovery.expand_inputs: шаблоны,
+    каталоги и @манифесты обходятся по мере чтения.
+    Строки, не подходящие под условия where, отбрасываются читателем
+    до преобразования значений, а файлы и блоки файлов, которые
+    по индексу (utils.file_index) не содержат подходящих строк,
+    не читаются.
+    С включённым профилированием считаются строки и время чтения.
+    """
+
+    file_paths = expand_inputs(file_paths)
+    if where:
+        rows = _iter_pruned(file_paths, options, columns, converters, where)
+    else:
+        rows = _iter_files(file_paths, options, columns, converters, where)
+    return profiling.instrument_rows(rows)
+
+
+def iter_chunk_rows(
+    chunk: CsvChunk,
+    reader: str = "csv",
+    columns: Optional[Sequence[str]] = None,
+    converters: Optional[Converters] = None,
+    where: Sequence[Condition] = (),
+) -> Iterable[Any]:
+    """Построчно читает диапазон байтов CSV файла выбранным способом"""
+
+    if reader == "mmap":
+        rows = iter_mmap_chunk(chunk, columns, converters, where)
+    else:
+        rows = iter_csv_chunk(chunk, columns, converters, where)
+    return profiling.instrument_rows(rows)
@@ -0,0 +1,409 @@
+import io
+import os
+import pickle
+import socketserver
+import sys
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from reports.base_report import BaseReport
+from reports.report_factory import DEFAULT_ENGINE, ReportFactory
+from utils.cache import DEFAULT_CACHE_SIZE
+from utils.compression import DECOMPRESSION_ERRORS
+from utils.discovery import expand_inputs
+from utils.filters import Condition, parse_condition
+from utils.parallel import AggregateOptions, aggregate_files
+from utils.writers import OUTPUT_FORMATS
+
+# Сколько последних результатов отчётов хранится в памяти
+DEFAULT_RESULT_CACHE_SIZE = 128
+
+# Как часто проверяются изменения файлов, в секундах
+DEFAULT_WATCH_INTERVAL = 2.0
+
+# Типы содержимого ответов по формату вывода
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "tsv": "text/tab-separated-values",
+    "jsonl": "application/x-ndjson",
+}
+
+# Версия файла: размер и время изменения
+FileVersion = Tuple[int, int]
+
+
+def file_version(file_path: str) -> FileVersion:
+    """Возвращает версию файла или поднимает FileNotFoundError"""
+
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Файл {file_path} не существует") from None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class MemoryCache:
+    """
+    Кэш разобранных файлов в памяти процесса
+
+    Реализует FileCache, поэтому его можно передать в aggregate_files:
+    колонки и частичные состояния отчётов по файлам остаются в памяти
+    между запросами. Запись действительна, пока у файла те же размер
+    и время изменения. Размер записи оценивается длиной её pickle;
+    когда сумма размеров больше max_bytes, удаляются давно
+    не использованные записи. Методы можно вызывать из разных потоков.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_SIZE) -> None:
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[FileVersion, int, Any]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def load(self, file_path: str, kind: str) -> Optional[Any]:
+        """Возвращает данные или None, если записи нет или файл изменился"""
+
+        key = (os.path.abspath(file_path), kind)
+        try:
+            version = file_version(file_path)
+        except FileNotFoundError:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def contains(self, file_path: str, kind: str) -> bool:
+        """Проверяет, есть ли действительная запись"""
+
+        return self.load(file_path, kind) is not None
+
+    def store(self, file_path: str, kind: str, payload: Any) -> None:
+        """Сохраняет данные для текущей версии файла и вытесняет давние записи"""
+
+        key = (os.path.abspath(file_path), kind)
+        version = file_version(file_path)
+        size = len(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (version, size, payload)
+            self.total_bytes += size
+            self._evict()
+
+    def evict(self) -> None:
+        """Удаляет давно не использованные записи, пока кэш больше max_bytes"""
+
+        with self._lock:
+            self._evict()
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes and self._entries:
+            _, (_, size, _) = self._entries.popitem(last=False)
+            self.total_bytes -= size
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+
+    def versions(self) -> Dict[str, FileVersion]:
+        """Версии файлов, для которых есть записи"""
+
+        with self._lock:
+            return {path: entry[0] for (path, _), entry in self._entries.items()}
+
+    def invalidate(self, file_path: str) -> None:
+        """Удаляет все записи файла"""
+
+        file_path = os.path.abspath(file_path)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == file_path]:
+                self._remove(key)
+
+
+class ReportRequest(NamedTuple):
+    """Параметры запроса отчёта"""
+
+    report_name: str
+    # Пути, шаблоны, каталоги и манифесты внутри каталога данных
+    files: Tuple[str, ...]
+    engine: str = DEFAULT_ENGINE
+    offset: int = 0
+    limit: Optional[int] = None
+    where: Tuple[Condition, ...] = ()
+
+
+class ReportService:
+    """
+    Отчёты по данным, которые держатся в памяти между запросами
+
+    Разобранные колонки и частичные состояния отчётов хранятся по файлам
+    в MemoryCache, поэтому после изменения одного файла заново
+    разбирается только он. Готовые результаты хранятся в LRU кэше
+    по ключу (отчёт, движок, страница, условия, файлы и их версии).
+    Файлы читаются только внутри каталога data_root; относительные
+    пути запроса отсчитываются от него. Блокировка берётся только
+    на обращения к кэшу результатов, поэтому отчёты строятся
+    параллельно, а готовые не ждут построения других.
+    """
+
+    def __init__(
+        self,
+        reader: str = "csv",
+        result_cache_size: int = DEFAULT_RESULT_CACHE_SIZE,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        data_root: str = ".",
+    ) -> None:
+        self.reader = reader
+        self.result_cache_size = result_cache_size
+        self.data_root = os.path.realpath(data_root)
+        self.cache = MemoryCache(cache_size)
+        self._results: "OrderedDict[Tuple[Any, ...], dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve_files(self, file_specs: Iterable[str]) -> List[str]:
+        """
+        Раскрывает пути запроса в пути файлов внутри каталога данных
+
+        Путь, шаблон, каталог или манифест вне data_root (в том числе
+        по символической ссылке), а также файл, который после раскрытия
+        оказался вне него, поднимают PermissionError. Манифест проверяется
+        до чтения, чтобы его строки не попали в сообщения об ошибках.
+        """
+
+        specs = []
+        for spec in file_specs:
+            manifest = spec.startswith("@")
+            path = os.path.normpath(
+                os.path.join(self.data_root, spec[1:] if manifest else spec)
+            )
+            self._check_inside(os.path.realpath(path), spec)
+            specs.append("@" + path if manifest else path)
+
+        file_paths = [os.path.abspath(path) for path in expand_inputs(specs)]
+        for file_path in file_paths:
+            self._check_inside(os.path.realpath(file_path), file_path)
+        return file_paths
+
+    def _check_inside(self, path: str, spec: str) -> None:
+        if os.path.commonpath([self.data_root, path]) != self.data_root:
+            raise PermissionError(f"Путь вне каталога данных: {spec}")
+
+    def run_report(self, request: ReportRequest) -> Tuple[BaseReport, dict]:
+        """
+        Строит отчёт по файлам или берёт его из кэша результатов
+
+        Returns:
+            Пара (отчёт, результат finalize()); результат пустой,
+            если в файлах нет данных.
+        """
+
+        report = ReportFactory.get_report(request.report_name, request.engine)
+        report.offset = request.offset
+        report.limit = request.limit
+        report.where = request.where
+
+        file_paths = self.resolve_files(request.files)
+        key = (
+            request._replace(files=()),
+            tuple((path, file_version(path)) for path in file_paths),
+        )
+
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+                return report, result
+
+        # Файлы не делятся на части: целиком они попадают в кэш колонок
+        has_rows, state = aggregate_files(
+            report,
+            file_paths,
+            AggregateOptions(
+                chunk_size=sys.maxsize, reader=self.reader, cache=self.cache
+            ),
+        )
+        result = report.finalize(state) if has_rows else {}
+
+        with self._lock:
+            self._results[key] = result
+            while len(self._results) > self.result_cache_size:
+                self._results.popitem(last=False)
+        return report, result
+
+    def refresh(self) -> List[str]:
+        """
+        Удаляет данные изменившихся и удалённых файлов
+
+        Returns:
+            Пути изменившихся файлов.
+        """
+
+        changed = []
+        for file_path, version in self.cache.versions().items():
+            try:
+                current: Optional[FileVersion] = file_version(file_path)
+            except FileNotFoundError:
+                current = None
+            if current != version:
+                changed.append(file_path)
+                self.cache.invalidate(file_path)
+
+        changed_paths = set(changed)
+        with self._lock:
+            stale = [
+                key
+                for key in self._results
+                if any(path in changed_paths for path, _ in key[-1])
+            ]
+            for key in stale:
+                del self._results[key]
+        return changed
+
+
+class FileWatcher(threading.Thread):
+    """Поток, который раз в interval секунд проверяет изменения файлов"""
+
+    def __init__(self, service: ReportService, interval: float) -> None:
+        super().__init__(daemon=True)
+        self.service = service
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.service.refresh()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+class ReportRequestHandler(BaseHTTPRequestHandler):
+    """
+    Обработчик запросов GET /report
+
+    Параметры запроса: report, files и where (можно повторять), engine,
+    top или limit, offset и format (grid, csv, tsv, jsonl, text).
+    Файлы вне каталога данных сервиса дают ответ 403, повреждённые
+    или обрезанные сжатые файлы - ответ 400.
+    """
+
+    server: Any
+
+    def address_string(self) -> str:
+        # У Unix сокета нет адреса клиента
+        if isinstance(self.client_address, tuple):
+            return str(self.client_address[0])
+        return "unix"
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name  # имя из http.server
+        url = urlsplit(self.path)
+        if url.path != "/report":
+            self._respond(HTTPStatus.NOT_FOUND, f"Неизвестный адрес: {url.path}")
+            return
+
+        params = parse_qs(url.query)
+        try:
+            report_name = _single(params, "report")
+            files = params.get("files")
+            if report_name is None or not files:
+                raise ValueError("Нужны параметры report и files")
+            output_format = _single(params, "format") or "grid"
+            if output_format not in OUTPUT_FORMATS:
+                raise ValueError(f"Неизвестный формат вывода: {output_format}")
+
+            report, result = self.server.service.run_report(
+                ReportRequest(
+                    report_name,
+                    tuple(files),
+                    _single(params, "engine") or DEFAULT_ENGINE,
+                    _number(params, "offset", 0) or 0,
+                    _number(params, "top") or _number(params, "limit"),
+                    tuple(parse_condition(text) for text in params.get("where", [])),
+                )
+            )
+            body = io.StringIO()
+            if result:
+                report.write_report(result, output_format, body)
+            else:
+                print("Нет данных для анализа", file=body)
+        except FileNotFoundError as e:
+            self._respond(HTTPStatus.NOT_FOUND, str(e))
+            return
+        except PermissionError as e:
+            self._respond(HTTPStatus.FORBIDDEN, str(e))
+            return
+        except ValueError as e:
+            self._respond(HTTPStatus.BAD_REQUEST, str(e))
+            return
+        except DECOMPRESSION_ERRORS as e:
+            self._respond(HTTPStatus.BAD_REQUEST, f"Ошибка в данных: {e}")
+            return
+        except (KeyError, TypeError, IOError) as e:
+            self._respond(HTTPStatus.INTERNAL_SERVER_ERROR, str(e))
+            return
+
+        self._respond(HTTPStatus.OK, body.getvalue(), CONTENT_TYPES.get(output_format))
+
+    def _respond(
+        self, status: HTTPStatus, text: str, content_type: Optional[str] = None
+    ) -> None:
+        data = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header(
+            "Content-Type", f"{content_type or 'text/plain'}; charset=utf-8"
+        )
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _single(params: Dict[str, List[str]], name: str) -> Optional[str]:
+    """Последнее значение параметра запроса"""
+
+    values = params.get(name)
+    return values[-1] if values else None
+
+
+def _number(params: Dict[str, List[str]], name: str, minimum: int = 1) -> Optional[int]:
+    """Целый параметр запроса не меньше minimum"""
+
+    value = _single(params, name)
+    if value is None:
+        return None
+    try:
+        number = int(value)
+    except ValueError as exc:
+        raise ValueError(f"Параметр {name} должен быть целым числом: {value}") from exc
+    if number < minimum:
+        raise ValueError(f"Параметр {name} должен быть не меньше {minimum}")
+    return number
+
+
+class ReportHTTPServer(ThreadingHTTPServer):
+    """HTTP сервер отчётов на TCP порту"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], service: ReportService) -> None:
+        super().__init__(address, ReportRequestHandler)
+        self.service = service
+
+
+class ReportUnixServer(socketserver.ThreadingUnixStreamServer):
+    """HTTP сервер отчётов на Unix сокете"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, service: ReportService) -> None:
+        super().__init__(socket_path, ReportRequestHandler)
+        self.service = service
@@ -0,0 +1,334 @@
+import hashlib
+import math
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Точность HyperLogLog: от 2^4 до 2^18 регистров
+MIN_PRECISION = 4
+MAX_PRECISION = 18
+
+
+class SpaceSaving:
+    """
+    Сводка самых частых ключей (Space-Saving) с суммами значений
+
+    Для каждого отслеживаемого ключа хранятся [сумма, количество, ошибка]:
+    сумма и количество значений, увиденных с момента, когда ключ попал
+    в таблицу, и ошибка - сколько вхождений ключа могло быть пропущено
+    до этого. Когда ключей становится больше 2 * capacity, остаются
+    capacity ключей с наибольшей оценкой количества (количество + ошибка),
+    а threshold запоминает наибольшую оценку отброшенных. Поэтому ошибка
+    любого ключа не больше threshold, а threshold не больше N / capacity,
+    где N - число значений. Сводки объединяются через merge().
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.entries: Dict[Any, List[int]] = {}
+        self.threshold = 0
+
+    def add(self, key: Any, value: int) -> bool:
+        """Добавляет значение ключа; True, если ключ только что попал в таблицу"""
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            entry[0] += value
+            entry[1] += 1
+            return False
+
+        self.entries[key] = [value, 1, self.threshold]
+        if len(self.entries) > 2 * self.capacity:
+            self._prune()
+        return True
+
+    def _prune(self) -> None:
+        """Оставляет capacity ключей с наибольшей оценкой количества"""
+
+        estimates = sorted(entry[1] + entry[2] for entry in self.entries.values())
+        cutoff = estimates[-self.capacity]
+        # Отбрасываются ключи с наименьшими оценками, наибольшая из них - эта
+        self.threshold = max(self.threshold, estimates[-self.capacity - 1])
+
+        kept = {
+            key: entry
+            for key, entry in self.entries.items()
+            if entry[1] + entry[2] > cutoff
+        }
+        for key, entry in self.entries.items():
+            if len(kept) == self.capacity:
+                break
+            if entry[1] + entry[2] == cutoff:
+                kept[key] = entry
+        self.entries = kept
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        """
+        Добавляет сводку other
+
+        Ключ, которого нет в одной из сводок, мог встретиться в её данных
+        не больше её threshold раз, это добавляется к его ошибке.
+        """
+
+        for key, entry in self.entries.items():
+            if key not in other.entries:
+                entry[2] += other.threshold
+
+        for key, (total, count, error) in other.entries.items():
+            known = self.entries.get(key)
+            if known is None:
+                self.entries[key] = [total, count, error + self.threshold]
+            else:
+                known[0] += total
+                known[1] += count
+                known[2] += error
+
+        self.threshold += other.threshold
+        if len(self.entries) > 2 * self.capacity:
+            self._prune()
+        return self
+
+
+def _hash64(value: Any) -> int:
+    """64-битный хэш, одинаковый во всех процессах"""
+
+    digest = hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+class HyperLogLog:
+    """
+    Оценка числа различных значений (HyperLogLog)
+
+    Относительная стандартная ошибка примерно 1.04 / sqrt(2^precision).
+    Сводки объединяются поэлементным максимумом регистров, сводка
+    с большей точностью при объединении сворачивается до меньшей.
+    """
+
+    def __init__(self, precision: int) -> None:
+        if not MIN_PRECISION <= precision <= MAX_PRECISION:
+            raise ValueError(
+                f"Точность HyperLogLog должна быть от {MIN_PRECISION} "
+                f"до {MAX_PRECISION}, получено {precision}"
+            )
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    @staticmethod
+    def precision_for(error: float) -> int:
+        """Наименьшая точность, при которой ошибка не больше error"""
+
+        precision = math.ceil(math.log2((1.04 / error) ** 2))
+        return min(max(precision, MIN_PRECISION), MAX_PRECISION)
+
+    @property
+    def error(self) -> float:
+        """Относительная стандартная ошибка оценки"""
+
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def add(self, value: Any) -> None:
+        """Добавляет значение"""
+
+        hashed = _hash64(value)
+        bits = 64 - self.precision
+        index = hashed >> bits
+        rank = bits - (hashed & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def folded(self, precision: int) -> bytearray:
+        """Регистры, пересчитанные для меньшей точности"""
+
+        shift = self.precision - precision
+        registers = bytearray(1 << precision)
+        for index, rank in enumerate(self.registers):
+            if not rank:
+                continue
+            low_bits = index & ((1 << shift) - 1)
+            if low_bits:
+                rank = shift - low_bits.bit_length() + 1
+            else:
+                rank += shift
+            target = index >> shift
+            registers[target] = max(registers[target], rank)
+        return registers
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """Добавляет значения другой сводки"""
+
+        if other.precision < self.precision:
+            self.registers = self.folded(other.precision)
+            self.precision = other.precision
+        registers = (
+            other.registers
+            if other.precision == self.precision
+            else other.folded(self.precision)
+        )
+        self.registers = bytearray(map(max, self.registers, registers))
+        return self
+
+    def estimate(self) -> int:
+        """Оценка числа различных значений"""
+
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        raw = alpha * size * size / sum(2.0**-rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * size and zeros:
+            return round(size * math.log(size / zeros))
+        return round(raw)
+
+
+class QuantileSketch:
+    """
+    Квантили с относительной ошибкой (DDSketch)
+
+    Значения раскладываются по корзинам с границами gamma^i, где
+    gamma = (1 + error) / (1 - error), поэтому любой квантиль отличается
+    от точного не больше чем на error от его величины. Сводки с одной
+    ошибкой объединяются сложением корзин.
+    """
+
+    def __init__(self, error: float) -> None:
+        if not 0 < error < 1:
+            raise ValueError(f"Ошибка квантилей должна быть от 0 до 1: {error}")
+        self.error = error
+        self._log_gamma = math.log(self.gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @property
+    def gamma(self) -> float:
+        """Отношение границ соседних корзин"""
+
+        return (1 + self.error) / (1 - self.error)
+
+    @property
+    def count(self) -> int:
+        """Число добавленных значений"""
+
+        return self.zero + sum(self.positive.values()) + sum(self.negative.values())
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        gamma = self.gamma
+        return 2 * gamma**key / (gamma + 1)
+
+    def add(self, value: float, count: int = 1) -> None:
+        """Добавляет значение count раз"""
+
+        self._add_to_bucket(value, count)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def _add_to_bucket(self, value: float, count: int) -> None:
+        """Добавляет count значений в корзину value"""
+
+        if value > 0:
+            key = self._key(value)
+            self.positive[key] = self.positive.get(key, 0) + count
+        elif value < 0:
+            key = self._key(-value)
+            self.negative[key] = self.negative.get(key, 0) + count
+        else:
+            self.zero += count
+
+    def buckets(self) -> List[Tuple[float, int]]:
+        """Представители корзин по возрастанию и их количества"""
+
+        buckets = [
+            (-self._value(key), self.negative[key])
+            for key in sorted(self.negative, reverse=True)
+        ]
+        if self.zero:
+            buckets.append((0.0, self.zero))
+        buckets.extend(
+            (self._value(key), self.positive[key]) for key in sorted(self.positive)
+        )
+        return buckets
+
+    def quantile(self, q: float) -> float:
+        """Возвращает квантиль уровня q от 0 до 1"""
+
+        total = self.count
+        if not total:
+            return math.nan
+
+        rank = q * (total - 1)
+        seen = 0
+        value = self.max
+        for value, count in self.buckets():
+            seen += count
+            if seen > rank:
+                break
+        return min(max(value, self.min), self.max)
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Добавляет значения другой сводки"""
+
+        if other.gamma == self.gamma:
+            for key, count in other.positive.items():
+                self.positive[key] = self.positive.get(key, 0) + count
+            for key, count in other.negative.items():
+                self.negative[key] = self.negative.get(key, 0) + count
+            self.zero += other.zero
+        else:
+            for value, count in other.buckets():
+                self._add_to_bucket(value, count)
+
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+
+class BloomFilter:
+    """
+    Проверка принадлежности значения множеству (фильтр Блума)
+
+    Отрицательный ответ точный: добавленное значение всегда находится.
+    Положительный ответ ошибочен с вероятностью около error, заданной
+    в for_capacity(). Позиции битов - двойное хэширование 128-битного
+    хэша, одинакового во всех процессах.
+    """
+
+    def __init__(self, size: int, hashes: int, bits: Optional[bytes] = None) -> None:
+        if size < 1 or hashes < 1:
+            raise ValueError(
+                f"Размер и число хэшей фильтра Блума должны быть больше 0: "
+                f"{size}, {hashes}"
+            )
+        self.size = size
+        self.hashes = hashes
+        self.bits = bytearray((size + 7) // 8) if bits is None else bytearray(bits)
+
+    @classmethod
+    def for_capacity(cls, count: int, error: float) -> "BloomFilter":
+        """Фильтр для count значений с долей ложных срабатываний error"""
+
+        count = max(count, 1)
+        size = math.ceil(-count * math.log(error) / math.log(2) ** 2)
+        hashes = max(1, round(size / count * math.log(2)))
+        return cls(size, hashes)
+
+    def _positions(self, value: Any) -> Iterator[int]:
+        digest = hashlib.blake2b(str(value).encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big") | 1
+        for step in range(self.hashes):
+            yield (first + step * second) % self.size
+
+    def add(self, value: Any) -> None:
+        """Добавляет значение"""
+
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value: Any) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
@@ -0,0 +1,258 @@
+import heapq
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import weakref
+from itertools import chain, islice
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils import profiling
+
+# Количество разделов, на которые делится таблица групп при сбросе на диск
+SPILL_PARTITIONS = 16
+
+# Через сколько строк проверяется размер таблицы групп
+SPILL_CHECK_ROWS = 65536
+
+# Сколько групп берётся для оценки размера одной группы
+SAMPLE_GROUPS = 64
+
+# Примерный размер записи словаря сверх ключа и значения
+DICT_ENTRY_BYTES = 100
+
+# Сколько записей сериализуется в файл за один раз
+RECORDS_PER_DUMP = 4096
+
+# Запись сброшенной группы: ключ, номер первого появления, накопители
+SpilledRecord = Tuple[Any, int, Any]
+
+
+def group_bytes(key: Any, totals: Any) -> int:
+    """Примерный размер группы в памяти: ключ, накопители и запись словаря"""
+
+    size = DICT_ENTRY_BYTES + sys.getsizeof(key) + sys.getsizeof(totals)
+    if isinstance(key, tuple):
+        size += sum(map(sys.getsizeof, key))
+    for value in totals:
+        size += sys.getsizeof(value)
+        if isinstance(value, dict):
+            size += sum(map(sys.getsizeof, value)) + sum(
+                map(sys.getsizeof, value.values())
+            )
+    return size
+
+
+def write_run(path: str, records: Iterable[Any]) -> None:
+    """Записывает записи в файл порциями по RECORDS_PER_DUMP"""
+
+    iterator = iter(records)
+    with open(path, "wb") as file:
+        while chunk := list(islice(iterator, RECORDS_PER_DUMP)):
+            pickle.dump(chunk, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def read_run(path: str) -> Iterator[Any]:
+    """Читает записи файла, записанного write_run(), по порциям"""
+
+    with open(path, "rb") as file:
+        while True:
+            try:
+                chunk = pickle.load(file)
+            except EOFError:
+                return
+            yield from chunk
+
+
+class _RunFiles:
+    """
+    Временный каталог файлов сброса
+
+    Каталог создаётся при первом файле и удаляется cleanup() или,
+    если она не была вызвана, при сборке мусора. При передаче в другой
+    процесс (pickle) обязанность удалить каталог переходит к получателю.
+    """
+
+    def __init__(self) -> None:
+        self.directory: Optional[str] = None
+        self.created = 0
+        self._finalizer: Optional[weakref.finalize] = None
+
+    def path(self) -> str:
+        """Путь нового файла в каталоге"""
+
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix="spill-")
+            self._track(self.directory)
+        self.created += 1
+        return os.path.join(self.directory, f"{self.created}.run")
+
+    def _track(self, directory: str) -> None:
+        """Удаляет каталог при сборке мусора"""
+
+        self._finalizer = weakref.finalize(
+            self, shutil.rmtree, directory, ignore_errors=True
+        )
+
+    def __getstate__(self) -> Dict[str, Any]:
+        if self._finalizer is not None:
+            self._finalizer.detach()
+            self._finalizer = None
+        return {"directory": self.directory, "created": self.created}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.directory = state["directory"]
+        self.created = state["created"]
+        self._finalizer = None
+        if self.directory is not None:
+            self._track(self.directory)
+
+    def cleanup(self) -> None:
+        """Удаляет каталог со всеми файлами"""
+
+        if self._finalizer is not None:
+            self._finalizer()
+        self.directory = None
+        self._finalizer = None
+
+
+class GroupSpill:
+    """
+    Таблица групп с ограничением памяти
+
+    Пока таблица (table) помещается в memory_limit байт, она живёт
+    в памяти. Когда её оценка размера превышает предел, spill() делит
+    группы по хешу ключа на SPILL_PARTITIONS разделов и записывает
+    каждый раздел, упорядоченный по ключу, отдельным файлом во временный
+    каталог, а таблица очищается. Каждая группа сохраняет номер своего
+    первого появления, поэтому порядок групп с равной метрикой после
+    объединения совпадает с порядком в памяти.
+
+    Хеш ключа не стабилен между процессами, поэтому сброс и объединение
+    разделов выполняются в одном процессе; таблица, переданная из другого
+    процесса, читается только через records().
+    """
+
+    def __init__(self, memory_limit: int, partitions: int = SPILL_PARTITIONS) -> None:
+        self.memory_limit = memory_limit
+        self.table: Dict[Any, Any] = {}
+        # Файлы разделов в порядке сбросов
+        self.runs: List[List[str]] = [[] for _ in range(partitions)]
+        # Сколько групп уже сброшено: номера первого появления новых групп
+        self.spilled = 0
+        # Оценка размера одной группы по последней проверке
+        self.group_size = DICT_ENTRY_BYTES
+        self._files = _RunFiles()
+
+    @property
+    def partitions(self) -> int:
+        """Количество разделов таблицы"""
+        return len(self.runs)
+
+    @property
+    def has_runs(self) -> bool:
+        """Была ли таблица хоть раз сброшена на диск"""
+        return self.spilled > 0
+
+    def result(self) -> Any:
+        """Итоговое состояние: таблица, если сбросов не было, иначе self"""
+        return self if self.has_runs else self.table
+
+    def over_limit(self) -> bool:
+        """Превышает ли оценка размера таблицы предел памяти"""
+
+        if not self.table:
+            return False
+        sample = list(islice(self.table.items(), SAMPLE_GROUPS))
+        self.group_size = sum(group_bytes(*group) for group in sample) // len(sample)
+        return len(self.table) * self.group_size > self.memory_limit
+
+    def check(self) -> None:
+        """Сбрасывает таблицу на диск, если она превысила предел памяти"""
+
+        if self.over_limit():
+            self.spill()
+
+    def spill(self) -> None:
+        """Записывает разделы таблицы, упорядоченные по ключу, и очищает её"""
+
+        parts: List[List[SpilledRecord]] = [[] for _ in range(self.partitions)]
+        for ordinal, (key, totals) in enumerate(self.table.items(), self.spilled):
+            parts[hash(key) % self.partitions].append((key, ordinal, totals))
+
+        for partition, records in enumerate(parts):
+            if records:
+                records.sort(key=itemgetter(0))
+                path = self._files.path()
+                write_run(path, records)
+                self.runs[partition].append(path)
+
+        profiling.count("groups_spilled", len(self.table))
+        profiling.count("spill_runs")
+        self.spilled += len(self.table)
+        self.table.clear()
+
+    def iter_partition(self, partition: int) -> Iterator[SpilledRecord]:
+        """
+        Записи раздела из всех сбросов, упорядоченные по ключу
+
+        Записи одного ключа идут подряд в порядке сбросов, то есть первой
+        идёт запись с наименьшим номером первого появления.
+        """
+
+        return heapq.merge(
+            *(read_run(path) for path in self.runs[partition]), key=itemgetter(0)
+        )
+
+    def records(self) -> Iterator[SpilledRecord]:
+        """
+        Все записи таблицы в порядке первого появления групп
+
+        Записи сбросов и групп, оставшихся в памяти, упорядочиваются по номеру
+        первого появления внешней сортировкой, поэтому порядок не зависит
+        от хеша ключей. Группа, сброшенная несколько раз, встречается
+        несколько раз.
+        """
+
+        spilled = chain.from_iterable(
+            read_run(path) for runs in self.runs for path in runs
+        )
+        in_memory = (
+            (key, ordinal, totals)
+            for ordinal, (key, totals) in enumerate(self.table.items(), self.spilled)
+        )
+        return self.sort(chain(spilled, in_memory), key=itemgetter(1))
+
+    def sort(
+        self,
+        records: Iterable[Any],
+        key: Callable[[Any], Any],
+        reverse: bool = False,
+    ) -> Iterator[Any]:
+        """
+        Внешняя сортировка слиянием
+
+        Записи делятся на порции, которые помещаются в предел памяти,
+        каждая порция упорядочивается и записывается в файл, а файлы
+        сливаются при чтении.
+        """
+
+        run_size = max(1, self.memory_limit // self.group_size)
+        iterator = iter(records)
+        paths: List[str] = []
+        while chunk := list(islice(iterator, run_size)):
+            chunk.sort(key=key, reverse=reverse)
+            path = self._files.path()
+            write_run(path, chunk)
+            paths.append(path)
+
+        return heapq.merge(
+            *(read_run(path) for path in paths), key=key, reverse=reverse
+        )
+
+    def close(self) -> None:
+        """Удаляет временные файлы"""
+
+        self._files.cleanup()
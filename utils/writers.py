@@ -0,0 +1,142 @@
+import csv
+import json
+import sys
+from contextlib import contextmanager
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+)
+
+# Количество строк, которые форматируются и записываются за один раз
+PAGE_SIZE = 10000
+
+# Функция записи строк отчёта: заголовки, строки, поток вывода
+RowWriter = Callable[[Sequence[str], Iterable[Sequence[Any]], TextIO], None]
+
+
+def _pages(rows: Iterable[Sequence[Any]]) -> Iterator[List[Sequence[Any]]]:
+    """Делит строки на страницы по PAGE_SIZE"""
+
+    iterator = iter(rows)
+    while page := list(islice(iterator, PAGE_SIZE)):
+        yield page
+
+
+def write_csv(
+    headers: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    stream: TextIO,
+    delimiter: str = ",",
+) -> None:
+    """Записывает строки в CSV"""
+
+    writer = csv.writer(stream, delimiter=delimiter, lineterminator="\n")
+    if headers:
+        writer.writerow(headers)
+    for page in _pages(rows):
+        writer.writerows(page)
+
+
+def write_tsv(
+    headers: Sequence[str], rows: Iterable[Sequence[Any]], stream: TextIO
+) -> None:
+    """Записывает строки в TSV"""
+
+    write_csv(headers, rows, stream, delimiter="\t")
+
+
+def write_jsonl(
+    headers: Sequence[str], rows: Iterable[Sequence[Any]], stream: TextIO
+) -> None:
+    """Записывает строки в JSON Lines: по объекту {заголовок: значение} на строку"""
+
+    for page in _pages(rows):
+        stream.write(
+            "".join(
+                json.dumps(dict(zip(headers, row)), ensure_ascii=False) + "\n"
+                for row in page
+            )
+        )
+
+
+def write_text(
+    headers: Sequence[str], rows: Iterable[Sequence[Any]], stream: TextIO
+) -> None:
+    """
+    Записывает строки таблицей с колонками фиксированной ширины
+
+    Ширина колонок считается по заголовку и первой странице и только
+    растёт на следующих страницах, поэтому таблица выводится постранично
+    без прохода по всем строкам. Числа выравниваются вправо, текст влево.
+    """
+
+    widths = [len(str(header)) for header in headers]
+    header_written = False
+
+    for page in _pages(rows):
+        cells = [[str(value) for value in row] for row in page]
+        for row_cells in cells:
+            if len(row_cells) > len(widths):
+                widths.extend([0] * (len(row_cells) - len(widths)))
+            for position, cell in enumerate(row_cells):
+                widths[position] = max(widths[position], len(cell))
+
+        lines = []
+        if not header_written:
+            lines.append(_format_line([str(header) for header in headers], widths))
+            lines.append("  ".join("-" * width for width in widths))
+            header_written = True
+
+        for row, row_cells in zip(page, cells):
+            lines.append(
+                "  ".join(
+                    (
+                        cell.rjust(widths[position])
+                        if isinstance(value, (int, float))
+                        else cell.ljust(widths[position])
+                    )
+                    for position, (value, cell) in enumerate(zip(row, row_cells))
+                ).rstrip()
+            )
+        stream.write("\n".join(lines) + "\n")
+
+    if not header_written and headers:
+        stream.write(_format_line([str(header) for header in headers], widths) + "\n")
+
+
+def _format_line(cells: Sequence[str], widths: Sequence[int]) -> str:
+    """Выравнивает ячейки заголовка по ширине колонок"""
+
+    return "  ".join(cell.ljust(width) for cell, width in zip(cells, widths)).rstrip()
+
+
+# Потоковые форматы вывода; табличный grid выводится BaseReport.print_report
+WRITERS: Dict[str, RowWriter] = {
+    "csv": write_csv,
+    "tsv": write_tsv,
+    "jsonl": write_jsonl,
+    "text": write_text,
+}
+
+# Все форматы вывода для --output-format
+OUTPUT_FORMATS = ["grid"] + list(WRITERS)
+
+
+@contextmanager
+def open_output(file_path: Optional[str] = None) -> Iterator[TextIO]:
+    """Открывает файл для вывода отчёта или отдаёт stdout, если путь не указан"""
+
+    if file_path is None:
+        yield sys.stdout
+        return
+
+    with open(file_path, "w", encoding="utf-8", newline="") as file:
+        yield file